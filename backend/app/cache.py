@@ -0,0 +1,111 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Iterable, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+# In-process response cache for the financial dashboards.
+# Every organization has a data version, a config_versions row that is bumped in the same transaction
+# as any write to its payments or expenses (see listeners.py). Cache keys include that version, read
+# on every request, so a commit from any worker, CLI or scheduled task makes older entries unreachable
+# immediately; the TTL bounds staleness of the figures that are not versioned (member counts,
+# organization details).
+
+class TTLCache:
+    """A size-bounded LRU mapping whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+# Organization data versions
+
+def data_version_name(organization_id: int) -> str:
+    return f"organization_data:{organization_id}"
+
+async def get_data_version(db: AsyncSession, organization_id: int) -> int:
+    return (await db.execute(
+        select(models.ConfigVersion.version).where(models.ConfigVersion.name == data_version_name(organization_id))
+    )).scalar() or 0
+
+def bump_data_versions(bind, organization_ids: Iterable[int]) -> None:
+    """Bumps the organizations' data versions in the caller's transaction (a Session or Connection)."""
+    names = [data_version_name(organization_id) for organization_id in sorted(set(organization_ids) - {None})]
+    if not names:
+        return
+    table = models.ConfigVersion.__table__
+    statement = sqlite_insert(table).values([{"name": name, "version": 1} for name in names])
+    bind.execute(statement.on_conflict_do_update(index_elements=["name"], set_={"version": table.c.version + 1}))
+
+# Cached JSON responses
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+response_cache = TTLCache(maxsize=512, ttl=300)
+# (model name, primary key) -> (title attribute, title) for grouped notification messages. Entities
+# edited through this process are evicted on commit (see listeners.py); the TTL bounds how long
+# another worker's edit can go unnoticed.
+entity_title_cache = TTLCache(maxsize=4096, ttl=600)
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+def _send(request: Request, cached: CachedResponse) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+async def cached_json_response(
+    request: Request, db: AsyncSession, endpoint: str, organization_id: int, params: tuple, build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Serves `build()` as JSON from the cache while the organization's data version is unchanged."""
+    key = (endpoint, organization_id, await get_data_version(db, organization_id), params)
+    cached = response_cache.get(key)
+    if cached is None:
+        body = JSONResponse(content=await build()).body
+        cached = CachedResponse(body=body, etag=f'"{hashlib.sha1(body).hexdigest()}"')
+        response_cache.set(key, cached)
+    return _send(request, cached)
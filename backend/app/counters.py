@@ -0,0 +1,263 @@
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update, func, case, and_, or_, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Notification counters
+# One row per feed owner with its unread and ever-delivered notification counts, so the badge is
+# a primary-key lookup. listeners.py applies a delta with every ORM notification write; the
+# set-based paths in crud.py (bulk fan-out, receipts, bulk deletes) apply theirs explicitly.
+# `python -m app.counters reconcile` recomputes them from the notifications table.
+# Every key a session changes is also noted in session.info, and published to hub.py's live
+# notification streams once the transaction commits.
+
+USER = "user"
+ADMIN = "admin"
+# Organization-wide notifications, whose read state is shared by the organization
+ORGANIZATION = "organization"
+# An organization's live broadcasts, and per member how many of them they have read or dismissed;
+# a member's unread broadcasts are the difference
+BROADCASTS = "broadcasts"
+BROADCASTS_SEEN = "broadcasts_seen"
+
+CounterKey = Tuple[str, int]
+CHANGED_KEYS = "changed_notification_counters"
+
+def note_changed_keys(session, keys: Iterable[CounterKey]) -> None:
+    # Connections (migrations, reconcile) have no live streams to tell
+    if isinstance(session, Session):
+        session.info.setdefault(CHANGED_KEYS, set()).update(keys)
+
+def owner_key(user_id, admin_id, organization_id, is_broadcast) -> Optional[CounterKey]:
+    if is_broadcast:
+        return (BROADCASTS, organization_id) if organization_id is not None else None
+    if user_id is not None:
+        return (USER, user_id)
+    if admin_id is not None:
+        return (ADMIN, admin_id)
+    if organization_id is not None:
+        return (ORGANIZATION, organization_id)
+    return None
+
+def unread_weight(is_broadcast, is_read, is_dismissed) -> int:
+    # Broadcasts always count at the organization level; members' reads are BROADCASTS_SEEN
+    return 1 if is_broadcast or (not is_read and not is_dismissed) else 0
+
+def notification_state(notification: models.Notification) -> Tuple[Optional[CounterKey], int]:
+    return (
+        owner_key(notification.user_id, notification.admin_id, notification.organization_id, notification.is_broadcast),
+        unread_weight(notification.is_broadcast, notification.is_read, notification.is_dismissed),
+    )
+
+class CounterDeltas:
+    """Accumulates unread/delivered count changes per owner and writes them as one upsert."""
+
+    def __init__(self):
+        self.deltas: Dict[CounterKey, List[int]] = defaultdict(lambda: [0, 0])
+
+    def add(self, key: Optional[CounterKey], unread: int = 0, delivered: int = 0) -> None:
+        if key is None:
+            return
+        self.deltas[key][0] += unread
+        self.deltas[key][1] += delivered
+
+    def apply(self, session: Session) -> None:
+        rows = [
+            {"owner_type": key[0], "owner_id": key[1], "unread_count": unread, "delivered_count": delivered}
+            for key, (unread, delivered) in self.deltas.items() if unread or delivered
+        ]
+        if rows:
+            table = models.NotificationCounter.__table__
+            statement = sqlite_insert(table).values(rows)
+            session.execute(statement.on_conflict_do_update(
+                index_elements=["owner_type", "owner_id"],
+                set_={
+                    "unread_count": table.c.unread_count + statement.excluded.unread_count,
+                    "delivered_count": table.c.delivered_count + statement.excluded.delivered_count,
+                },
+            ))
+            note_changed_keys(session, self.deltas)
+        self.deltas.clear()
+
+def load_notification_state(session: Session, notification_ids: Iterable[int]) -> Dict[int, Tuple[Optional[CounterKey], int]]:
+    """Current (pre-flush) database state of changed notifications."""
+    if not notification_ids:
+        return {}
+    Notification = models.Notification
+    with session.no_autoflush:
+        rows = session.execute(select(
+            Notification.id, Notification.user_id, Notification.admin_id, Notification.organization_id,
+            Notification.is_broadcast, Notification.is_read, Notification.is_dismissed,
+        ).where(Notification.id.in_(notification_ids))).all()
+    return {row.id: (owner_key(*row[1:5]), unread_weight(*row[4:7])) for row in rows}
+
+def broadcasts_seen_query(*criteria):
+    """(member id, seen count, 0) per member: broadcasts of their organization they read or dismissed,
+    plus the ones sent before they joined it, which their feed never shows."""
+    Notification, Receipt, User = models.Notification, models.NotificationReceipt, models.User
+    return select(User.id, func.count(Notification.id), 0).join(
+        Notification, and_(Notification.organization_id == User.organization_id, Notification.is_broadcast == True)
+    ).outerjoin(
+        Receipt, and_(Receipt.notification_id == Notification.id, Receipt.user_id == User.id)
+    ).where(
+        or_(Notification.created_at < User.organization_joined_at, Receipt.read_at.isnot(None), Receipt.dismissed_at.isnot(None)),
+        *criteria,
+    ).group_by(User.id)
+
+def count_broadcasts_seen(session: Session, user_id: int, organization_id: Optional[int], joined_at: Optional[datetime]) -> int:
+    # Takes the organization and join time as arguments: during a flush the users row still holds the old ones
+    Notification, Receipt = models.Notification, models.NotificationReceipt
+    seen = [Receipt.read_at.isnot(None), Receipt.dismissed_at.isnot(None)]
+    if joined_at is not None:
+        seen.append(Notification.created_at < joined_at)
+    return session.execute(select(func.count()).select_from(Notification).outerjoin(
+        Receipt, and_(Receipt.notification_id == Notification.id, Receipt.user_id == user_id)
+    ).where(
+        Notification.is_broadcast == True,
+        Notification.organization_id == organization_id,
+        or_(*seen),
+    )).scalar()
+
+def reset_broadcasts_seen(session: Session, user_id: int, organization_id: Optional[int], joined_at: Optional[datetime]) -> None:
+    """Recounts a member's seen broadcasts, e.g. after they joined or moved to another organization."""
+    table = models.NotificationCounter.__table__
+    statement = sqlite_insert(table).values(
+        owner_type=BROADCASTS_SEEN, owner_id=user_id,
+        unread_count=count_broadcasts_seen(session, user_id, organization_id, joined_at), delivered_count=0
+    )
+    session.execute(statement.on_conflict_do_update(
+        index_elements=["owner_type", "owner_id"], set_={"unread_count": statement.excluded.unread_count}
+    ))
+    note_changed_keys(session, [(BROADCASTS_SEEN, user_id)])
+
+def recount_broadcasts_seen(session: Session, organization_ids: Iterable[int]) -> None:
+    """Recounts the seen broadcasts of every member of the organizations, e.g. after broadcasts were deleted."""
+    organization_ids = list(organization_ids)
+    if not organization_ids:
+        return
+    table, User = models.NotificationCounter.__table__, models.User
+    members = select(User.id).where(User.organization_id.in_(organization_ids))
+    # Members with nothing seen left get no row from the recount
+    session.execute(update(table).where(table.c.owner_type == BROADCASTS_SEEN, table.c.owner_id.in_(members)).values(unread_count=0))
+    rows = [
+        {"owner_type": BROADCASTS_SEEN, "owner_id": user_id, "unread_count": seen, "delivered_count": 0}
+        for user_id, seen, _ in session.execute(broadcasts_seen_query(User.organization_id.in_(organization_ids)))
+    ]
+    if rows:
+        statement = sqlite_insert(table)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=["owner_type", "owner_id"], set_={"unread_count": statement.excluded.unread_count}
+        ), rows)
+    note_changed_keys(session, [(BROADCASTS_SEEN, user_id) for user_id in session.execute(members).scalars()])
+
+# Reading
+
+async def get_feed_counter_keys(
+    db: AsyncSession, user_id: Optional[int] = None, admin_id: Optional[int] = None, organization_id: Optional[int] = None
+) -> Tuple[List[CounterKey], List[CounterKey]]:
+    """The counter rows an owner's feed adds up, and the ones it subtracts."""
+    added: List[CounterKey] = []
+    subtracted: List[CounterKey] = []
+    if user_id:
+        user_org_id = (await db.execute(select(models.User.organization_id).where(models.User.id == user_id))).scalar()
+        added.append((USER, user_id))
+        if user_org_id is not None:
+            added += [(ORGANIZATION, user_org_id), (BROADCASTS, user_org_id)]
+            subtracted.append((BROADCASTS_SEEN, user_id))
+    elif admin_id:
+        admin_org_ids = (await db.execute(
+            select(models.organization_admins.c.organization_id).where(models.organization_admins.c.admin_id == admin_id)
+        )).scalars().all()
+        added += [(ADMIN, admin_id)] + [(ORGANIZATION, org_id) for org_id in admin_org_ids]
+    elif organization_id:
+        added.append((ORGANIZATION, organization_id))
+    return added, subtracted
+
+async def get_notification_counts(
+    db: AsyncSession, user_id: Optional[int] = None, admin_id: Optional[int] = None, organization_id: Optional[int] = None,
+    keys: Optional[Tuple[List[CounterKey], List[CounterKey]]] = None,
+) -> Dict[str, int]:
+    """Unread and delivered totals of the owner's feed, from a handful of counter rows."""
+    added, subtracted = keys or await get_feed_counter_keys(db, user_id=user_id, admin_id=admin_id, organization_id=organization_id)
+
+    Counter = models.NotificationCounter
+    counts = {}
+    if added:
+        rows = (await db.execute(
+            select(Counter.owner_type, Counter.owner_id, Counter.unread_count, Counter.delivered_count)
+            .where(tuple_(Counter.owner_type, Counter.owner_id).in_(added + subtracted))
+        )).all()
+        counts = {(row.owner_type, row.owner_id): (row.unread_count, row.delivered_count) for row in rows}
+    unread = sum(counts.get(key, (0, 0))[0] for key in added) - sum(counts.get(key, (0, 0))[0] for key in subtracted)
+    delivered = sum(counts.get(key, (0, 0))[1] for key in added)
+    return {"unread_count": max(unread, 0), "delivered_count": delivered}
+
+# Reconciliation
+
+def reconcile_notification_counters(bind) -> int:
+    Notification = models.Notification
+    Notification, Receipt, User = models.Notification, models.NotificationReceipt, models.User
+    unread = func.sum(case((and_(Notification.is_read == False, Notification.is_dismissed == False), 1), else_=0))
+    personal = Notification.is_broadcast == False
+    grouped = [
+        (USER, select(Notification.user_id, unread, func.count()).where(personal, Notification.user_id.isnot(None)).group_by(Notification.user_id)),
+        (ADMIN, select(Notification.admin_id, unread, func.count()).where(
+            personal, Notification.user_id.is_(None), Notification.admin_id.isnot(None)
+        ).group_by(Notification.admin_id)),
+        (ORGANIZATION, select(Notification.organization_id, unread, func.count()).where(
+            personal, Notification.user_id.is_(None), Notification.admin_id.is_(None), Notification.organization_id.isnot(None)
+        ).group_by(Notification.organization_id)),
+        (BROADCASTS, select(Notification.organization_id, func.count(), func.count()).where(
+            Notification.is_broadcast == True, Notification.organization_id.isnot(None)
+        ).group_by(Notification.organization_id)),
+        (BROADCASTS_SEEN, broadcasts_seen_query()),
+    ]
+    rows = []
+    for owner_type, statement in grouped:
+        rows += [
+            {"owner_type": owner_type, "owner_id": owner_id, "unread_count": unread_count, "delivered_count": delivered_count}
+            for owner_id, unread_count, delivered_count in bind.execute(statement)
+        ]
+
+    table = models.NotificationCounter.__table__
+    bind.execute(update(table).values(unread_count=0))
+    if rows:
+        statement = sqlite_insert(table)
+        bind.execute(statement.on_conflict_do_update(
+            index_elements=["owner_type", "owner_id"],
+            set_={
+                "unread_count": statement.excluded.unread_count,
+                "delivered_count": func.max(table.c.delivered_count, statement.excluded.delivered_count),
+            },
+        ), rows)
+    logging.info(f"Reconciled {len(rows)} notification counter(s).")
+    return len(rows)
+
+def main(argv: List[str] = None) -> int:
+    from .database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Notification counter maintenance")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        reconciled = reconcile_notification_counters(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Reconciled {reconciled} notification counter(s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
 from sqlalchemy.orm import Session, joinedload
-from . import models, schemas
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, schemas, counters, notification_configs, cache
 from passlib.context import CryptContext
 from datetime import datetime, date, timezone, timedelta
 import logging
 from sqlalchemy.sql import exists
 philippine_timezone = timezone(timedelta(hours=8))
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, update, func, null, delete, case, cast, literal, distinct, union_all, tuple_, String
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import Optional, Tuple, List, Dict, Any
 import json
+import base64
+import binascii
 from collections import defaultdict
 from fastapi import Request
 
@@ -75,6 +80,53 @@ def get_user(db: Session, identifier: str) -> Optional[models.User]:
         (models.User.student_number == identifier) | (models.User.email == identifier)
     ).first()
 
+# Member listing
+# Organization members are read a page at a time in id order with an id keyset cursor, selecting
+# only the requested columns, so a page costs the same however large the organization is.
+MEMBER_LIST_PAGE_SIZE = 100
+MEMBER_LIST_FIELDS = ("student_number", "last_name", "first_name", "email", "year_level", "section", "course", "is_verified")
+DEFAULT_MEMBER_LIST_FIELDS = ("student_number", "last_name", "first_name")
+
+def organization_member_filters(
+    organization_id: int, section: Optional[str] = None, year_level: Optional[str] = None, student_number: Optional[str] = None
+) -> list:
+    filters = [models.User.organization_id == organization_id]
+    if section:
+        filters.append(models.User.section == section)
+    if year_level:
+        filters.append(models.User.year_level == year_level)
+    if student_number:
+        filters.append(models.User.student_number == student_number)
+    return filters
+
+def organization_members_query(filters: list, fields=DEFAULT_MEMBER_LIST_FIELDS, after_id: Optional[int] = None, limit: int = MEMBER_LIST_PAGE_SIZE):
+    """One page of members with the given fields, plus one extra row telling whether another page follows."""
+    unknown = set(fields) - set(MEMBER_LIST_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown member field(s): {', '.join(sorted(unknown))}")
+    query = select(models.User.id, *(getattr(models.User, field) for field in fields)).where(*filters)
+    if after_id is not None:
+        query = query.where(models.User.id > after_id)
+    return query.order_by(models.User.id).limit(limit + 1)
+
+def organization_members_count_query(filters: list):
+    return select(func.count(models.User.id)).where(*filters)
+
+def format_member_page(rows, fields, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """The page's members as dicts of the requested fields, and the next page's cursor."""
+    next_cursor = encode_member_list_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return [{field: getattr(row, field) for field in fields} for row in rows[:limit]], next_cursor
+
+def encode_member_list_cursor(user_id: int) -> str:
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode()
+
+def decode_member_list_cursor(cursor: str) -> int:
+    """Raises ValueError for a cursor that was not produced by encode_member_list_cursor."""
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (UnicodeDecodeError, binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid member list cursor: {cursor}") from e
+
 # Authentication Operations
 def authenticate_user(db: Session, identifier: str, password: str) -> Optional[models.User]:
     user = get_user(db, identifier)
@@ -192,6 +244,15 @@ def mark_payment_item_as_paid(db: Session, payment_item_id: int) -> Optional[mod
     return None
 
 # Notification Operations
+def get_archived_event_identifiers(db: Session, event_identifiers: List[str]) -> set:
+    """The identifiers whose notification was already sent and has since been removed by retention."""
+    if not event_identifiers:
+        return set()
+    archive = models.NotificationArchive
+    return set(db.execute(
+        select(archive.event_identifier).where(archive.event_identifier.in_(set(event_identifiers)))
+    ).scalars().all())
+
 def create_notification(
     db: Session,
     message: str,
@@ -241,6 +302,9 @@ def create_notification(
             return None
         else:
             return existing_notification
+    elif get_archived_event_identifiers(db, [event_identifier]):
+        # Already sent, then removed by retention once read or dismissed
+        return None
     else:
         db_notification = models.Notification(
             message=message,
@@ -262,174 +326,506 @@ def create_notification(
         db.add(db_notification)
         return db_notification
 
-def mark_notification_as_dismissed_by_owner(
+def create_notifications_bulk(db: Session, notifications: List[Dict[str, Any]]) -> int:
+    """
+    Inserts many notifications with one executemany. Rows whose event_identifier already
+    exists (including dismissed ones) are skipped by the unique index, and archived ones
+    are filtered out beforehand, so re-sending a fan-out is harmless. Returns the number of rows actually inserted.
+    """
+    archived = get_archived_event_identifiers(db, [notification["event_identifier"] for notification in notifications])
+    notifications = [notification for notification in notifications if notification["event_identifier"] not in archived]
+    if not notifications:
+        return 0
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "message": notification["message"],
+            "event_identifier": notification["event_identifier"],
+            "organization_id": notification.get("organization_id"),
+            "user_id": notification.get("user_id"),
+            "admin_id": notification.get("admin_id"),
+            "notification_type": notification.get("notification_type"),
+            "bulletin_post_id": notification.get("bulletin_post_id"),
+            "event_id": notification.get("event_id"),
+            "payment_id": notification.get("payment_id"),
+            "payment_item_id": notification.get("payment_item_id"),
+            "verified_user_id": notification.get("verified_user_id"),
+            "url": notification.get("url"),
+            "is_broadcast": notification.get("is_broadcast", False),
+            "is_read": False,
+            "is_dismissed": False,
+            "created_at": created_at,
+        }
+        for notification in notifications
+    ]
+    table = models.Notification.__table__
+    statement = sqlite_insert(table).on_conflict_do_nothing(index_elements=["event_identifier"]).returning(
+        table.c.user_id, table.c.admin_id, table.c.organization_id, table.c.is_broadcast
+    )
+    inserted = db.execute(statement, rows).all()
+    # Core inserts bypass the ORM flush, so the unread counters are updated here
+    deltas = counters.CounterDeltas()
+    for row in inserted:
+        deltas.add(counters.owner_key(*row), unread=1, delivered=1)
+    deltas.apply(db)
+    logging.info(f"Bulk notification fan-out inserted {len(inserted)} of {len(rows)} notification(s).")
+    return len(inserted)
+
+def delete_notifications(db: Session, *criteria) -> int:
+    """Deletes the matching notifications and their receipts, keeping the unread counters in step."""
+    Notification, Receipt = models.Notification, models.NotificationReceipt
+    notification_ids = db.execute(select(Notification.id).where(*criteria)).scalars().all()
+    if not notification_ids:
+        return 0
+    deltas = counters.CounterDeltas()
+    for key, unread in counters.load_notification_state(db, notification_ids).values():
+        deltas.add(key, unread=-unread)
+    broadcast_org_ids = {key[1] for key in deltas.deltas if key[0] == counters.BROADCASTS}
+    deltas.apply(db)
+    db.execute(delete(Receipt).where(Receipt.notification_id.in_(notification_ids)))
+    db.execute(delete(Notification).where(Notification.id.in_(notification_ids)))
+    # Seen counts include the broadcasts sent before each member joined, so they are recounted rather than decremented
+    counters.recount_broadcasts_seen(db, broadcast_org_ids)
+    return len(notification_ids)
+
+def notify_organization_members(
+    db: Session,
+    organization_id: int,
+    message: str,
+    event_identifier_prefix: str,
+    event_identifier_suffix: str,
+    notification_type: Optional[str] = None,
+    url: Optional[str] = None,
+    **entity_ids: Optional[int]
+) -> int:
+    """Fans one notification out to every member of an organization; identifiers are `{prefix}_user_{id}_{suffix}`."""
+    user_ids = db.execute(select(models.User.id).where(models.User.organization_id == organization_id)).scalars().all()
+    return create_notifications_bulk(db, [
+        {
+            "message": message,
+            "event_identifier": f"{event_identifier_prefix}_user_{user_id}_{event_identifier_suffix}",
+            "organization_id": organization_id,
+            "user_id": user_id,
+            "notification_type": notification_type,
+            "url": url,
+            **entity_ids,
+        }
+        for user_id in user_ids
+    ])
+
+def create_broadcast_notification(
+    db: Session,
+    organization_id: int,
+    message: str,
+    event_identifier: str,
+    notification_type: Optional[str] = None,
+    url: Optional[str] = None,
+    **entity_ids: Optional[int]
+) -> int:
+    """Stores one notification for every member of an organization; returns 0 if the identifier already exists."""
+    return create_notifications_bulk(db, [{
+        "message": message,
+        "event_identifier": event_identifier,
+        "organization_id": organization_id,
+        "notification_type": notification_type,
+        "url": url,
+        "is_broadcast": True,
+        **entity_ids,
+    }])
+
+def notify_organization_admins(
     db: Session,
+    organization_id: int,
+    message: str,
+    event_identifier_prefix: str,
+    event_identifier_suffix: str,
+    notification_type: Optional[str] = None,
+    url: Optional[str] = None,
+    **entity_ids: Optional[int]
+) -> int:
+    """Fans one notification out to every admin of an organization; identifiers are `{prefix}_admin_{id}_{suffix}`."""
+    admin_ids = db.execute(
+        select(models.organization_admins.c.admin_id).where(models.organization_admins.c.organization_id == organization_id)
+    ).scalars().all()
+    return create_notifications_bulk(db, [
+        {
+            "message": message,
+            "event_identifier": f"{event_identifier_prefix}_admin_{admin_id}_{event_identifier_suffix}",
+            "organization_id": organization_id,
+            "admin_id": admin_id,
+            "notification_type": notification_type,
+            "url": url,
+            **entity_ids,
+        }
+        for admin_id in admin_ids
+    ])
+
+async def mark_notification_as_dismissed_by_owner(
+    db: AsyncSession,
     notification_id: int,
     user_id: Optional[int] = None,
     admin_id: Optional[int] = None,
     organization_id: Optional[int] = None
 ) -> Optional[models.Notification]:
-    query = db.query(models.Notification).filter(models.Notification.id == notification_id)
+    stmt = select(models.Notification).where(models.Notification.id == notification_id, models.Notification.is_broadcast == False)
 
     if user_id:
-        query = query.filter(models.Notification.user_id == user_id)
+        if await get_visible_broadcast_ids(db, user_id, [notification_id]):
+            await upsert_notification_receipts(db, user_id, [notification_id], dismissed=True)
+            await db.commit()
+            logging.info(f"Broadcast notification ID {notification_id} dismissed for user {user_id}.")
+            return await db.get(models.Notification, notification_id)
+        stmt = stmt.where(models.Notification.user_id == user_id)
     elif admin_id:
-        query = query.filter(models.Notification.admin_id == admin_id)
+        stmt = stmt.where(models.Notification.admin_id == admin_id)
     elif organization_id:
-        query = query.filter(models.Notification.organization_id == organization_id)
+        stmt = stmt.where(models.Notification.organization_id == organization_id)
     else:
         return None 
 
-    notification_to_dismiss = query.first()
+    notification_to_dismiss = (await db.execute(stmt)).scalars().first()
 
     if notification_to_dismiss:
         notification_to_dismiss.is_dismissed = True
         db.add(notification_to_dismiss) 
-        db.commit()
-        db.refresh(notification_to_dismiss)
+        await db.commit()
+        await db.refresh(notification_to_dismiss)
         logging.info(f"Notification ID {notification_id} marked as dismissed.")
         return notification_to_dismiss
     return None
 
-def mark_all_notifications_as_dismissed_by_owner(
-    db: Session,
+async def mark_all_notifications_as_dismissed_by_owner(
+    db: AsyncSession,
     user_id: Optional[int] = None,
     admin_id: Optional[int] = None,
     organization_id: Optional[int] = None
 ) -> int:
-    query = db.query(models.Notification).filter(models.Notification.is_dismissed == False) 
+    """Dismisses everything the owner has with one UPDATE (plus one receipt upsert for a member's broadcasts)."""
+    Notification, Receipt = models.Notification, models.NotificationReceipt
+    broadcast_count = 0
     if user_id:
-        query = query.filter(models.Notification.user_id == user_id)
+        user_org_id, user_joined_at, _ = await _get_feed_organizations(db, user_id, None)
+        visible = [] if user_joined_at is None else [Notification.created_at >= user_joined_at]
+        broadcast_ids = list((await db.execute(select(Notification.id).outerjoin(
+            Receipt, and_(Receipt.notification_id == Notification.id, Receipt.user_id == user_id)
+        ).where(
+            Notification.organization_id == user_org_id,
+            Notification.is_dismissed == False,
+            Notification.is_read == False,
+            Notification.is_broadcast == True,
+            Receipt.dismissed_at.is_(None),
+            *visible,
+        ))).scalars().all())
+        broadcast_count = await upsert_notification_receipts(db, user_id, broadcast_ids, dismissed=True)
+        owned = Notification.user_id == user_id
     elif admin_id:
-        query = query.filter(models.Notification.admin_id == admin_id)
+        owned = Notification.admin_id == admin_id
     elif organization_id:
-        query = query.filter(models.Notification.organization_id == organization_id)
+        owned = Notification.organization_id == organization_id
     else:
-        return 0  
-    notifications_to_dismiss = query.all()
-    count = 0
-    for notif in notifications_to_dismiss:
-        notif.is_dismissed = True
-        db.add(notif)
-        count += 1    
-    db.commit() 
+        return 0
+    dismissed = (await db.execute(
+        update(Notification)
+        .where(owned, Notification.is_dismissed == False, Notification.is_broadcast == False)
+        .values(is_dismissed=True)
+        .returning(Notification.user_id, Notification.admin_id, Notification.organization_id, Notification.is_read)
+        .execution_options(synchronize_session=False)
+    )).all()
+    deltas = counters.CounterDeltas()
+    for row in dismissed:
+        deltas.add(counters.owner_key(row.user_id, row.admin_id, row.organization_id, False), unread=-counters.unread_weight(False, row.is_read, False))
+    await db.run_sync(deltas.apply)
+    count = len(dismissed) + broadcast_count
+    await db.commit() 
     logging.info(f"Marked {count} notifications as dismissed for owner.")
     return count
 
-def get_notifications(
-    db: Session,
+async def mark_notifications_as_read_by_owner(
+    db: AsyncSession,
+    notification_ids: List[int],
     user_id: Optional[int] = None,
     admin_id: Optional[int] = None,
+    organization_id: Optional[int] = None
+) -> int:
+    """Marks the listed notifications read where they are in the owner's feed; returns how many were.
+
+    Personal and organization-wide notifications take one UPDATE, a member's broadcasts one receipt upsert.
+    """
+    if not notification_ids:
+        return 0
+    Notification = models.Notification
+    user_org_id, _, admin_org_ids = await _get_feed_organizations(db, user_id, admin_id)
+
+    def organization_wide(org_ids):
+        return and_(Notification.organization_id.in_(org_ids), Notification.user_id.is_(None), Notification.admin_id.is_(None))
+
+    if user_id:
+        owned = or_(Notification.user_id == user_id, organization_wide([user_org_id]))
+    elif admin_id:
+        owned = or_(Notification.admin_id == admin_id, organization_wide(admin_org_ids))
+    elif organization_id:
+        owned = organization_wide([organization_id])
+    else:
+        return 0
+
+    now = datetime.utcnow()
+    # Rows read earlier keep their read_at, so a returned read_at of `now` marks the ones this call read
+    marked = (await db.execute(
+        update(Notification)
+        .where(Notification.id.in_(notification_ids), Notification.is_broadcast == False, owned)
+        .values(is_read=True, read_at=case((Notification.is_read == True, Notification.read_at), else_=now))
+        .returning(Notification.user_id, Notification.admin_id, Notification.organization_id, Notification.is_dismissed, Notification.read_at)
+        .execution_options(synchronize_session=False)
+    )).all()
+    deltas = counters.CounterDeltas()
+    for row in marked:
+        if row.read_at == now:
+            deltas.add(counters.owner_key(row.user_id, row.admin_id, row.organization_id, False), unread=-counters.unread_weight(False, False, row.is_dismissed))
+    await db.run_sync(deltas.apply)
+
+    broadcast_ids = await get_visible_broadcast_ids(db, user_id, notification_ids) if user_id else []
+    await upsert_notification_receipts(db, user_id, broadcast_ids, read=True)
+    return len(marked) + len(broadcast_ids)
+
+# Notification feeds
+# A feed is read a page at a time, newest first, with a (created_at, id) keyset cursor. Each source
+# of the feed (own, organization-wide, broadcasts) is its own index range walked in order and cut at
+# the page size, so a poll costs the same no matter how long the owner's history is.
+NOTIFICATION_PAGE_SIZE = 30
+# Groups smaller than this are shown as their individual notifications
+NOTIFICATION_GROUP_MIN_SIZE = 4
+# Distinct messages quoted in a group's summary
+NOTIFICATION_GROUP_SAMPLE_SIZE = 3
+
+def notification_feed_queries(
+    user_id: Optional[int] = None,
+    user_org_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    admin_org_ids: List[int] = (),
     organization_id: Optional[int] = None,
-    include_read: bool = False
-) -> List[models.Notification]:
-    notifications_query = db.query(models.Notification)
+    include_read: bool = False,
+    user_joined_at: Optional[datetime] = None
+) -> list:
+    """One statement per source of the owner's feed, each yielding (Notification, the member's receipt read_at) newest first.
+    A member's broadcasts start at `user_joined_at`, when they joined their organization."""
+    Notification, Receipt = models.Notification, models.NotificationReceipt
+    state = [Notification.is_broadcast == False, Notification.is_dismissed == False]
+    if not include_read:
+        state.append(Notification.is_read == False)
+
+    def newest_first(statement):
+        return statement.order_by(Notification.created_at.desc(), Notification.id.desc())
+
+    def own(owner_column, owner_id):
+        return newest_first(select(Notification, null().label("read_at")).where(owner_column == owner_id, *state))
+
+    def organization_wide(org_id):
+        return newest_first(select(Notification, null().label("read_at")).where(
+            Notification.organization_id == org_id, Notification.user_id.is_(None), Notification.admin_id.is_(None), *state
+        ))
 
-    filters = []    
-    filters.append(models.Notification.is_dismissed == False)
     if user_id:
-        user_org_id = db.query(models.User.organization_id).filter(models.User.id == user_id).scalar()
-        filters.append(
-            (models.Notification.user_id == user_id) |
-            (
-                (models.Notification.organization_id == user_org_id) &
-                models.Notification.user_id.is_(None) &
-                models.Notification.admin_id.is_(None)
-            )
+        broadcast_state = [Receipt.dismissed_at.is_(None)]
+        if not include_read:
+            broadcast_state.append(Receipt.read_at.is_(None))
+        if user_joined_at is not None:
+            broadcast_state.append(Notification.created_at >= user_joined_at)
+        broadcasts = newest_first(select(Notification, Receipt.read_at).outerjoin(
+            Receipt, and_(Receipt.notification_id == Notification.id, Receipt.user_id == user_id)
+        ).where(
+            Notification.organization_id == user_org_id,
+            # A broadcast's own is_dismissed/is_read are never set; matching them keeps the index order usable
+            Notification.is_dismissed == False,
+            Notification.is_read == False,
+            Notification.is_broadcast == True,
+            *broadcast_state,
+        ))
+        return [own(Notification.user_id, user_id), organization_wide(user_org_id), broadcasts]
+    if admin_id:
+        return [own(Notification.admin_id, admin_id)] + [organization_wide(org_id) for org_id in admin_org_ids]
+    if organization_id:
+        return [organization_wide(organization_id)]
+    return []
+
+def encode_notification_cursor(notification: models.Notification) -> str:
+    return base64.urlsafe_b64encode(f"{notification.created_at.isoformat()}|{notification.id}".encode()).decode()
+
+def decode_notification_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Raises ValueError for a cursor that was not produced by encode_notification_cursor."""
+    try:
+        created_at, notification_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(notification_id)
+    except (UnicodeDecodeError, binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid notification cursor: {cursor}") from e
+
+async def get_visible_broadcast_ids(db: AsyncSession, user_id: int, notification_ids: List[int]) -> List[int]:
+    """The subset of `notification_ids` that are broadcasts to the member's organization."""
+    if not notification_ids:
+        return []
+    user_org_id, user_joined_at = (await db.execute(
+        select(models.User.organization_id, models.User.organization_joined_at).where(models.User.id == user_id)
+    )).one_or_none() or (None, None)
+    criteria = [
+        models.Notification.id.in_(notification_ids),
+        models.Notification.is_broadcast == True,
+        models.Notification.organization_id == user_org_id,
+    ]
+    if user_joined_at is not None:
+        criteria.append(models.Notification.created_at >= user_joined_at)
+    return list((await db.execute(select(models.Notification.id).where(*criteria))).scalars().all())
+
+async def upsert_notification_receipts(
+    db: AsyncSession, user_id: int, notification_ids: List[int], read: bool = False, dismissed: bool = False
+) -> int:
+    """Records that a member read and/or dismissed broadcasts; earlier timestamps are kept."""
+    if not notification_ids:
+        return 0
+    Receipt = models.NotificationReceipt
+    already_seen = set((await db.execute(
+        select(Receipt.notification_id).where(
+            Receipt.user_id == user_id,
+            Receipt.notification_id.in_(notification_ids),
+            or_(Receipt.read_at.isnot(None), Receipt.dismissed_at.isnot(None)),
         )
+    )).scalars().all())
+    deltas = counters.CounterDeltas()
+    deltas.add((counters.BROADCASTS_SEEN, user_id), unread=len(set(notification_ids) - already_seen))
+    await db.run_sync(deltas.apply)
+    now = datetime.utcnow()
+    table = models.NotificationReceipt.__table__
+    statement = sqlite_insert(table).values([
+        {"notification_id": notification_id, "user_id": user_id,
+         "read_at": now if read else None, "dismissed_at": now if dismissed else None}
+        for notification_id in notification_ids
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=["notification_id", "user_id"],
+        set_={
+            "read_at": func.coalesce(table.c.read_at, statement.excluded.read_at),
+            "dismissed_at": func.coalesce(table.c.dismissed_at, statement.excluded.dismissed_at),
+        },
+    )
+    await db.execute(statement)
+    return len(notification_ids)
+
+async def _get_feed_organizations(
+    db: AsyncSession, user_id: Optional[int], admin_id: Optional[int]
+) -> Tuple[Optional[int], Optional[datetime], List[int]]:
+    """The member's organization and when they joined it, or the organizations the admin manages."""
+    user_org_id, user_joined_at, admin_org_ids = None, None, []
+    if user_id:
+        user_org_id, user_joined_at = (await db.execute(
+            select(models.User.organization_id, models.User.organization_joined_at).where(models.User.id == user_id)
+        )).one_or_none() or (None, None)
     elif admin_id:
-        admin_org_ids = [
-            org.id for org in db.query(models.Admin).filter(models.Admin.admin_id == admin_id).first().organizations
-        ] if db.query(models.Admin).filter(models.Admin.admin_id == admin_id).first() else []
-        filters.append(
-            (models.Notification.admin_id == admin_id) |
-            (
-                (models.Notification.organization_id.in_(admin_org_ids)) &
-                models.Notification.user_id.is_(None) &
-                models.Notification.admin_id.is_(None)
+        admin_org_ids = (await db.execute(
+            select(models.organization_admins.c.organization_id).where(models.organization_admins.c.admin_id == admin_id)
+        )).scalars().all()
+    return user_org_id, user_joined_at, admin_org_ids
+
+async def get_notifications(
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    include_read: bool = False,
+    limit: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None
+) -> List[models.Notification]:
+    """The owner's notifications newest first; `limit` and a decoded cursor (`before`) select one page."""
+    user_org_id, user_joined_at, admin_org_ids = await _get_feed_organizations(db, user_id, admin_id)
+
+    rows = []
+    for statement in notification_feed_queries(user_id, user_org_id, admin_id, admin_org_ids, organization_id, include_read, user_joined_at):
+        if before:
+            created_at, notification_id = before
+            statement = statement.where(
+                models.Notification.created_at <= created_at,
+                (models.Notification.created_at < created_at) | (models.Notification.id < notification_id),
             )
-        )
-    elif organization_id:
-        filters.append(
-            (models.Notification.organization_id == organization_id) &
-            models.Notification.user_id.is_(None) &
-            models.Notification.admin_id.is_(None)
-        )
-    else:       
-        return []
-    
-    if not include_read: 
-        filters.append(models.Notification.is_read == False)
-    if filters:
-        notifications_query = notifications_query.filter(*filters)
-         
-    notifications = notifications_query.order_by(models.Notification.created_at.desc()).all()
+        if limit:
+            statement = statement.limit(limit)
+        rows.extend((await db.execute(statement)).all())
+
+    rows.sort(key=lambda row: (row[0].created_at or datetime.min, row[0].id), reverse=True)
+    if limit:
+        rows = rows[:limit]
+
+    notifications = []
+    for notification, read_at in rows:
+        if notification.is_broadcast:
+            # The member's own state, without marking the shared row dirty
+            set_committed_value(notification, "is_read", read_at is not None)
+            set_committed_value(notification, "read_at", read_at)
+        notifications.append(notification)
     return notifications
 
-def get_all_notification_configs_as_map(db: Session) -> Dict[str, Dict[str, Any]]:
-    notification_configs = db.query(models.NotificationTypeConfig).all()
-    return {
-        config.type_name: {
-            "group_by_type_only": config.group_by_type_only,
-            "display_name_plural": config.display_name_plural,
-            "message_template_plural": config.message_template_plural,
-            "entity_model_name": config.entity_model_name,
-            "entity_title_attribute": config.entity_title_attribute,
-            "context_phrase_template": config.context_phrase_template,
-            "message_prefix_to_strip": config.message_prefix_to_strip,
-            "always_individual": config.always_individual,
-        } for config in notification_configs
-    }
-
-def fetch_dynamic_entity_titles(
-    db_session: Session,
+async def get_all_notification_configs_as_map(db: AsyncSession) -> notification_configs.NotificationConfigMap:
+    return await notification_configs.get_config_map(db)
+
+ENTITY_PK_COLUMNS = {
+    "Event": models.Event.event_id,
+    "BulletinBoard": models.BulletinBoard.post_id,
+    "User": models.User.id,
+    "Organization": models.Organization.id,
+    "Payment": models.Payment.id,
+    "PaymentItem": models.PaymentItem.id,
+    "Expense": models.Expense.id,
+    "Admin": models.Admin.admin_id,
+}
+# Title attributes tried in order for models without a configured one
+FALLBACK_TITLE_ATTRIBUTES = ("name", "title", "description")
+
+def _entity_title_columns(model_class, model_name: str, title_attribute: Optional[str]) -> List[str]:
+    """Columns a title is built from; empty when the model has none."""
+    if title_attribute:
+        return [title_attribute] if hasattr(model_class, title_attribute) else []
+    if model_name == "User":
+        return ["first_name", "last_name"]
+    return [attribute for attribute in FALLBACK_TITLE_ATTRIBUTES if hasattr(model_class, attribute)][:1]
+
+async def fetch_dynamic_entity_titles(
+    db_session: AsyncSession,
     dynamic_entity_ids_to_fetch: defaultdict,
     config_map_local: dict
 ) -> Dict[str, str]:
+    """Titles keyed "<Model>_<id>", from cache.entity_title_cache or a (pk, title columns) select."""
     dynamic_entity_titles_local = {}
-    pk_column_map = {
-        "Event": models.Event.event_id,
-        "BulletinBoard": models.BulletinBoard.post_id,
-        "User": models.User.id,
-        "Organization": models.Organization.id,
-        "Payment": models.Payment.id,
-        "PaymentItem": models.PaymentItem.id,
-        "Expense": models.Expense.id,
-        "Admin": models.Admin.admin_id,
-    }
     for model_name, entity_ids in dynamic_entity_ids_to_fetch.items():
         if not entity_ids:
             continue
         model_class = getattr(models, model_name, None)
-        pk_column = pk_column_map.get(model_name)
-        if not model_class or not pk_column:
+        pk_column = ENTITY_PK_COLUMNS.get(model_name)
+        if not model_class or pk_column is None:
             logging.warning(f"Skipping entity fetch for unknown model: {model_name} or missing PK column.")
             continue
-        entities = db_session.query(model_class).filter(pk_column.in_(list(entity_ids))).all()
-        for entity in entities:
-            entity_key = getattr(entity, pk_column.key)
-            determined_title_attribute = None
-            for cfg_details in config_map_local.values():
-                if cfg_details.get("entity_model_name") == model_name and cfg_details.get("entity_title_attribute"):
-                    determined_title_attribute = cfg_details["entity_title_attribute"]
-                    break
-            if not determined_title_attribute:
-                if model_name == "User" and hasattr(entity, "first_name") and hasattr(entity, "last_name"):
-                    dynamic_entity_titles_local[f"{model_name}_{entity_key}"] = f"{entity.first_name} {entity.last_name}"
-                    continue
-                elif hasattr(entity, "name"):
-                    determined_title_attribute = "name"
-                elif hasattr(entity, "title"):
-                    determined_title_attribute = "title"
-                elif hasattr(entity, "description"):
-                    determined_title_attribute = "description"
-            if determined_title_attribute and hasattr(entity, determined_title_attribute):
-                dynamic_entity_titles_local[f"{model_name}_{entity_key}"] = getattr(entity, determined_title_attribute)
+        title_attribute = config_map_local.title_attributes.get(model_name)
+        missing_ids = []
+        for entity_id in entity_ids:
+            cached = cache.entity_title_cache.get((model_name, entity_id))
+            if cached is not None and cached[0] == title_attribute:
+                dynamic_entity_titles_local[f"{model_name}_{entity_id}"] = cached[1]
             else:
-                dynamic_entity_titles_local[f"{model_name}_{entity_key}"] = f"Unknown {model_name} (ID: {entity_key})"
+                missing_ids.append(entity_id)
+        if not missing_ids:
+            continue
+
+        title_columns = _entity_title_columns(model_class, model_name, title_attribute)
+        rows = (await db_session.execute(
+            select(pk_column, *[getattr(model_class, column) for column in title_columns]).where(pk_column.in_(missing_ids))
+        )).all()
+        for entity_key, *values in rows:
+            if not title_columns:
+                title = f"Unknown {model_name} (ID: {entity_key})"
+            elif len(values) == 2:
+                title = f"{values[0]} {values[1]}"
+            else:
+                title = values[0]
+            dynamic_entity_titles_local[f"{model_name}_{entity_key}"] = title
+            cache.entity_title_cache.set((model_name, entity_key), (title_attribute, title))
     return dynamic_entity_titles_local
 
-def process_and_format_notifications(db: Session, raw_notifications: list, config_map: dict) -> list:
+async def process_and_format_notifications(db: AsyncSession, raw_notifications: list, config_map: dict) -> list:
     individual_notifications_always = []
     notifications_for_grouping = defaultdict(lambda: {"count": 0, "latest_notification": None, "notifications": []})
     dynamic_entity_ids_to_fetch = defaultdict(set)
@@ -487,7 +883,7 @@ def process_and_format_notifications(db: Session, raw_notifications: list, confi
         if latest_notif_in_group is None or current_created_at > (latest_notif_in_group.created_at if isinstance(latest_notif_in_group.created_at, datetime) else datetime.min):
             notifications_for_grouping[grouping_key]["latest_notification"] = notification
 
-    dynamic_entity_titles = fetch_dynamic_entity_titles(db, dynamic_entity_ids_to_fetch, config_map)
+    dynamic_entity_titles = await fetch_dynamic_entity_titles(db, dynamic_entity_ids_to_fetch, config_map)
     final_notifications_data = []
     
     for individual_notif in sorted(individual_notifications_always, key=lambda n: n.created_at, reverse=True):
@@ -518,7 +914,7 @@ def process_and_format_notifications(db: Session, raw_notifications: list, confi
         
         type_config = config_map.get(key[0])
 
-        if count < 4:            
+        if count < NOTIFICATION_GROUP_MIN_SIZE:
             sorted_individual_notifications = sorted(notifications_in_group, key=lambda n: n.created_at, reverse=True)
             for individual_notif in sorted_individual_notifications:
                 try:
@@ -535,8 +931,9 @@ def process_and_format_notifications(db: Session, raw_notifications: list, confi
                     "is_read": individual_notif.is_read, 
                 })
         else:            
+            unique_messages = list(set([n.message for n in notifications_in_group]))
             formatted_message = _format_grouped_notification_message(
-                count, latest_notif, notifications_in_group, type_config, dynamic_entity_titles, key
+                count, unique_messages, len(unique_messages), type_config, dynamic_entity_titles, key
             )
             try:
                 created_at_iso = latest_notif.created_at.isoformat()
@@ -559,16 +956,155 @@ def process_and_format_notifications(db: Session, raw_notifications: list, confi
     logging.info(f"Finished processing notifications. Total formatted: {len(final_notifications_data)}")
     return final_notifications_data
 
-def _format_grouped_notification_message(
-    count: int,
-    latest_notif: models.Notification,
-    notifications_in_group: List[models.Notification],
-    type_config: Dict[str, Any],
-    dynamic_entity_titles: Dict[str, str],
-    grouping_key: Tuple[str, ...]
-) -> str:
-    notification_type = grouping_key[0]
-    
+# SQL-side grouping
+# The same groups as process_and_format_notifications, computed by the database over the owner's
+# whole feed: one row per group with its size, newest entry, shared read state and distinct message
+# count. Only the few rows a page displays are loaded afterwards.
+
+def _notification_group_key(config_map: dict):
+    """The entity part of process_and_format_notifications' grouping key, as an SQL expression."""
+    Notification = models.Notification
+    grouped_types = [type_name for type_name, config in config_map.items() if not config.get("always_individual")]
+    type_only = [type_name for type_name in grouped_types if config_map[type_name].get("group_by_type_only")]
+
+    def prefixed(prefix, column):
+        return literal(prefix) + cast(column, String)
+
+    return case(
+        # Unconfigured and always-individual types: a group of one per notification
+        (or_(Notification.notification_type.is_(None), Notification.notification_type.notin_(grouped_types)), prefixed("notification_", Notification.id)),
+        (Notification.notification_type.in_(type_only), ""),
+        (Notification.bulletin_post_id.isnot(None), prefixed("bulletin_post_", Notification.bulletin_post_id)),
+        (Notification.event_id.isnot(None), prefixed("event_", Notification.event_id)),
+        (Notification.payment_id.isnot(None), prefixed("payment_", Notification.payment_id)),
+        (Notification.payment_item_id.isnot(None), prefixed("payment_item_", Notification.payment_item_id)),
+        (Notification.verified_user_id.isnot(None), prefixed("verified_user_", Notification.verified_user_id)),
+        (Notification.user_id.isnot(None), prefixed("user_", Notification.user_id)),
+        (Notification.admin_id.isnot(None), prefixed("admin_", Notification.admin_id)),
+        (Notification.organization_id.isnot(None), prefixed("org_", Notification.organization_id)),
+        else_="",
+    )
+
+def _format_individual_notification(notification) -> dict:
+    return {
+        "id": notification.id,
+        "message": notification.message,
+        "url": notification.url,
+        "notification_type": notification.notification_type,
+        "created_at": notification.created_at.isoformat(),
+        "is_read": bool(notification.is_read),
+    }
+
+async def get_grouped_notifications(
+    db: AsyncSession,
+    config_map: dict,
+    user_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    include_read: bool = False,
+    limit: Optional[int] = None,
+    before: Optional[Tuple[datetime, int]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """Formatted notifications grouped by the database, newest group first, and the next page's cursor."""
+    user_org_id, user_joined_at, admin_org_ids = await _get_feed_organizations(db, user_id, admin_id)
+    statements = notification_feed_queries(user_id, user_org_id, admin_id, admin_org_ids, organization_id, include_read, user_joined_at)
+    if not statements:
+        return [], None
+
+    Notification = models.Notification
+    group_key = _notification_group_key(config_map).label("group_key")
+    feed = union_all(*[
+        statement.order_by(None).with_only_columns(
+            Notification.id, Notification.notification_type, Notification.message, Notification.url, Notification.created_at,
+            # A broadcast is read once the member has a receipt for it
+            or_(Notification.is_read == True, statement.selected_columns.read_at.isnot(None)).label("is_read"),
+            group_key,
+        ) for statement in statements
+    ]).subquery("feed")
+
+    ranked_feed = select(feed, func.first_value(feed.c.id).over(
+        partition_by=(feed.c.notification_type, feed.c.group_key), order_by=(feed.c.created_at.desc(), feed.c.id.desc())
+    ).label("latest_id")).subquery("ranked_feed")
+    latest_created_at = func.max(ranked_feed.c.created_at)
+    latest_id = func.max(ranked_feed.c.latest_id)
+    groups = select(
+        ranked_feed.c.notification_type,
+        ranked_feed.c.group_key,
+        func.count().label("count"),
+        latest_created_at.label("created_at"),
+        latest_id.label("id"),
+        func.min(ranked_feed.c.is_read).label("is_read"),
+        func.count(distinct(ranked_feed.c.message)).label("unique_message_count"),
+        func.group_concat(ranked_feed.c.id).label("ids"),
+    ).group_by(ranked_feed.c.notification_type, ranked_feed.c.group_key).order_by(latest_created_at.desc(), latest_id.desc())
+    if before:
+        created_at, notification_id = before
+        groups = groups.having(or_(latest_created_at < created_at, and_(latest_created_at == created_at, latest_id < notification_id)))
+    if limit:
+        groups = groups.limit(limit + 1)
+    group_rows = (await db.execute(groups)).all()
+    next_cursor = None
+    if limit and len(group_rows) > limit:
+        group_rows = group_rows[:limit]
+        next_cursor = encode_notification_cursor(group_rows[-1])
+
+    summaries = [row for row in group_rows if row.count >= NOTIFICATION_GROUP_MIN_SIZE]
+    group_ids = {(row.notification_type, row.group_key): [int(i) for i in row.ids.split(",")] for row in group_rows}
+    shown_ids = [row.id for row in summaries] + [
+        notification_id for row in group_rows if row.count < NOTIFICATION_GROUP_MIN_SIZE
+        for notification_id in group_ids[(row.notification_type, row.group_key)]
+    ]
+    shown = {}
+    if shown_ids:
+        shown = {row.id: row for row in (await db.execute(select(feed).where(feed.c.id.in_(shown_ids)))).all()}
+
+    sample_messages = defaultdict(list)
+    dynamic_entity_ids_to_fetch = defaultdict(set)
+    if summaries:
+        summary_keys = [(row.notification_type, row.group_key) for row in summaries]
+        ranked = select(
+            feed.c.notification_type, feed.c.group_key, feed.c.message,
+            func.row_number().over(
+                partition_by=(feed.c.notification_type, feed.c.group_key), order_by=func.max(feed.c.created_at).desc()
+            ).label("rank"),
+        ).where(tuple_(feed.c.notification_type, feed.c.group_key).in_(summary_keys)).group_by(
+            feed.c.notification_type, feed.c.group_key, feed.c.message
+        ).subquery()
+        for notification_type, key, message in await db.execute(
+            select(ranked.c.notification_type, ranked.c.group_key, ranked.c.message)
+            .where(ranked.c.rank <= NOTIFICATION_GROUP_SAMPLE_SIZE).order_by(ranked.c.rank)
+        ):
+            sample_messages[(notification_type, key)].append(message)
+        for notification_type, key in summary_keys:
+            model_name, entity_id = _parse_grouping_entity((notification_type, key))
+            if model_name:
+                dynamic_entity_ids_to_fetch[model_name].add(entity_id)
+    dynamic_entity_titles = await fetch_dynamic_entity_titles(db, dynamic_entity_ids_to_fetch, config_map)
+
+    final_notifications_data = []
+    for row in group_rows:
+        key = (row.notification_type, row.group_key)
+        if row.count < NOTIFICATION_GROUP_MIN_SIZE:
+            final_notifications_data.extend(_format_individual_notification(shown[notification_id]) for notification_id in group_ids[key])
+            continue
+        latest_notif = shown[row.id]
+        final_notifications_data.append({
+            "id": row.id,
+            "message": _format_grouped_notification_message(
+                row.count, sample_messages[key], row.unique_message_count, config_map[row.notification_type],
+                dynamic_entity_titles, key if row.group_key else key[:1]
+            ),
+            "url": latest_notif.url,
+            "notification_type": row.notification_type,
+            "created_at": row.created_at.isoformat(),
+            "is_read": bool(row.is_read),
+            "group_ids": group_ids[key],
+        })
+    final_notifications_data.sort(key=lambda x: x["created_at"], reverse=True)
+    return final_notifications_data, next_cursor
+
+def _parse_grouping_entity(grouping_key: Tuple[str, ...]) -> Tuple[Optional[str], Optional[int]]:
+    """(model name, id) of the entity a grouping key refers to, if any."""
     entity_identifier_part = grouping_key[1] if len(grouping_key) > 1 else None
     entity_id = None
     model_name_from_grouping = None
@@ -585,6 +1121,19 @@ def _format_grouped_notification_message(
                 elif model_prefix == "verified_user": model_name_from_grouping = "User"
             except ValueError:
                 pass
+    return model_name_from_grouping, entity_id
+
+def _format_grouped_notification_message(
+    count: int,
+    unique_messages: List[str],
+    unique_message_count: int,
+    type_config: Dict[str, Any],
+    dynamic_entity_titles: Dict[str, str],
+    grouping_key: Tuple[str, ...]
+) -> str:
+    """Summary of a group; `unique_messages` needs only the first few of its distinct messages."""
+    notification_type = grouping_key[0]
+    model_name_from_grouping, entity_id = _parse_grouping_entity(grouping_key)
 
     base_display_name = type_config.get("display_name_plural") or notification_type.replace('_', ' ').lower()
     context_phrase = ""
@@ -593,18 +1142,18 @@ def _format_grouped_notification_message(
         model_name = model_name_from_grouping
         fetched_title = dynamic_entity_titles.get(f"{model_name}_{entity_id}")
         if fetched_title:
-            if type_config.get("context_phrase_template"):
+            context_phrase_template = type_config["templates"]["context_phrase_template"]
+            if context_phrase_template:
                 try:
-                    context_phrase = type_config["context_phrase_template"].format(entity_title=fetched_title)
+                    context_phrase = context_phrase_template.render(entity_title=fetched_title)
                 except KeyError:
                     context_phrase = f" for {fetched_title}"
             else:
                 context_phrase = f" for {fetched_title}"
 
     MAX_CHARS_IN_SUMMARY = 60
-    unique_messages = list(set([n.message for n in notifications_in_group]))
     summary_items_list = []
-    for msg in unique_messages[:3]:
+    for msg in unique_messages[:NOTIFICATION_GROUP_SAMPLE_SIZE]:
         if type_config.get("message_prefix_to_strip"):
             prefix = type_config["message_prefix_to_strip"]
             if msg.startswith(prefix):
@@ -619,7 +1168,7 @@ def _format_grouped_notification_message(
         items_list_str = f"{summary_items_list[0]} and {summary_items_list[1]}"
     elif len(summary_items_list) > 2:
         items_list_str = f"{', '.join(summary_items_list[:-1])}, and {summary_items_list[-1]}"
-    remaining_count = max(0, len(unique_messages) - len(summary_items_list))
+    remaining_count = max(0, unique_message_count - len(summary_items_list))
     s_suffix = "s" if remaining_count > 1 else ""
     summary_items_with_others = items_list_str
     if remaining_count > 0:
@@ -636,17 +1185,25 @@ def _format_grouped_notification_message(
         "remaining_count": remaining_count,
         "s_suffix": s_suffix
     }
-    if type_config.get("message_template_plural"):
+    message_template_plural = type_config["templates"]["message_template_plural"]
+    if message_template_plural:
         try:
-            return type_config["message_template_plural"].format(**template_vars)
+            return message_template_plural.render(**template_vars)
         except KeyError:
             logging.warning(f"Missing template variables for plural notification type '{notification_type}'. Using fallback message.")
             return f"{count} {base_display_name}{context_phrase}: {summary_items_with_others}."
     else:
         return f"{count} {base_display_name}{context_phrase}: {summary_items_with_others}."
 
-def mark_notification_as_read(db: Session, notification_id: int) -> Optional[models.Notification]:     
-    db_notification = db.query(models.Notification).filter(models.Notification.id == notification_id).first()
+async def mark_notification_as_read(db: AsyncSession, notification_id: int, user_id: Optional[int] = None) -> Optional[models.Notification]:     
+    db_notification = await db.get(models.Notification, notification_id)
+    if db_notification and db_notification.is_broadcast:
+        if not user_id or not await get_visible_broadcast_ids(db, user_id, [notification_id]):
+            return None
+        await upsert_notification_receipts(db, user_id, [notification_id], read=True)
+        set_committed_value(db_notification, "is_read", True)
+        logging.info(f"Broadcast notification with id: {notification_id} marked as read for user {user_id}.")
+        return db_notification
     if db_notification:
         db_notification.is_read = True
         db_notification.read_at = datetime.utcnow()
@@ -1004,7 +1561,7 @@ def update_user_password(db: Session, user_id: int, new_password: str):
     return None
 
 # Function to create an admin log entry
-async def create_admin_log(
+def create_admin_log(
     db: Session,
     admin_id: int,
     action_type: str,
@@ -1,15 +1,156 @@
-from sqlalchemy import create_engine
+import os
+import sqlite3
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./sql_app.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./sql_app.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+# Read-only URIs used by the reader pools in production mode
+READ_ONLY_DATABASE_URL = "sqlite:///file:./sql_app.db?mode=ro&uri=true"
+ASYNC_READ_ONLY_DATABASE_URL = "sqlite+aiosqlite:///file:./sql_app.db?mode=ro&uri=true"
+
+# Storage mode: set DATABASE_MODE=production to enable WAL, tuned pragmas and split reader/writer pools
+DATABASE_MODE = os.getenv("DATABASE_MODE", "development")
+PRODUCTION_MODE = DATABASE_MODE == "production"
+
+# Pragmas applied to every connection in production mode
+SQLITE_WRITER_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,
+    "synchronous": "NORMAL",
+    "mmap_size": 268435456,
+    "cache_size": -64000,
+}
+# journal_mode is persistent and cannot be changed from a read-only connection
+SQLITE_READER_PRAGMAS = {
+    "busy_timeout": 5000,
+    "mmap_size": 268435456,
+    "cache_size": -64000,
+    "query_only": "ON",
+}
+
+def _pragma_listener(pragmas):
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_sqlite_pragmas
+
+connect_args = {"check_same_thread": False}
+
+# Serialized writes (production mode).
+# Every writer connection of the process, sync or async, takes one process-wide lock when it starts a
+# write transaction and gives it back when the transaction ends, so writes queue up in the process
+# instead of racing each other for SQLite's write lock. The lock is taken at the first write
+# statement rather than at checkout, so a transaction that only reads never holds up the others.
+# Waiting for the lock blocks the calling thread, and an async writer holding it needs the event loop
+# to finish its transaction: sync writer sessions (get_db) must therefore never be used on the loop
+# thread, which is why the routes taking one are plain `def` handlers that FastAPI runs in its
+# threadpool. A writer that waits longer than busy_timeout gets "database is locked", just as SQLite
+# would report it; other processes still meet at busy_timeout.
+WRITER_LOCK_TIMEOUT = SQLITE_WRITER_PRAGMAS["busy_timeout"] / 1000
+READ_STATEMENTS = ("SELECT", "PRAGMA", "EXPLAIN")
+_writer_lock = threading.Lock()
+
+def _is_write(sql: str) -> bool:
+    return not sql.lstrip().upper().startswith(READ_STATEMENTS)
+
+class SerializedWriterCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self.connection.acquire_writer_lock(sql)
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.release_writer_lock_if_idle()
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.acquire_writer_lock(sql)
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.release_writer_lock_if_idle()
+
+class SerializedWriterConnection(sqlite3.Connection):
+    """A sqlite3 connection that holds the process writer lock for the length of each write transaction.
+
+    Runs wherever the driver runs it: the request or worker thread for the sync engine, and the
+    connection's own thread for aiosqlite, so async writers wait without blocking the event loop.
+    """
+
+    holds_writer_lock = False
+
+    def cursor(self, factory=SerializedWriterCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def acquire_writer_lock(self, sql: str) -> None:
+        if self.holds_writer_lock or not _is_write(sql):
+            return
+        if not _writer_lock.acquire(timeout=WRITER_LOCK_TIMEOUT):
+            raise sqlite3.OperationalError("database is locked")
+        self.holds_writer_lock = True
+
+    def release_writer_lock_if_idle(self) -> None:
+        # Autocommit statements (VACUUM, failed implicit BEGINs) end without a commit or rollback
+        if self.holds_writer_lock and not self.in_transaction:
+            self._release_writer_lock()
+
+    def _release_writer_lock(self) -> None:
+        if self.holds_writer_lock:
+            self.holds_writer_lock = False
+            _writer_lock.release()
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._release_writer_lock()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._release_writer_lock()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._release_writer_lock()
+
+if PRODUCTION_MODE:
+    writer_connect_args = {**connect_args, "factory": SerializedWriterConnection}
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=writer_connect_args)
+    # Async writes also go through one connection; checkout awaits instead of queueing on the lock
+    async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, connect_args=writer_connect_args, pool_size=1, max_overflow=0)
+    read_engine = create_engine(READ_ONLY_DATABASE_URL, connect_args=connect_args)
+    async_read_engine = create_async_engine(ASYNC_READ_ONLY_DATABASE_URL, connect_args=connect_args)
+
+    event.listen(engine, "connect", _pragma_listener(SQLITE_WRITER_PRAGMAS))
+    event.listen(async_engine.sync_engine, "connect", _pragma_listener(SQLITE_WRITER_PRAGMAS))
+    event.listen(read_engine, "connect", _pragma_listener(SQLITE_READER_PRAGMAS))
+    event.listen(async_read_engine.sync_engine, "connect", _pragma_listener(SQLITE_READER_PRAGMAS))
+else:
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+    # Async engine for routes that must not block the event loop while waiting on the database
+    async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, connect_args=connect_args)
+    read_engine = engine
+    async_read_engine = async_engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(bind=async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -0,0 +1,553 @@
+import base64
+import binascii
+import json
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, Integer, String, and_, case, func, literal, or_, select, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, rollups
+
+# Financial aggregation engine
+# Revenue and expenses are read once as buckets (academic year, semester, calendar month)
+# from the financial_rollups table, and every dashboard figure is derived from them in memory.
+
+RevenueKey = Tuple[Optional[str], Optional[str], Optional[str]]   # (academic_year, semester, "YYYY-MM")
+ExpenseKey = Tuple[Optional[str], Optional[str]]                  # (category, "YYYY-MM")
+
+def _month_key(year: int, month: int) -> str:
+    return f"{year:04d}-{month:02d}"
+
+def _nulls_first(value):
+    # Mirrors SQLite's ORDER BY, which sorts NULLs before any value
+    return (value is not None, value or "")
+
+class FinancialBuckets:
+    def __init__(self, revenue: Dict[RevenueKey, float], expenses: Dict[ExpenseKey, float]):
+        self.revenue = revenue
+        self.expenses = expenses
+
+    def revenue_for_academic_years(self, predicate) -> float:
+        return sum((amount for (academic_year, _, _), amount in self.revenue.items()
+                   if academic_year is not None and predicate(academic_year)), 0.0)
+
+    def revenue_by_period(self) -> Dict[Tuple[Optional[str], Optional[str]], float]:
+        totals = defaultdict(float)
+        for (academic_year, semester, _), amount in self.revenue.items():
+            totals[(academic_year, semester)] += amount
+        return dict(sorted(totals.items(), key=lambda item: (_nulls_first(item[0][0]), _nulls_first(item[0][1]))))
+
+    def revenue_for_month(self, year: int, month: int) -> float:
+        month_key = _month_key(year, month)
+        return sum((amount for (_, _, bucket_month), amount in self.revenue.items() if bucket_month == month_key), 0.0)
+
+    def expenses_by_category(self, year: int) -> Dict[Optional[str], float]:
+        totals = defaultdict(float)
+        for (category, bucket_month), amount in self.expenses.items():
+            if bucket_month and bucket_month.startswith(f"{year:04d}-"):
+                totals[category] += amount
+        return dict(sorted(totals.items(), key=lambda item: _nulls_first(item[0])))
+
+    def expenses_for_month(self, year: int, month: int) -> float:
+        month_key = _month_key(year, month)
+        return sum((amount for (_, bucket_month), amount in self.expenses.items() if bucket_month == month_key), 0.0)
+
+def _dimension(value: str) -> Optional[str]:
+    # Rollup buckets store "" for a missing academic year, semester, month or category
+    return value or None
+
+async def load_financial_buckets(db: AsyncSession, organization_id: int) -> FinancialBuckets:
+    """Reads an organization's membership fee and expense buckets from the rollup table in one query."""
+    Rollup = models.FinancialRollup
+    rows = (await db.execute(
+        select(Rollup.kind, Rollup.academic_year, Rollup.semester, Rollup.month, Rollup.category, Rollup.amount)
+        .where(Rollup.organization_id == organization_id, Rollup.kind.in_([rollups.MEMBERSHIP_FEE, rollups.EXPENSE]))
+    )).all()
+
+    revenue, expenses = {}, {}
+    for kind, academic_year, semester, month, category, amount in rows:
+        if kind == rollups.MEMBERSHIP_FEE:
+            revenue[(_dimension(academic_year), _dimension(semester), _dimension(month))] = amount
+        else:
+            expenses[(_dimension(category), _dimension(month))] = amount
+    return FinancialBuckets(revenue=revenue, expenses=expenses)
+
+def membership_fees_by_month_query(organization_id: int, start_month: str = None, end_month: str = None,
+                                   semester: str = None, include_undated: bool = False):
+    """Paid membership fees per ("YYYY-MM", academic year); undated fees ("" month) only when asked for."""
+    Rollup = models.FinancialRollup
+    query = select(Rollup.month, Rollup.academic_year, func.sum(Rollup.amount)).where(
+        Rollup.organization_id == organization_id, Rollup.kind == rollups.MEMBERSHIP_FEE
+    )
+    if not include_undated:
+        query = query.where(Rollup.month != "")
+    if start_month:
+        query = query.where(Rollup.month >= start_month)
+    if end_month:
+        query = query.where(Rollup.month <= end_month)
+    if semester:
+        query = query.where(Rollup.semester == semester)
+    return query.group_by(Rollup.month, Rollup.academic_year).order_by(Rollup.month, Rollup.academic_year)
+
+def undated_membership_fees_by_month_query(organization_id: int):
+    """Paid membership fees without an updated_at per "YYYY-MM" of created_at; the rollups file them under the "" month."""
+    PaymentItem = models.PaymentItem
+    month = func.strftime("%Y-%m", PaymentItem.created_at)
+    return select(month, func.sum(PaymentItem.fee)).where(
+        PaymentItem.organization_id == organization_id,
+        PaymentItem.is_paid == True,
+        PaymentItem.updated_at.is_(None),
+        PaymentItem.created_at.isnot(None),
+        PaymentItem.student_shirt_order_id.is_(None),
+    ).group_by(month).order_by(month)
+
+def payments_by_period_query(organization_id: int, academic_year: str = None, semester: str = None):
+    """Successful membership payments per (academic year, semester)."""
+    Rollup = models.FinancialRollup
+    query = select(Rollup.academic_year, Rollup.semester, func.sum(Rollup.amount)).where(
+        Rollup.organization_id == organization_id, Rollup.kind == rollups.PAYMENT
+    )
+    if academic_year:
+        query = query.where(Rollup.academic_year == academic_year)
+    if semester:
+        query = query.where(Rollup.semester == semester)
+    return query.group_by(Rollup.academic_year, Rollup.semester).order_by(Rollup.academic_year, Rollup.semester)
+
+def expenses_by_month_query(organization_id: int):
+    """Expenses per "YYYY-MM"; undated expenses are left out."""
+    Rollup = models.FinancialRollup
+    return select(Rollup.month, func.sum(Rollup.amount)).where(
+        Rollup.organization_id == organization_id, Rollup.kind == rollups.EXPENSE, Rollup.month != ""
+    ).group_by(Rollup.month).order_by(Rollup.month)
+
+def expenses_by_category_query(organization_id: int):
+    Rollup = models.FinancialRollup
+    return select(Rollup.category, func.sum(Rollup.amount)).where(
+        Rollup.organization_id == organization_id, Rollup.kind == rollups.EXPENSE
+    ).group_by(Rollup.category).order_by(Rollup.category)
+
+async def load_member_counts(db: AsyncSession, organization_id: int, academic_year: str) -> Tuple[int, int]:
+    """Returns (members who paid membership fees for the academic year, active members) in one round trip."""
+    paid_members = select(func.count(models.PaymentItem.user_id.distinct())).where(
+        models.PaymentItem.organization_id == organization_id,
+        models.PaymentItem.academic_year == academic_year,
+        models.PaymentItem.is_paid == True,
+        models.PaymentItem.student_shirt_order_id.is_(None),
+    ).scalar_subquery()
+    active_members = select(func.count(models.User.id)).where(
+        models.User.is_active == True, models.User.organization_id == organization_id
+    ).scalar_subquery()
+    num_paid_members, total_members = (await db.execute(select(paid_members, active_members))).one()
+    return num_paid_members or 0, total_members or 0
+
+def get_current_academic_year_start(today: date) -> int:
+    # Academic year starts in August; before August we are still in the previous one
+    academic_year_start_month = 8
+    return today.year - 1 if today.month < academic_year_start_month else today.year
+
+def build_financial_summary(
+    organization: models.Organization,
+    buckets: FinancialBuckets,
+    num_paid_members: int,
+    total_members: int,
+    today: date,
+) -> Dict[str, Any]:
+    current_year = today.year
+    current_academic_year_start = get_current_academic_year_start(today)
+    current_academic_year_str = f"{current_academic_year_start}-{current_academic_year_start + 1}"
+    next_academic_year_str = f"{current_academic_year_start + 1}-{current_academic_year_start + 2}"
+
+    # Turnover Funds: membership fees collected for academic years before the current one
+    turnover_funds = buckets.revenue_for_academic_years(lambda ay: ay < current_academic_year_str)
+    current_ay_membership_revenue = buckets.revenue_for_academic_years(lambda ay: ay == current_academic_year_str)
+    # Upcoming Year Funds: advance payments for the next academic year and beyond
+    upcoming_funds_collected = buckets.revenue_for_academic_years(lambda ay: ay >= next_academic_year_str)
+
+    expenses_by_category = buckets.expenses_by_category(current_year)
+    total_expenses_ytd = sum(expenses_by_category.values(), 0.0)
+
+    net_income_ytd = current_ay_membership_revenue - total_expenses_ytd
+    total_current_balance = turnover_funds + net_income_ytd + upcoming_funds_collected
+    profit_margin_ytd = round((net_income_ytd / current_ay_membership_revenue) * 100, 2) if current_ay_membership_revenue != 0 else 0.0
+
+    revenue_by_period = buckets.revenue_by_period()
+
+    top_revenue_source = {"name": "N/A", "amount": 0.0}
+    if revenue_by_period:
+        (top_academic_year, top_semester), top_amount = max(revenue_by_period.items(), key=lambda item: item[1])
+        source_name = f"AY {top_academic_year} - {top_semester} Fees" if top_academic_year and top_semester else "Miscellaneous Membership Fees"
+        top_revenue_source = {"name": source_name, "amount": round(top_amount, 2)}
+
+    largest_expense_category = "N/A"
+    largest_expense_amount = 0.0
+    if expenses_by_category:
+        category, amount = max(expenses_by_category.items(), key=lambda item: item[1])
+        largest_expense_category = category if category else "Uncategorized"
+        largest_expense_amount = round(amount, 2)
+
+    # Revenues breakdown by academic year, then semester
+    total_all_collected_membership_fees = turnover_funds + current_ay_membership_revenue + upcoming_funds_collected
+    revenues_breakdown_dict = {}
+    for (academic_year, semester), amount in revenue_by_period.items():
+        if academic_year not in revenues_breakdown_dict:
+            revenues_breakdown_dict[academic_year] = {"year": academic_year, "total": 0.0, "percentage": 0.0, "semesters": []}
+        item_percentage = round((amount / total_all_collected_membership_fees) * 100, 2) if total_all_collected_membership_fees != 0 else 0.0
+        revenues_breakdown_dict[academic_year]["semesters"].append({
+            "source": f"{semester} Fees" if semester else "Miscellaneous Fees",
+            "amount": round(amount, 2),
+            "percentage": item_percentage
+        })
+        revenues_breakdown_dict[academic_year]["total"] += round(amount, 2)
+
+    revenues_breakdown = list(revenues_breakdown_dict.values())
+    for year_data in revenues_breakdown:
+        year_data["percentage"] = round((year_data["total"] / total_all_collected_membership_fees) * 100, 2) if total_all_collected_membership_fees != 0 else 0.0
+    if revenues_breakdown and total_all_collected_membership_fees > 0:
+        current_total_percentage = sum(item["percentage"] for item in revenues_breakdown)
+        if abs(current_total_percentage - 100) > 0.01:
+            adjustment_factor = 100 / current_total_percentage
+            for item in revenues_breakdown:
+                item["percentage"] = round(item["percentage"] * adjustment_factor, 2)
+
+    expenses_breakdown = []
+    for category, amount in expenses_by_category.items():
+        percentage = round((amount / total_expenses_ytd) * 100, 2) if total_expenses_ytd != 0 else 0.0
+        expenses_breakdown.append({"category": category if category else "Uncategorized", "amount": round(amount, 2), "trend": "Stable", "percentage": percentage})
+    percentage_sum = sum(item["percentage"] for item in expenses_breakdown)
+    if expenses_breakdown and percentage_sum != 100 and percentage_sum != 0:
+        adjustment_factor = 100 / percentage_sum
+        for item in expenses_breakdown:
+            item["percentage"] = round(item["percentage"] * adjustment_factor, 2)
+
+    # Monthly collected fees vs expenses for the current calendar year
+    monthly_summary = []
+    chart_net_income_trend_data = []
+    chart_net_income_trend_labels = []
+    for month in range(1, 13):
+        month_start = date(current_year, month, 1)
+        chart_net_income_trend_labels.append(month_start.strftime('%b'))
+        monthly_collected_fees = buckets.revenue_for_month(current_year, month)
+        monthly_expenses = buckets.expenses_for_month(current_year, month)
+        monthly_net_income = monthly_collected_fees - monthly_expenses
+        monthly_summary.append({
+            "month": month_start.strftime('%B'), "revenue": monthly_collected_fees, "expenses": monthly_expenses,
+            "net_income": monthly_net_income, "net_income_class": "positive" if monthly_net_income >= 0 else "negative"
+        })
+        chart_net_income_trend_data.append(round(monthly_net_income, 2))
+
+    financial_data = {
+        "organization_id": organization.id,
+        "organization_name": organization.name,
+        "year": str(current_year),
+        "total_current_balance": total_current_balance,
+        "total_revenue_ytd": turnover_funds,
+        "upcoming_funds_ytd": upcoming_funds_collected,
+        "total_expenses_ytd": total_expenses_ytd,
+        "net_income_ytd": net_income_ytd,
+        "balance_turnover": round(total_current_balance / turnover_funds, 2) if turnover_funds != 0 else 0.0,
+        "total_funds_available": total_current_balance,
+        "reporting_date": today.strftime("%B %d, %Y"),
+        "top_revenue_source_name": top_revenue_source["name"],
+        "top_revenue_source_amount": top_revenue_source["amount"],
+        "largest_expense_category": largest_expense_category,
+        "largest_expense_amount": largest_expense_amount,
+        "profit_margin_ytd": profit_margin_ytd,
+        "revenues_breakdown": revenues_breakdown,
+        "expenses_breakdown": expenses_breakdown,
+        "monthly_summary": monthly_summary,
+        "accounts_balances": build_account_balances(total_current_balance, today),
+        "chart_revenue_data": [current_ay_membership_revenue, total_expenses_ytd],
+        "chart_net_income_data": chart_net_income_trend_data,
+        "chart_net_income_labels": chart_net_income_trend_labels,
+        "num_paid_members": num_paid_members,
+        "num_unpaid_members": max(0, total_members - num_paid_members),
+        "total_members": total_members
+    }
+    return financial_data
+
+def build_account_balances(total_current_balance: float, today: date) -> list:
+    if total_current_balance < 0:
+        return [{"account": "Main Operating Account", "balance": total_current_balance, "last_transaction": today.strftime("%Y-%m-%d"), "status": "Critical"}]
+
+    today_str = today.strftime("%Y-%m-%d")
+    accounts_balances = [
+        {"account": "Savings Account", "balance": round(total_current_balance * 0.2, 2), "last_transaction": (today - timedelta(days=15)).strftime("%Y-%m-%d"), "status": "Active"},
+    ]
+    budgeted_accounts = [
+        ("Event Expenses (Decoration, Tokens)", 0.10),
+        ("Operations & Maintenance (Supplies)", 0.08),
+        ("Food & Refreshments (Meeting/Event Meals)", 0.05),
+        ("Transportation & Logistics (Fare/Allowance)", 0.03),
+        ("Contingency Fund (Emergency Use)", 0.15),
+    ]
+    for account, percentage in budgeted_accounts:
+        accounts_balances.append({"account": account, "balance": round(total_current_balance * percentage, 2), "last_transaction": today_str, "status": "Budgeted"})
+
+    current_sum = sum(account["balance"] for account in accounts_balances)
+    if abs(current_sum - total_current_balance) > 0.01:
+        # Distribute the remainder to the last account for accuracy
+        accounts_balances[-1]["balance"] = round(accounts_balances[-1]["balance"] + (total_current_balance - current_sum), 2)
+    return accounts_balances
+
+# Monthly ledger (student detailed monthly report)
+# Ledger sources, in the order same-day entries are listed
+LEDGER_USER_PAYMENT = 0
+LEDGER_ORGANIZATION_INFLOWS = 1
+LEDGER_ORGANIZATION_EXPENSE = 2
+
+def _between(column, start: date, end: date):
+    return and_(column >= start, column <= end)
+
+def _payment_item_dated_within(start: Optional[date], end: Optional[date], *criteria):
+    """coalesce(updated_at, created_at) within [start, end], spelled out with `criteria` repeated in
+    both branches so SQLite answers each one from ix_payment_items_organization_paid_dates."""
+    def within(column):
+        bounds = []
+        if start is not None:
+            bounds.append(column >= start)
+        if end is not None:
+            bounds.append(column <= end)
+        return and_(*bounds)
+    PaymentItem = models.PaymentItem
+    return or_(
+        and_(*criteria, within(PaymentItem.updated_at)),
+        and_(*criteria, PaymentItem.updated_at.is_(None), within(PaymentItem.created_at)),
+    )
+
+async def load_monthly_ledger(
+    db: AsyncSession,
+    user_id: int,
+    organization_id: Optional[int],
+    start: date,
+    end: date,
+    include_user: bool,
+    include_organization: bool,
+) -> Tuple[float, List[Any]]:
+    """Returns (starting balance, ledger rows for start..end with a running_balance column)."""
+    PaymentItem, Expense = models.PaymentItem, models.Expense
+    relevant_date = func.coalesce(PaymentItem.updated_at, PaymentItem.created_at)
+    organization_inflow_criteria = [PaymentItem.is_paid == True, PaymentItem.organization_id == organization_id]
+    if include_user:
+        # The user's own payments are listed individually, so they are left out of the organization total
+        organization_inflow_criteria.append(PaymentItem.user_id != user_id)
+
+    # Starting balance: everything the report would have listed before this month
+    prior_totals = []
+    if include_user:
+        prior_totals.append(select(func.sum(PaymentItem.fee)).where(
+            PaymentItem.user_id == user_id, PaymentItem.is_paid == True, relevant_date < start
+        ))
+    if include_organization:
+        prior_totals.append(select(func.sum(PaymentItem.fee)).where(
+            _payment_item_dated_within(None, start - timedelta(days=1), *organization_inflow_criteria)
+        ))
+        prior_totals.append(select(-func.sum(Expense.amount)).where(
+            Expense.organization_id == organization_id, Expense.incurred_at < start
+        ))
+    if not prior_totals:
+        return 0.0, []
+    starting_balance = (await db.execute(select(
+        sum((func.coalesce(total.scalar_subquery(), 0.0) for total in prior_totals), literal(0.0))
+    ))).scalar() or 0.0
+
+    ledger_parts = []
+    if include_user:
+        ledger_parts.append(select(
+            relevant_date.label("event_date"), literal(LEDGER_USER_PAYMENT).label("source"), PaymentItem.id.label("source_id"),
+            case((PaymentItem.is_paid == True, PaymentItem.fee), else_=0.0).label("inflow"), literal(0.0).label("outflow"),
+            PaymentItem.fee.label("original_value"), PaymentItem.is_paid.label("is_paid"), PaymentItem.due_date.label("due_date"),
+            PaymentItem.academic_year.label("academic_year"), PaymentItem.semester.label("semester"),
+            PaymentItem.student_shirt_order_id.label("student_shirt_order_id"), literal(None, String).label("category"),
+        ).where(PaymentItem.user_id == user_id, _between(relevant_date, start, end)))
+    if include_organization:
+        month_inflows = func.sum(PaymentItem.fee)
+        ledger_parts.append(select(
+            literal(start, Date).label("event_date"), literal(LEDGER_ORGANIZATION_INFLOWS).label("source"), literal(0).label("source_id"),
+            month_inflows.label("inflow"), literal(0.0).label("outflow"), month_inflows.label("original_value"),
+            literal(True).label("is_paid"), literal(None, Date).label("due_date"), literal(None, String).label("academic_year"),
+            literal(None, String).label("semester"), literal(None, Integer).label("student_shirt_order_id"), literal(None, String).label("category"),
+        ).where(_payment_item_dated_within(start, end, *organization_inflow_criteria)).having(month_inflows > 0))
+        ledger_parts.append(select(
+            Expense.incurred_at.label("event_date"), literal(LEDGER_ORGANIZATION_EXPENSE).label("source"), Expense.id.label("source_id"),
+            literal(0.0).label("inflow"), Expense.amount.label("outflow"), Expense.amount.label("original_value"),
+            literal(True).label("is_paid"), literal(None, Date).label("due_date"), literal(None, String).label("academic_year"),
+            literal(None, String).label("semester"), literal(None, Integer).label("student_shirt_order_id"), Expense.category.label("category"),
+        ).where(Expense.organization_id == organization_id, _between(Expense.incurred_at, start, end)))
+
+    ledger = (ledger_parts[0] if len(ledger_parts) == 1 else union_all(*ledger_parts)).subquery()
+    ledger_order = (ledger.c.event_date, ledger.c.source, ledger.c.source_id)
+    running_balance = literal(starting_balance) + func.sum(ledger.c.inflow - ledger.c.outflow).over(order_by=ledger_order, rows=(None, 0))
+    rows = (await db.execute(select(ledger, running_balance.label("running_balance")).order_by(*ledger_order))).all()
+    return starting_balance, rows
+
+# Membership sections
+# The /admin/membership/ rollup: an inner GROUP BY user totals each member's fee items for the
+# period, an outer GROUP BY section sums those, and each section's first member is joined in for
+# the representative fields. benchmarks/membership_sections.py compares it with grouping in Python.
+
+def section_totals_query(organization_id: int, academic_year: Optional[str] = None, semester: Optional[str] = None):
+    """One row per section (its totals plus its first member's User), in the order sections first appear."""
+    # Membership fee items relevant to the selected period (shirt orders excluded)
+    payment_item_filters = [
+        models.PaymentItem.user_id == models.User.id,
+        models.PaymentItem.student_shirt_order_id.is_(None)
+    ]
+    if academic_year:
+        payment_item_filters.append(models.PaymentItem.academic_year == academic_year)
+    if semester:
+        payment_item_filters.append(models.PaymentItem.semester == semester)
+
+    # Per-member totals; with a period filter only members with an item in that period are counted
+    is_responsible = models.PaymentItem.is_not_responsible.isnot(True)
+    open_items = func.sum(case((or_(models.PaymentItem.is_paid == True, models.PaymentItem.is_not_responsible == True), 0), else_=1))
+    member_totals = select(
+        models.User.id.label("user_id"),
+        models.User.section.label("section"),
+        case((and_(func.count(models.PaymentItem.id) > 0, open_items == 0), 1), else_=0).label("is_fully_paid"),
+        func.coalesce(func.sum(case((is_responsible, models.PaymentItem.fee), else_=0.0)), 0.0).label("total_amount"),
+        func.coalesce(func.sum(case((and_(is_responsible, models.PaymentItem.is_paid == True), models.PaymentItem.fee), else_=0.0)), 0.0).label("total_paid"),
+    ).select_from(models.User)
+    if academic_year or semester:
+        member_totals = member_totals.join(models.PaymentItem, and_(*payment_item_filters))
+    else:
+        member_totals = member_totals.outerjoin(models.PaymentItem, and_(*payment_item_filters))
+    member_totals = member_totals.where(models.User.organization_id == organization_id).group_by(models.User.id).subquery()
+
+    # One row per section, in the order sections first appear among members
+    section_totals = select(
+        member_totals.c.section,
+        func.count().label("section_users_count"),
+        func.sum(member_totals.c.is_fully_paid).label("section_paid_count"),
+        func.sum(member_totals.c.total_amount).label("total_amount"),
+        func.sum(member_totals.c.total_paid).label("total_paid"),
+        func.min(member_totals.c.user_id).label("first_user_id"),
+    ).group_by(member_totals.c.section).subquery()
+    return (
+        select(section_totals, models.User)
+        .join(models.User, models.User.id == section_totals.c.first_user_id)
+        .order_by(section_totals.c.first_user_id)
+    )
+
+# Individual members
+# Per-member fee totals come from one GROUP BY user_id over payment_items. Members are read a page
+# at a time with a (sort value, user id) keyset cursor: pages sorted by a member column only total
+# the members on the page, pages sorted by a total aggregate the organization in SQL.
+
+MEMBER_PAGE_SIZE = 50
+MEMBER_COLUMN_SORTS = ("id", "student_number", "first_name", "last_name", "year_level", "section")
+MEMBER_TOTAL_SORTS = ("total_amount", "total_paid", "payment_status")
+MEMBER_SORTS = MEMBER_COLUMN_SORTS + MEMBER_TOTAL_SORTS
+
+def encode_member_cursor(sort_value, user_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, user_id]).encode()).decode()
+
+def decode_member_cursor(cursor: str) -> Tuple[Any, int]:
+    """Raises ValueError for a cursor that was not produced by encode_member_cursor."""
+    try:
+        sort_value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return sort_value, int(user_id)
+    except (UnicodeDecodeError, binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid member cursor: {cursor}") from e
+
+def member_totals_query(academic_year: Optional[str] = None, semester: Optional[str] = None, *criteria):
+    """Membership fee totals per user_id, shirt orders excluded and the dues a member is not responsible for not counted."""
+    PaymentItem = models.PaymentItem
+    responsible = PaymentItem.is_not_responsible.isnot(True)
+    query = select(
+        PaymentItem.user_id.label("user_id"),
+        func.sum(case((responsible, PaymentItem.fee), else_=0)).label("total_amount"),
+        func.sum(case((and_(responsible, PaymentItem.is_paid.is_(True)), PaymentItem.fee), else_=0)).label("total_paid"),
+    ).where(PaymentItem.student_shirt_order_id.is_(None), *criteria)
+    if academic_year:
+        query = query.where(PaymentItem.academic_year == academic_year)
+    if semester:
+        query = query.where(PaymentItem.semester == semester)
+    return query.group_by(PaymentItem.user_id)
+
+def _payment_status(total_amount, total_paid, for_period: bool):
+    no_dues = "No Dues for Period" if for_period else "No Dues"
+    return case(
+        (total_amount > 0, case((total_paid >= total_amount, "Paid"), else_="Partially Paid")),
+        else_=no_dues,
+    )
+
+async def load_individual_members(
+    db: AsyncSession,
+    organization_id: int,
+    academic_year: Optional[str] = None,
+    semester: Optional[str] = None,
+    sort: str = "id",
+    descending: bool = False,
+    limit: int = MEMBER_PAGE_SIZE,
+    after: Optional[Tuple[Any, int]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of an organization's members with their fee totals, and the next page's cursor.
+
+    Members are those with membership fee items for the period; without a period, members with no
+    payment items at all are listed as well.
+    """
+    User, PaymentItem = models.User, models.PaymentItem
+    for_period = bool(academic_year or semester)
+    member_columns = (User.id, User.student_number, User.email, User.first_name, User.last_name, User.year_level, User.section)
+    no_items = ~select(PaymentItem.id).where(PaymentItem.user_id == User.id).exists()
+
+    if sort in MEMBER_TOTAL_SORTS:
+        totals = member_totals_query(academic_year, semester, PaymentItem.organization_id == organization_id).subquery()
+        total_amount = func.coalesce(totals.c.total_amount, 0)
+        total_paid = func.coalesce(totals.c.total_paid, 0)
+        payment_status = _payment_status(total_amount, total_paid, for_period)
+        has_fees = totals.c.user_id.isnot(None)
+        query = select(
+            *member_columns, total_amount.label("total_amount"), total_paid.label("total_paid"), payment_status.label("payment_status")
+        ).outerjoin(totals, totals.c.user_id == User.id).where(
+            User.organization_id == organization_id, or_(has_fees, no_items) if not for_period else has_fees
+        )
+        sort_expression = {"total_amount": total_amount, "total_paid": total_paid, "payment_status": payment_status}[sort]
+    else:
+        member_items = [PaymentItem.user_id == User.id, PaymentItem.student_shirt_order_id.is_(None)]
+        if academic_year:
+            member_items.append(PaymentItem.academic_year == academic_year)
+        if semester:
+            member_items.append(PaymentItem.semester == semester)
+        has_fees = select(PaymentItem.id).where(*member_items).exists()
+        query = select(*member_columns).where(
+            User.organization_id == organization_id, or_(has_fees, no_items) if not for_period else has_fees
+        )
+        # Keyset comparisons need a value on every row, so missing names sort as ""
+        sort_column = getattr(User, sort)
+        sort_expression = sort_column if sort == "id" else func.coalesce(sort_column, "")
+
+    keyset = tuple_(sort_expression, User.id)
+    if after is not None:
+        query = query.where(keyset < tuple_(*after) if descending else keyset > tuple_(*after))
+    order = (sort_expression.desc(), User.id.desc()) if descending else (sort_expression, User.id)
+    # One extra row tells whether another page follows
+    rows = (await db.execute(query.add_columns(sort_expression.label("sort_value")).order_by(*order).limit(limit + 1))).all()
+    next_cursor = encode_member_cursor(rows[limit - 1].sort_value, rows[limit - 1].id) if len(rows) > limit else None
+    rows = rows[:limit]
+
+    if sort in MEMBER_TOTAL_SORTS:
+        totals_by_user = {row.id: (row.total_amount, row.total_paid, row.payment_status) for row in rows}
+    else:
+        totals_query = member_totals_query(academic_year, semester, PaymentItem.user_id.in_([row.id for row in rows])).subquery()
+        total_amount, total_paid = totals_query.c.total_amount, totals_query.c.total_paid
+        totals_by_user = {
+            user_id: (amount, paid, payment_status)
+            for user_id, amount, paid, payment_status in (await db.execute(select(
+                totals_query.c.user_id, total_amount, total_paid, _payment_status(total_amount, total_paid, for_period)
+            ))).all()
+        } if rows else {}
+
+    no_dues = "No Dues for Period" if for_period else "No Dues"
+    members = []
+    for row in rows:
+        total_amount, total_paid, payment_status = totals_by_user.get(row.id, (0, 0, no_dues))
+        members.append({
+            'student_number': row.student_number, 'email': row.email, 'first_name': row.first_name,
+            'last_name': row.last_name, 'year_level': row.year_level, 'section': row.section,
+            'total_paid': total_paid, 'total_amount': total_amount, 'payment_status': payment_status,
+            'academic_year': academic_year, 'semester': semester,
+        })
+    return members, next_cursor
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+from typing import Iterable, List, Optional, Set
+
+# Notification push hub.
+# Server-sent event streams subscribe to the counter keys of their owner's feed (see counters.py).
+# After a commit changes notification counters, listeners.py publishes the changed keys: to this
+# process's subscribers directly and, through the local adapter, to the other uvicorn workers on
+# the same host. Each worker binds a Unix datagram socket in a shared directory; publishers send
+# the keys to every socket there, so CLI scripts and job drains reach live streams as well.
+
+HUB_DIRECTORY = os.getenv("NOTIFICATION_HUB_DIR", os.path.join(tempfile.gettempdir(), "uos-notification-hub"))
+# Set NOTIFICATION_HUB=memory to keep publications inside the process (single worker)
+LOCAL_ADAPTER_ENABLED = hasattr(socket, "AF_UNIX") and os.getenv("NOTIFICATION_HUB", "local") != "memory"
+# Keys per datagram, well under the default Unix datagram size limit
+KEYS_PER_DATAGRAM = 200
+
+class Subscription:
+    """The changed keys one stream is waiting for; fed from any thread."""
+
+    def __init__(self, hub: "NotificationHub", keys: Iterable[tuple], loop: asyncio.AbstractEventLoop):
+        self.keys = set(keys)
+        self._hub = hub
+        self._loop = loop
+        self._queue: asyncio.Queue = asyncio.Queue()
+
+    def notify(self, keys: Set[tuple]) -> None:
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, keys)
+
+    async def next_change(self, timeout: float) -> Optional[Set[tuple]]:
+        """Waits for changed keys, merging any burst that is already queued; None on timeout."""
+        try:
+            keys = set(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+        except asyncio.TimeoutError:
+            return None
+        while not self._queue.empty():
+            keys |= self._queue.get_nowait()
+        return keys
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+class NotificationHub:
+    def __init__(self, directory: str = HUB_DIRECTORY, local_adapter: bool = LOCAL_ADAPTER_ENABLED):
+        self.directory = directory
+        self.local_adapter = local_adapter
+        self._subscriptions: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self._receiver: Optional[socket.socket] = None
+        self._receiver_path: Optional[str] = None
+        self._sender: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, keys: Iterable[tuple]) -> Subscription:
+        subscription = Subscription(self, keys, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, keys: Iterable[tuple]) -> None:
+        keys = {tuple(key) for key in keys}
+        if not keys:
+            return
+        self._deliver(keys)
+        if self.local_adapter:
+            self._send_to_peers(keys)
+
+    def _deliver(self, keys: Set[tuple]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            matched = subscription.keys & keys
+            if matched:
+                subscription.notify(matched)
+
+    # Local adapter
+
+    def start(self) -> None:
+        """Binds this worker's socket so publications from other processes reach its streams."""
+        if not self.local_adapter or self._receiver is not None:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{os.getpid()}.sock")
+            if os.path.exists(path):
+                os.unlink(path)
+            receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            receiver.setblocking(False)
+            receiver.bind(path)
+        except OSError as e:
+            logging.warning(f"Notification hub local adapter unavailable, streams only see this worker's writes: {e}")
+            return
+        self._receiver, self._receiver_path = receiver, path
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(receiver.fileno(), self._receive)
+
+    def stop(self) -> None:
+        if self._receiver is None:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._receiver.fileno())
+        self._receiver.close()
+        try:
+            os.unlink(self._receiver_path)
+        except OSError:
+            pass
+        self._receiver = self._receiver_path = self._loop = None
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                datagram = self._receiver.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                self._deliver({tuple(key) for key in json.loads(datagram)})
+            except (ValueError, TypeError) as e:
+                logging.warning(f"Ignoring malformed notification hub datagram: {e}")
+
+    def _peer_paths(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, name) for name in names
+            if name.endswith(".sock") and os.path.join(self.directory, name) != self._receiver_path
+        ]
+
+    def _send_to_peers(self, keys: Set[tuple]) -> None:
+        peer_paths = self._peer_paths()
+        if not peer_paths:
+            return
+        if self._sender is None:
+            self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sender.setblocking(False)
+        ordered = sorted(keys)
+        datagrams = [json.dumps(ordered[i:i + KEYS_PER_DATAGRAM]).encode() for i in range(0, len(ordered), KEYS_PER_DATAGRAM)]
+        for path in peer_paths:
+            for datagram in datagrams:
+                try:
+                    self._sender.sendto(datagram, path)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The worker that bound this socket is gone
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+                    break
+                except OSError as e:
+                    logging.warning(f"Could not publish notification changes to {path}: {e}")
+                    break
+
+notification_hub = NotificationHub()
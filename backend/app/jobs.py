@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, select, update, func, or_
+from sqlalchemy.orm import Session
+
+from . import models, crud
+from .database import SessionLocal, engine
+
+# Durable background jobs.
+# A job row is added in the same transaction as the write that needs it, so it is never lost
+# and never runs for a rolled-back write. The worker picks jobs up after the commit, outside
+# the request, and retries failed ones with exponential backoff.
+# A claim is a lease: the claiming worker renews it while the process lives, and only jobs whose
+# lease ran out (their worker died or hung) go back to the queue, so several web workers can share
+# the table without re-running each other's jobs.
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+RETRY_DELAY_SECONDS = 30
+POLL_INTERVAL_SECONDS = 5
+LEASE_SECONDS = 300
+LEASE_RENEWAL_SECONDS = LEASE_SECONDS / 3
+
+# Identifies this process's claims
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Set JOB_WORKER=off to leave jobs for another process or `python -m app.jobs drain`
+JOB_WORKER_ENABLED = os.getenv("JOB_WORKER", "on") != "off"
+
+# Handlers are called with a worker session and the job payload; the worker commits afterwards
+HANDLERS: Dict[str, Callable[..., object]] = {
+    "notify_organization_members": crud.notify_organization_members,
+    "notify_organization_admins": crud.notify_organization_admins,
+}
+
+def enqueue(db: Session, kind: str, max_attempts: int = 5, **payload) -> models.Job:
+    """Adds a job to the caller's transaction; it becomes runnable once that transaction commits."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job = models.Job(kind=kind, payload=payload, status=PENDING, attempts=0, max_attempts=max_attempts, run_after=datetime.utcnow())
+    db.add(job)
+    db.info["jobs_enqueued"] = True
+    return job
+
+@event.listens_for(Session, "after_commit")
+def wake_worker_after_commit(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", None):
+        worker.wake()
+
+@event.listens_for(Session, "after_rollback")
+def discard_enqueued_flag(session: Session) -> None:
+    session.info.pop("jobs_enqueued", None)
+
+# Running jobs
+
+def claim_next_job(db: Session, include_delayed: bool = False) -> Optional[models.Job]:
+    Job = models.Job
+    now = datetime.utcnow()
+    candidates = select(Job.id).where(Job.status == PENDING)
+    if not include_delayed:
+        candidates = candidates.where(Job.run_after <= now)
+    candidate_id = candidates.order_by(Job.run_after, Job.id).limit(1).scalar_subquery()
+    job_id = db.execute(
+        update(Job).where(Job.id == candidate_id, Job.status == PENDING)
+        .values(
+            status=RUNNING, attempts=Job.attempts + 1, started_at=now,
+            claimed_by=WORKER_ID, lease_expires_at=now + timedelta(seconds=LEASE_SECONDS),
+        )
+        .returning(Job.id)
+    ).scalar()
+    db.commit()
+    return db.get(Job, job_id) if job_id is not None else None
+
+def run_job(db: Session, job: models.Job) -> bool:
+    """Runs one claimed job; returns whether it succeeded."""
+    try:
+        HANDLERS[job.kind](db, **job.payload)
+        job.status = DONE
+        job.last_error = None
+        job.finished_at = datetime.utcnow()
+        job.lease_expires_at = None
+        db.commit()
+        return True
+    except Exception as e:
+        db.rollback()
+        logging.exception(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts}: {e}")
+        job.last_error = f"{type(e).__name__}: {e}"
+        job.lease_expires_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = FAILED
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = PENDING
+            job.run_after = datetime.utcnow() + timedelta(seconds=RETRY_DELAY_SECONDS * 2 ** (job.attempts - 1))
+        db.commit()
+        return False
+
+def run_pending_jobs(session_factory=None, limit: Optional[int] = None, include_delayed: bool = False) -> int:
+    """Runs runnable jobs until none are left (or `limit` ran); returns how many ran."""
+    session_factory = session_factory or SessionLocal
+    recover_interrupted_jobs(session_factory)
+    ran = 0
+    db = session_factory()
+    try:
+        while limit is None or ran < limit:
+            job = claim_next_job(db, include_delayed=include_delayed)
+            if job is None:
+                break
+            run_job(db, job)
+            ran += 1
+    finally:
+        db.close()
+    return ran
+
+def recover_interrupted_jobs(session_factory=None) -> int:
+    """Returns running jobs whose lease expired (their worker stopped or hung) to the queue."""
+    session_factory = session_factory or SessionLocal
+    Job = models.Job
+    db = session_factory()
+    try:
+        recovered = db.execute(
+            update(Job).where(
+                Job.status == RUNNING,
+                # Jobs claimed before leases existed have none
+                or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < datetime.utcnow()),
+            )
+            .values(status=PENDING, lease_expires_at=None)
+        ).rowcount
+        db.commit()
+    finally:
+        db.close()
+    if recovered:
+        logging.info(f"Requeued {recovered} interrupted job(s).")
+    return recovered
+
+def renew_leases(session_factory=None) -> int:
+    """Extends the leases of the jobs this process is running; returns how many."""
+    session_factory = session_factory or SessionLocal
+    Job = models.Job
+    db = session_factory()
+    try:
+        renewed = db.execute(
+            update(Job).where(Job.status == RUNNING, Job.claimed_by == WORKER_ID)
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=LEASE_SECONDS))
+        ).rowcount
+        db.commit()
+    finally:
+        db.close()
+    return renewed
+
+class JobWorker:
+    """Runs queued jobs on an asyncio task, executing each batch in a worker thread."""
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._lease_task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        self._lease_task = self._loop.create_task(self._renew_leases())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        for task in (self._task, self._lease_task):
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._lease_task = None
+        self._loop = None
+
+    def wake(self) -> None:
+        # Commits may happen on other threads (run_in_threadpool), so hop onto the worker's loop
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _renew_leases(self) -> None:
+        # Runs beside _run, whose thread is busy with the jobs whose leases need renewing
+        while True:
+            await asyncio.sleep(LEASE_RENEWAL_SECONDS)
+            try:
+                await asyncio.to_thread(renew_leases)
+            except Exception as e:
+                logging.exception(f"Renewing job leases failed: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(run_pending_jobs)
+            except Exception as e:
+                logging.exception(f"Job worker iteration failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+worker = JobWorker()
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Background job queue")
+    parser.add_argument("command", choices=["drain", "status"])
+    parser.add_argument("--include-delayed", action="store_true", help="Also run jobs waiting for a retry")
+    args = parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    if args.command == "drain":
+        ran = run_pending_jobs(include_delayed=args.include_delayed)
+        print(f"Ran {ran} job(s).")
+    elif args.command == "status":
+        db = SessionLocal()
+        try:
+            counts = db.execute(select(models.Job.status, func.count(models.Job.id)).group_by(models.Job.status)).all()
+        finally:
+            db.close()
+        for job_status, count in counts:
+            print(f"{job_status:<8} {count}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
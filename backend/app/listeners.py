@@ -0,0 +1,214 @@
+import logging
+from datetime import datetime
+from sqlalchemy import event, select, update, inspect
+from sqlalchemy.orm import Session
+
+from . import models, rollups, cache, counters, notification_configs
+from .hub import notification_hub
+
+# Session-level hooks that keep denormalized columns consistent no matter which
+# route or script performs the write.
+
+def _load_user_organization_ids(session: Session, user_ids) -> dict:
+    if not user_ids:
+        return {}
+    with session.no_autoflush:
+        rows = session.execute(
+            select(models.User.id, models.User.organization_id).where(models.User.id.in_(user_ids))
+        ).all()
+    return {user_id: organization_id for user_id, organization_id in rows}
+
+def _propagate_user_organization_change(session: Session, user: models.User) -> None:
+    if user.id is None or not inspect(user).attrs.organization_id.history.has_changes():
+        return
+    _record_changed_organizations(session, rollups.move_user_rollups(session, user.id, user.organization_id))
+    for model in (models.PaymentItem, models.Payment):
+        session.execute(
+            # updated_at is set to itself so the move does not re-stamp it through onupdate
+            update(model).where(model.user_id == user.id).values(organization_id=user.organization_id, updated_at=model.updated_at)
+            .execution_options(synchronize_session="evaluate")
+        )
+    user.organization_joined_at = datetime.utcnow()
+    counters.reset_broadcasts_seen(session, user.id, user.organization_id, user.organization_joined_at)
+    logging.info(f"Moved payment records of user {user.id} to organization {user.organization_id}.")
+
+@event.listens_for(Session, "before_flush")
+def maintain_payment_organization_ids(session: Session, flush_context, instances) -> None:
+    """Keeps PaymentItem/Payment.organization_id equal to the owning user's organization."""
+    needs_organization = []
+    for obj in session.new:
+        if isinstance(obj, (models.PaymentItem, models.Payment)) and obj.organization_id is None:
+            needs_organization.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, models.User):
+            _propagate_user_organization_change(session, obj)
+        elif isinstance(obj, (models.PaymentItem, models.Payment)) and inspect(obj).attrs.user_id.history.has_changes():
+            needs_organization.append(obj)
+
+    organization_ids = _load_user_organization_ids(
+        session, {obj.user_id for obj in needs_organization if obj.user_id is not None}
+    )
+    for obj in needs_organization:
+        if obj.user_id is not None:
+            obj.organization_id = organization_ids.get(obj.user_id)
+        elif obj.user is not None:
+            obj.organization_id = obj.user.organization_id
+
+@event.listens_for(Session, "after_flush")
+def count_new_members_seen_broadcasts(session: Session, flush_context) -> None:
+    """Counts the broadcasts sent before a new member joined as seen; their feed starts at the join."""
+    for obj in session.new:
+        if isinstance(obj, models.User) and obj.organization_id is not None:
+            counters.reset_broadcasts_seen(session, obj.id, obj.organization_id, obj.organization_joined_at)
+
+def _membership_fee_key(item: models.PaymentItem, is_new: bool):
+    updated_at = item.updated_at
+    if not is_new and not inspect(item).attrs.updated_at.history.added:
+        # The UPDATE will stamp updated_at through its onupdate default
+        updated_at = rollups.current_database_date()
+    return rollups.membership_fee_key(
+        item.organization_id, item.academic_year, item.semester, updated_at, item.is_paid, item.student_shirt_order_id
+    )
+
+def _payment_key(payment: models.Payment, is_new: bool):
+    payment_item = payment.payment_item
+    if payment_item is None and payment.payment_item_id is not None:
+        # Pending payments do not lazy-load their item
+        payment_item = Session.object_session(payment).get(models.PaymentItem, payment.payment_item_id)
+    created_at = payment.created_at
+    if created_at is None and is_new:
+        created_at = rollups.current_database_date()
+    return rollups.payment_key(
+        payment.organization_id, payment.status, created_at,
+        payment_item is not None,
+        payment_item.academic_year if payment_item is not None else None,
+        payment_item.semester if payment_item is not None else None,
+        payment_item.student_shirt_order_id if payment_item is not None else None,
+    )
+
+def _expense_key(expense: models.Expense, is_new: bool):
+    incurred_at = expense.incurred_at
+    if incurred_at is None and is_new:
+        incurred_at = rollups.current_database_date()
+    return rollups.expense_key(expense.organization_id, expense.category, incurred_at)
+
+def _move_payments_of_changed_items(session: Session, items, deltas: rollups.RollupDeltas) -> None:
+    # Payment buckets are keyed by their item's period, so re-key the payments of re-periodized items
+    moved = {
+        item.id: item for item in items
+        if any(inspect(item).attrs[attr].history.has_changes() for attr in ("academic_year", "semester", "student_shirt_order_id"))
+    }
+    if not moved:
+        return
+    pending_payments = {obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, models.Payment)}
+    payment_item_ids = dict(session.execute(
+        select(models.Payment.id, models.Payment.payment_item_id).where(models.Payment.payment_item_id.in_(moved.keys()))
+    ).all())
+    for payment_id, (key, amount) in rollups.load_payment_state(session, set(payment_item_ids) - pending_payments).items():
+        if key is None:
+            continue
+        payment_item = moved[payment_item_ids[payment_id]]
+        deltas.remove(key, amount)
+        if payment_item.student_shirt_order_id is None:
+            deltas.add(key[:2] + (payment_item.academic_year or "", payment_item.semester or "") + key[4:], amount)
+
+@event.listens_for(Session, "before_flush")
+def maintain_financial_rollups(session: Session, flush_context, instances) -> None:
+    """Applies the rollup delta of every PaymentItem, Payment and Expense write in the same transaction."""
+    tracked = (
+        (models.PaymentItem, rollups.load_membership_fee_state, _membership_fee_key, "fee"),
+        (models.Payment, rollups.load_payment_state, _payment_key, "amount"),
+        (models.Expense, rollups.load_expense_state, _expense_key, "amount"),
+    )
+    deltas = rollups.RollupDeltas()
+    with session.no_autoflush:
+        for model, load_state, new_key, amount_attr in tracked:
+            changed = [obj for obj in session.dirty if isinstance(obj, model) and session.is_modified(obj, include_collections=False)]
+            deleted = [obj for obj in session.deleted if isinstance(obj, model)]
+            added = [obj for obj in session.new if isinstance(obj, model)]
+            # Any payment or expense write (shirt orders and unpaid dues included) invalidates the org's cached dashboards
+            _record_changed_organizations(session, {obj.organization_id for obj in changed + deleted + added})
+            # Old contributions come from the database, which still holds the pre-flush rows
+            for key, amount in load_state(session, [obj.id for obj in changed + deleted]).values():
+                deltas.remove(key, amount)
+            for obj in changed:
+                deltas.add(new_key(obj, False), getattr(obj, amount_attr))
+            for obj in added:
+                deltas.add(new_key(obj, True), getattr(obj, amount_attr))
+            if model is models.PaymentItem:
+                _move_payments_of_changed_items(session, changed, deltas)
+    _record_changed_organizations(session, deltas.apply(session))
+
+@event.listens_for(Session, "before_flush")
+def maintain_notification_counters(session: Session, flush_context, instances) -> None:
+    """Applies the unread counter delta of every ORM Notification write in the same transaction."""
+    deltas = counters.CounterDeltas()
+    with session.no_autoflush:
+        changed = [obj for obj in session.dirty if isinstance(obj, models.Notification) and session.is_modified(obj, include_collections=False)]
+        deleted = [obj for obj in session.deleted if isinstance(obj, models.Notification)]
+        added = [obj for obj in session.new if isinstance(obj, models.Notification)]
+        for key, unread in counters.load_notification_state(session, [obj.id for obj in changed + deleted]).values():
+            deltas.add(key, unread=-unread)
+        for obj in changed:
+            key, unread = counters.notification_state(obj)
+            deltas.add(key, unread=unread)
+        for obj in added:
+            key, unread = counters.notification_state(obj)
+            deltas.add(key, unread=unread, delivered=1)
+    deltas.apply(session)
+
+@event.listens_for(Session, "before_flush")
+def bump_notification_config_version(session: Session, flush_context, instances) -> None:
+    """Tells every process's notification config cache (see notification_configs.py) to reload."""
+    if any(isinstance(obj, models.NotificationTypeConfig) for obj in (*session.new, *session.dirty, *session.deleted)):
+        notification_configs.bump_config_version(session)
+
+# Cached financial responses are invalidated by the transaction that changed them: it bumps its
+# organizations' data versions once each, and every process sees the new versions when it commits
+
+def _record_changed_organizations(session: Session, organization_ids) -> None:
+    bumped = session.info.setdefault("bumped_organization_ids", set())
+    changed = set(organization_ids) - bumped - {None}
+    if changed:
+        cache.bump_data_versions(session, changed)
+        bumped.update(changed)
+
+@event.listens_for(Session, "after_commit")
+def forget_bumped_organizations(session: Session) -> None:
+    session.info.pop("bumped_organization_ids", None)
+
+@event.listens_for(Session, "after_rollback")
+def discard_bumped_organizations(session: Session) -> None:
+    session.info.pop("bumped_organization_ids", None)
+
+# Live notification streams hear about counter changes once the transaction that made them commits
+
+@event.listens_for(Session, "after_commit")
+def publish_changed_notification_counters(session: Session) -> None:
+    keys = session.info.pop(counters.CHANGED_KEYS, None)
+    if keys:
+        notification_hub.publish(keys)
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_notification_counters(session: Session) -> None:
+    session.info.pop(counters.CHANGED_KEYS, None)
+
+# Cached entity titles of grouped notifications are evicted once an edit to the entity commits
+
+@event.listens_for(Session, "before_flush")
+def record_changed_entity_titles(session: Session, flush_context, instances) -> None:
+    changed = [obj for obj in session.dirty if session.is_modified(obj, include_collections=False)] + list(session.deleted)
+    keys = session.info.setdefault("changed_entity_titles", set())
+    for obj in changed:
+        identity = inspect(obj).identity
+        if identity:
+            keys.add((type(obj).__name__, identity[0]))
+
+@event.listens_for(Session, "after_commit")
+def evict_changed_entity_titles(session: Session) -> None:
+    for key in session.info.pop("changed_entity_titles", ()):
+        cache.entity_title_cache.delete(key)
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_entity_titles(session: Session) -> None:
+    session.info.pop("changed_entity_titles", None)
@@ -1,11 +1,14 @@
 from fastapi import FastAPI, Request, Depends, HTTPException, status, File, UploadFile, Form, APIRouter, Query, Body
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response
-from sqlalchemy.orm import Session, joinedload, contains_eager
-from sqlalchemy import func, and_, or_, extract, desc
-from . import models, schemas, crud
-from .database import SessionLocal, engine
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, contains_eager, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, and_, or_, extract, desc, select, case
+from . import models, schemas, crud, migrations, finance, cache, jobs, counters, retention, scheduler, past_due
+from . import search as app_search
+from .database import SessionLocal, engine, AsyncSessionLocal, ReadSessionLocal, AsyncReadSessionLocal
+from .hub import notification_hub
 from pathlib import Path
 from datetime import datetime, date, timedelta, timezone
 from typing import List, Optional, Dict, Any, Tuple
@@ -25,8 +28,9 @@ import calendar
 from dateutil.relativedelta import relativedelta
 import logging
 import json
+import asyncio
 import uuid
-import aiofiles
+from contextlib import asynccontextmanager
 
 # Import IntegrityError for database exception handling 
 from sqlalchemy.exc import IntegrityError
@@ -46,7 +50,30 @@ from .text import extract_text_from_pdf, extract_student_info
 
 # Initialize database and FastAPI app
 models.Base.metadata.create_all(bind=engine)
-app = FastAPI()
+migrations.run_migrations(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background job worker for notification fan-out (see jobs.py)
+    if jobs.JOB_WORKER_ENABLED:
+        jobs.worker.start()
+    # Lets notification streams on this worker hear about writes made by the other workers (see hub.py)
+    notification_hub.start()
+    # Periodic maintenance (see scheduler.py); each task is opt-in through its *_INTERVAL_HOURS setting
+    if scheduler.SCHEDULER_ENABLED:
+        retention_interval = scheduler.interval_from_env("NOTIFICATION_RETENTION_INTERVAL_HOURS")
+        if retention_interval:
+            scheduler.scheduler.register("notification_retention", retention_interval, retention.compact_notifications)
+        past_due_interval = scheduler.interval_from_env("PAST_DUE_SWEEP_INTERVAL_HOURS", past_due.SWEEP_INTERVAL_HOURS)
+        if past_due_interval:
+            scheduler.scheduler.register("past_due_sweep", past_due_interval, past_due.sweep_past_due)
+        scheduler.scheduler.start()
+    yield
+    await scheduler.scheduler.stop()
+    notification_hub.stop()
+    await jobs.worker.stop()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(SessionMiddleware, secret_key="your_secret_key")
 
 # File Directories
@@ -89,6 +116,23 @@ def get_db():
     finally:
         db.close()
 
+# Dependency to get async DB session (for routes that should not block the event loop)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Read-only variants for GET handlers (served by the reader pool in production mode)
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 # Helper function to generate secure filenames
 def generate_secure_filename(original_filename: str) -> str:
     _, file_extension = os.path.splitext(original_filename)
@@ -107,7 +151,7 @@ def delete_file_from_path(file_path: Optional[str]):
                 logger.error(f"Error deleting old file {full_path}: {e}")
 
 # Helper to handle file uploads
-async def handle_file_upload(
+def handle_file_upload(
     upload_file: UploadFile,
     subdirectory: str,
     allowed_types: List[str],
@@ -144,14 +188,14 @@ async def handle_file_upload(
 
     file_size = 0
     try:
-        async with aiofiles.open(target_save_path, "wb") as out_file:
+        with open(target_save_path, "wb") as out_file:
             while True:
-                chunk = await upload_file.read(8192)  # Read in chunks (e.g., 8KB)
+                chunk = upload_file.file.read(8192)  # Read in chunks (e.g., 8KB)
                 if not chunk:
                     break
                 file_size += len(chunk)
                 if max_size_bytes and file_size > max_size_bytes:
-                    await out_file.close() # Close file before raising
+                    out_file.close() # Close file before raising
                     # Clean up partial file if it's too large
                     if target_save_path.exists():
                         os.remove(target_save_path)
@@ -159,7 +203,7 @@ async def handle_file_upload(
                         status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                         detail=f"File size too large. Maximum allowed size is {max_size_bytes / (1024 * 1024):.2f} MB.",
                     )
-                await out_file.write(chunk)
+                out_file.write(chunk)
 
         # Return the path appropriate for the caller
         if is_video_upload:
@@ -201,8 +245,33 @@ def get_current_user_with_org(request: Request, db: Session = Depends(get_db)) -
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
     return user, user.organization
 
+# Async variants of the helpers above, for routes using get_async_db
+async def get_current_admin_with_org_async(request: Request, db: AsyncSession) -> Tuple[models.Admin, models.Organization]:
+    admin_id = request.session.get("admin_id")
+    if not admin_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated as admin.")
+    admin = (await db.execute(
+        select(models.Admin).options(selectinload(models.Admin.organizations)).where(models.Admin.admin_id == admin_id)
+    )).scalars().first()
+    if not admin:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin not found.")
+    if not admin.organizations:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin is not associated with an organization.")
+    return admin, admin.organizations[0]
+
+async def get_current_user_with_org_async(request: Request, db: AsyncSession) -> Tuple[models.User, Optional[models.Organization]]:
+    user_id = request.session.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated as user.")
+    user = (await db.execute(
+        select(models.User).options(selectinload(models.User.organization)).where(models.User.id == user_id)
+    )).scalars().first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found.")
+    return user, user.organization
+
 # Helper to prepare common template context
-async def get_base_template_context(request: Request, db: Session) -> Dict[str, Any]:
+def get_base_template_context(request: Request, db: Session) -> Dict[str, Any]:
     user_id = request.session.get("user_id")
     admin_id = request.session.get("admin_id")
     user_role = request.session.get("user_role")
@@ -238,61 +307,147 @@ router = APIRouter()
 
 @router.get("/get_user_notifications", response_class=JSONResponse)
 async def get_notifications_route(
-    request: Request, db: Session = Depends(get_db),
+    request: Request, db: AsyncSession = Depends(get_async_read_db),
     organization_id: Optional[int] = Query(None),
-    include_read: bool = Query(False)
+    include_read: bool = Query(False),
+    limit: int = Query(crud.NOTIFICATION_PAGE_SIZE, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    grouped: bool = Query(False)
 ) -> JSONResponse:
+    """The owner's formatted notifications, a page at a time.
+
+    By default a page holds `limit` notifications, grouped among themselves. With `grouped` the
+    database groups the whole feed and a page holds `limit` groups instead.
+    """
     user_id = request.session.get("user_id")
     admin_id = request.session.get("admin_id")
-    raw_notifications = []
     if user_id:
-        raw_notifications = crud.get_notifications(db, user_id=user_id, include_read=include_read)
+        owner = {"user_id": user_id}
     elif admin_id:
-        raw_notifications = crud.get_notifications(db, admin_id=admin_id, include_read=include_read)
+        owner = {"admin_id": admin_id}
     elif organization_id:
-        raw_notifications = crud.get_notifications(db, organization_id=organization_id, include_read=include_read)
+        owner = {"organization_id": organization_id}
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated or no organization ID provided.")
-    config_map = crud.get_all_notification_configs_as_map(db)
-    final_notifications_data = crud.process_and_format_notifications(db, raw_notifications, config_map)
-    return JSONResponse(content={"notifications": final_notifications_data})
+    before = None
+    if cursor:
+        try:
+            before = crud.decode_notification_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid notifications cursor.")
+    config_map = await crud.get_all_notification_configs_as_map(db)
+    if grouped:
+        final_notifications_data, next_cursor = await crud.get_grouped_notifications(
+            db, config_map, include_read=include_read, limit=limit, before=before, **owner
+        )
+        return JSONResponse(content={"notifications": final_notifications_data, "next_cursor": next_cursor})
+
+    # One extra row tells whether another page follows
+    raw_notifications = await crud.get_notifications(db, include_read=include_read, limit=limit + 1, before=before, **owner)
+    next_cursor = crud.encode_notification_cursor(raw_notifications[limit - 1]) if len(raw_notifications) > limit else None
+    raw_notifications = raw_notifications[:limit]
+    final_notifications_data = await crud.process_and_format_notifications(db, raw_notifications, config_map)
+    return JSONResponse(content={"notifications": final_notifications_data, "next_cursor": next_cursor})
+
+@router.get("/notifications/unread_count", response_class=JSONResponse)
+async def get_unread_notification_count(
+    request: Request, db: AsyncSession = Depends(get_async_read_db),
+    organization_id: Optional[int] = Query(None)
+) -> JSONResponse:
+    user_id = request.session.get("user_id")
+    admin_id = request.session.get("admin_id")
+    if not (user_id or admin_id or organization_id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated or no organization ID provided.")
+    counts = await counters.get_notification_counts(db, user_id=user_id, admin_id=admin_id, organization_id=organization_id)
+    return JSONResponse(content=counts)
+
+# Seconds between keep-alive comments on an idle notification stream
+NOTIFICATION_STREAM_KEEPALIVE_SECONDS = 20
+# Streams end after this long and the browser reconnects, picking up organization changes and
+# never holding a worker's graceful shutdown for longer
+NOTIFICATION_STREAM_MAX_SECONDS = 60
+NOTIFICATION_STREAM_RETRY_MS = 3000
+
+@router.get("/notifications/stream")
+async def stream_notification_counts(request: Request, organization_id: Optional[int] = Query(None)) -> StreamingResponse:
+    """Server-sent events pushing the badge counts whenever the owner's feed changes."""
+    user_id = request.session.get("user_id")
+    admin_id = request.session.get("admin_id")
+    if not (user_id or admin_id or organization_id):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated or no organization ID provided.")
+    # Short-lived sessions only: a stream stays open far longer than a request
+    async with AsyncReadSessionLocal() as db:
+        keys = await counters.get_feed_counter_keys(db, user_id=user_id, admin_id=admin_id, organization_id=organization_id)
+    subscription = notification_hub.subscribe(keys[0] + keys[1])
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + NOTIFICATION_STREAM_MAX_SECONDS
+        try:
+            yield f"retry: {NOTIFICATION_STREAM_RETRY_MS}\n\n"
+            while True:
+                async with AsyncReadSessionLocal() as db:
+                    counts = await counters.get_notification_counts(db, keys=keys)
+                yield f"event: counts\ndata: {json.dumps(counts)}\n\n"
+                while True:
+                    remaining = closes_at - loop.time()
+                    if remaining <= 0 or await request.is_disconnected():
+                        return
+                    if await subscription.next_change(timeout=min(remaining, NOTIFICATION_STREAM_KEEPALIVE_SECONDS)):
+                        break
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @router.post("/{notification_id}/read", response_model=schemas.Notification)
 async def mark_single_notification_as_read_endpoint(
     request: Request,
     notification_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):  
-    notif = crud.mark_notification_as_read(db, notification_id)
+    notif = await crud.mark_notification_as_read(db, notification_id, user_id=request.session.get("user_id"))
     if not notif:       
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notification not found.")    
-    db.commit()
-    db.refresh(notif)  
+    await db.commit()
+    if not notif.is_broadcast:
+        # A broadcast's read state is the member's receipt, not the shared row
+        await db.refresh(notif)  
     return notif
 
 @router.post("/mark_notifications_as_read_bulk")
 async def mark_notifications_as_read_bulk(
-    notification_ids: List[int], db: Session = Depends(get_db)
+    request: Request, notification_ids: List[int], db: AsyncSession = Depends(get_async_db)
 ):   
+    user_id = request.session.get("user_id")
+    admin_id = request.session.get("admin_id")
+    organization_id = request.session.get("organization_id")
+    if user_id:
+        owner = {"user_id": user_id}
+    elif admin_id:
+        owner = {"admin_id": admin_id}
+    elif organization_id:
+        owner = {"organization_id": organization_id}
+    else:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated to mark notifications as read.")
     try:       
-        notifications_to_update = db.query(models.Notification).filter(
-            models.Notification.id.in_(notification_ids)           
-        ).all()
-        if not notifications_to_update:
+        marked_count = await crud.mark_notifications_as_read_by_owner(db, notification_ids, **owner)
+        if not marked_count:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Notifications not found or not accessible.")
-        for notification in notifications_to_update:
-            notification.is_read = True        
-        db.commit()         
-        return {"message": "Notifications marked as read successfully."}
+        await db.commit()         
+        return {"message": "Notifications marked as read successfully.", "marked_count": marked_count}
+    except HTTPException:
+        raise
     except Exception as e:
-        db.rollback() 
+        await db.rollback() 
         logger.error(f"Error marking notifications {notification_ids} as read: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to mark notifications as read: {e}")
 
 @router.delete("/notifications/clear_all", status_code=status.HTTP_200_OK)
 async def clear_all_notifications_route(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> JSONResponse:  
     user_id = request.session.get("user_id")
     admin_id = request.session.get("admin_id")
@@ -300,11 +455,11 @@ async def clear_all_notifications_route(
 
     dismissed_count = 0
     if user_id:
-        dismissed_count = crud.mark_all_notifications_as_dismissed_by_owner(db, user_id=user_id)
+        dismissed_count = await crud.mark_all_notifications_as_dismissed_by_owner(db, user_id=user_id)
     elif admin_id:
-        dismissed_count = crud.mark_all_notifications_as_dismissed_by_owner(db, admin_id=admin_id)
+        dismissed_count = await crud.mark_all_notifications_as_dismissed_by_owner(db, admin_id=admin_id)
     elif organization_id:
-        dismissed_count = crud.mark_all_notifications_as_dismissed_by_owner(db, organization_id=organization_id)
+        dismissed_count = await crud.mark_all_notifications_as_dismissed_by_owner(db, organization_id=organization_id)
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated to clear notifications.")
     
@@ -314,7 +469,7 @@ async def clear_all_notifications_route(
 async def clear_single_notification_route(
     notification_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Response:
     user_id = request.session.get("user_id")
     admin_id = request.session.get("admin_id")
@@ -322,11 +477,11 @@ async def clear_single_notification_route(
 
     dismissed_notification = None
     if user_id:
-        dismissed_notification = crud.mark_notification_as_dismissed_by_owner(db, notification_id, user_id=user_id)
+        dismissed_notification = await crud.mark_notification_as_dismissed_by_owner(db, notification_id, user_id=user_id)
     elif admin_id:     
-        dismissed_notification = crud.mark_notification_as_dismissed_by_owner(db, notification_id, admin_id=admin_id)
+        dismissed_notification = await crud.mark_notification_as_dismissed_by_owner(db, notification_id, admin_id=admin_id)
     elif organization_id:       
-        dismissed_notification = crud.mark_notification_as_dismissed_by_owner(db, notification_id, organization_id=organization_id)
+        dismissed_notification = await crud.mark_notification_as_dismissed_by_owner(db, notification_id, organization_id=organization_id)
     else:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated to clear notifications.")
 
@@ -339,7 +494,7 @@ async def clear_single_notification_route(
 @router.get("/api/admin/existing_admins", response_model=List[schemas.AdminDisplay])
 async def get_existing_admins(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     authenticated_admin, organization = None, None
 
@@ -365,7 +520,7 @@ async def get_existing_admins(
 
 # Update Profile Picture of Admin
 @router.put("/api/admin/me/profile_picture")
-async def update_profile_picture(
+def update_profile_picture(
     profile_picture_file: UploadFile = File(...),
     db: Session = Depends(get_db),
     admin_data: tuple = Depends(get_current_admin_with_org) 
@@ -414,7 +569,7 @@ async def update_profile_picture(
 
 @router.get("/api/admin/me/profile", response_model=None) 
 async def get_my_profile(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin_data: tuple = Depends(get_current_admin_with_org) 
 ):
     current_admin, _ = admin_data 
@@ -493,7 +648,7 @@ DEFAULT_ORG_OFFICERS = [
 @router.get("/api/admin/org_chart_data", response_model=List[schemas.OrgChartNodeDisplay])
 async def get_organizational_chart_data(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     authenticated_entity = None
     organization = None
@@ -646,7 +801,7 @@ async def get_organizational_chart_data(
     return org_chart_data_nodes
 
 @router.put("/api/admin/org_chart_node/{node_id}", response_model=schemas.OrgChartNodeUpdateResponse)
-async def update_org_chart_node(
+def update_org_chart_node(
     node_id: str,
     request: Request,
     first_name: Optional[str] = Form(None),
@@ -664,6 +819,9 @@ async def update_org_chart_node(
             detail="Not authorized to modify this organization."
         )
 
+    # Read the upload before anything is flushed, so the write transaction never waits on the request body
+    chart_picture_contents = chart_picture.file.read() if chart_picture and chart_picture.size > 0 else None
+
     chart_node_to_update = None
     admin_id_for_node = None
     is_newly_created_chart_node = False
@@ -740,16 +898,15 @@ async def update_org_chart_node(
         else: 
             sever_link = True 
 
-    if chart_picture and chart_picture.size > 0:
+    if chart_picture_contents is not None:
         file_extension = Path(chart_picture.filename).suffix
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         file_path = FULL_ORG_CHART_UPLOAD_PATH / unique_filename
         relative_url = f"/static/images/org_chart_pictures/{unique_filename}"
 
         try:
-            contents = await chart_picture.read()
             with open(file_path, "wb") as buffer:
-                buffer.write(contents)
+                buffer.write(chart_picture_contents)
             chart_node_to_update.chart_picture_url = relative_url
             sever_link = True 
         except Exception as e:
@@ -784,7 +941,7 @@ async def update_org_chart_node(
         elif is_newly_created_chart_node:
             description = f"Admin '{authenticated_entity.first_name} {authenticated_entity.last_name}' created new org chart node via update path for ID '{response_id_for_return}'."
 
-        await crud.create_admin_log(
+        crud.create_admin_log(
             db=db,
             admin_id=authenticated_entity.admin_id,
             organization_id=organization.id,
@@ -813,7 +970,7 @@ async def update_org_chart_node(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to update chart node: {e}")
 
 @router.post("/api/admin/org_chart_node", response_model=schemas.OrgChartNodeUpdateResponse)
-async def create_org_chart_node(
+def create_org_chart_node(
     request: Request,
     first_name: Optional[str] = Form(None),
     last_name: Optional[str] = Form(None),
@@ -850,7 +1007,7 @@ async def create_org_chart_node(
         relative_url = f"/static/images/org_chart_pictures/{unique_filename}"
 
         try:
-            contents = await chart_picture.read()
+            contents = chart_picture.file.read()
             with open(file_path, "wb") as buffer:
                 buffer.write(contents)
             new_chart_node.chart_picture_url = relative_url
@@ -864,7 +1021,7 @@ async def create_org_chart_node(
 
         # Log the creation
         description = f"Admin '{authenticated_entity.first_name} {authenticated_entity.last_name}' created new org chart node with position '{new_chart_node.position}' and ID '{new_chart_node.id}'."
-        await crud.create_admin_log(
+        crud.create_admin_log(
             db=db,
             admin_id=authenticated_entity.admin_id,
             organization_id=organization.id,
@@ -894,7 +1051,7 @@ async def create_org_chart_node(
     
 # Route for Organization Positions
 @router.get("/api/admin/organizations/{organization_id}/taken_positions", response_model=List[str])
-async def get_taken_positions(organization_id: int, db: Session = Depends(get_db)):
+async def get_taken_positions(organization_id: int, db: Session = Depends(get_read_db)):
     taken_positions_query = db.query(models.Admin.position).join(models.Admin.organizations).filter(
         models.Organization.id == organization_id
     ).distinct().all()
@@ -904,7 +1061,7 @@ async def get_taken_positions(organization_id: int, db: Session = Depends(get_db
     return taken_positions
 
 @router.put("/api/admin/org_chart_node/{node_id}/overwrite", response_model=schemas.OrgChartNodeUpdateResponse)
-async def overwrite_org_chart_node(
+def overwrite_org_chart_node(
     node_id: str,
     payload: schemas.OrgChartNodeOverwriteRequest,
     request: Request,
@@ -1012,7 +1169,7 @@ async def overwrite_org_chart_node(
                     f"unlinked existing admin '{previous_node_admin_name}' (ID: {existing_admin_id_to_link}) "
                     f"from Org Chart Node ID {previous_node_id} (to reassign to node {chart_node_to_overwrite.id})."
                 )
-                await crud.create_admin_log(
+                crud.create_admin_log(
                     db=db,
                     admin_id=authenticated_entity.admin_id,
                     organization_id=organization.id,
@@ -1032,7 +1189,7 @@ async def overwrite_org_chart_node(
                 f"overwrote Org Chart Node ID {chart_node_to_overwrite.id}, "
                 f"displacing Admin '{original_admin_on_target_name}' (ID: {original_admin_id_linked_to_node})."
             )
-            await crud.create_admin_log(
+            crud.create_admin_log(
                 db=db,
                 admin_id=authenticated_entity.admin_id,
                 organization_id=organization.id,
@@ -1057,7 +1214,7 @@ async def overwrite_org_chart_node(
         response_id_for_return = str(chart_node_to_overwrite.admin_id) if chart_node_to_overwrite.admin_id else f"chart_node_{chart_node_to_overwrite.id}"
 
         description = f"Admin '{authenticated_entity.first_name} {authenticated_entity.last_name}' linked org chart node '{node_id}' with existing admin '{existing_admin_to_link.first_name} {existing_admin_to_link.last_name}' (ID: {existing_admin_id_to_link})."
-        await crud.create_admin_log(
+        crud.create_admin_log(
             db=db,
             admin_id=authenticated_entity.admin_id,
             organization_id=organization.id,
@@ -1088,7 +1245,7 @@ async def overwrite_org_chart_node(
     
 # Admin Bulletin Board Post Creation
 @router.post("/admin/bulletin_board/post", response_class=HTMLResponse, name="admin_post_bulletin")
-async def admin_post_bulletin(
+def admin_post_bulletin(
     request: Request,
     title: str = Form(...),
     content: str = Form(...),
@@ -1104,7 +1261,7 @@ async def admin_post_bulletin(
     if image and image.filename:
         allowed_image_types = ["image/jpeg", "image/png", "image/gif", "image/svg+xml"]
         try:
-            image_path = await handle_file_upload(
+            image_path = handle_file_upload(
                 upload_file=image,
                 subdirectory="images/bulletin_board", 
                 allowed_types=allowed_image_types,
@@ -1126,7 +1283,7 @@ async def admin_post_bulletin(
             "video/x-flv"      
         ]
         try:
-            video_path = await handle_file_upload(
+            video_path = handle_file_upload(
                 upload_file=video,
                 subdirectory="videos/bulletin_board", 
                 allowed_types=allowed_video_types,
@@ -1149,22 +1306,18 @@ async def admin_post_bulletin(
     db.commit()
     db.refresh(db_post)
     
-    users_in_org = db.query(models.User).filter(models.User.organization_id == admin_org.id).all()     
-    for user in users_in_org:
-        if user.organization_id == admin_org.id:
-            crud.create_notification(
-            db,
-            message=f"New bulletin post: '{title}'",
-            organization_id=admin_org.id,
-            user_id=user.id,
-            notification_type="bulletin_post",
-            bulletin_post_id=db_post.post_id, 
-            url=f"/BulletinBoard#{db_post.post_id}",
-            event_identifier=f"bulletin_post_user_{user.id}_post_{db_post.post_id}"
-            )
+    crud.create_broadcast_notification(
+        db,
+        organization_id=admin_org.id,
+        message=f"New bulletin post: '{title}'",
+        event_identifier=f"bulletin_post_org_{admin_org.id}_post_{db_post.post_id}",
+        notification_type="bulletin_post",
+        url=f"/BulletinBoard#{db_post.post_id}",
+        bulletin_post_id=db_post.post_id,
+    )
 
     description = f"Admin '{admin.first_name} {admin.last_name}' created bulletin board post: '{db_post.title}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1180,10 +1333,10 @@ async def admin_post_bulletin(
 
 # Admin Settings Page
 @router.get("/admin_settings/", response_class=HTMLResponse, name="admin_settings")
-async def admin_settings(request: Request, db: Session = Depends(get_db)):
+async def admin_settings(request: Request, db: Session = Depends(get_read_db)):
     admin, organization = get_current_admin_with_org(request, db) 
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "organization_id": organization.id,
         "current_theme_color": organization.theme_color,
@@ -1192,7 +1345,7 @@ async def admin_settings(request: Request, db: Session = Depends(get_db)):
 
 # Admin Event Creation 
 @router.post("/admin/events/create", name="admin_create_event")
-async def admin_create_event(
+def admin_create_event(
     request: Request,
     title: str = Form(...),
     classification: str = Form(...),
@@ -1227,7 +1380,7 @@ async def admin_create_event(
 
     classification_image_url = None
     if classification_image and classification_image.filename:
-        classification_image_url = await handle_file_upload(
+        classification_image_url = handle_file_upload(
             classification_image,
             EVENT_CLASSIFICATION_IMAGES_SUBDIRECTORY,
             ["image/jpeg", "image/png", "image/gif", "image/svg+xml"],
@@ -1248,22 +1401,19 @@ async def admin_create_event(
     db.commit()
     db.refresh(db_event)
 
-    users_in_org = db.query(models.User).filter(models.User.organization_id == admin_org.id).all()
-    for user in users_in_org:
-        crud.create_notification(
-            db,
-            message=f"New event: '{title}' on {event_date.strftime('%Y-%m-%d at %H:%M')}",
-            organization_id=admin_org.id,
-            user_id=user.id,
-            notification_type="event",
-            event_id=db_event.event_id,
-            url=f"/Events#{db_event.event_id}",
-            event_identifier=f"new_event_user_{user.id}_event_{db_event.event_id}"
-        )
+    crud.create_broadcast_notification(
+        db,
+        organization_id=admin_org.id,
+        message=f"New event: '{title}' on {event_date.strftime('%Y-%m-%d at %H:%M')}",
+        event_identifier=f"new_event_org_{admin_org.id}_event_{db_event.event_id}",
+        notification_type="event",
+        url=f"/Events#{db_event.event_id}",
+        event_id=db_event.event_id,
+    )
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' created event: '{db_event.title}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1279,7 +1429,7 @@ async def admin_create_event(
 
 # Admin Event Deletion 
 @router.post("/admin/events/delete/{event_id}", response_class=HTMLResponse, name="admin_delete_event")
-async def admin_delete_event(event_id: int, request: Request, db: Session = Depends(get_db)):
+def admin_delete_event(event_id: int, request: Request, db: Session = Depends(get_db)):
     admin, admin_org = get_current_admin_with_org(request, db)
     event = db.query(models.Event).filter(models.Event.event_id == event_id).first()
     if not event:
@@ -1288,16 +1438,14 @@ async def admin_delete_event(event_id: int, request: Request, db: Session = Depe
     if event.classification_image_url:
         delete_file_from_path(event.classification_image_url)
 
-    db.query(models.Notification).filter(
-        models.Notification.event_id == event_id 
-    ).delete(synchronize_session=False)
+    crud.delete_notifications(db, models.Notification.event_id == event_id)
 
     db.delete(event)
     db.commit()
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' deleted event: '{event.title}' (ID: {event.event_id})."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1312,7 +1460,7 @@ async def admin_delete_event(event_id: int, request: Request, db: Session = Depe
 
 # Admin Bulletin Post Deletion
 @router.post("/admin/bulletin_board/delete/{post_id}", response_class=HTMLResponse, name="admin_delete_bulletin_post")
-async def admin_delete_bulletin_post(post_id: int, request: Request, db: Session = Depends(get_db)):
+def admin_delete_bulletin_post(post_id: int, request: Request, db: Session = Depends(get_db)):
     admin, admin_org = get_current_admin_with_org(request, db)
     post = db.query(models.BulletinBoard).filter(models.BulletinBoard.post_id == post_id).first()
     if not post:
@@ -1321,9 +1469,7 @@ async def admin_delete_bulletin_post(post_id: int, request: Request, db: Session
     if post.image_path:
         delete_file_from_path(post.image_path)
 
-    db.query(models.Notification).filter(
-        models.Notification.bulletin_post_id == post_id 
-    ).delete(synchronize_session=False)
+    crud.delete_notifications(db, models.Notification.bulletin_post_id == post_id)
 
     db.query(models.UserLike).filter(models.UserLike.post_id == post_id).delete(synchronize_session=False)
 
@@ -1332,7 +1478,7 @@ async def admin_delete_bulletin_post(post_id: int, request: Request, db: Session
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' deleted bulletin board post: '{post.title}' (ID: {post.post_id})."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1347,7 +1493,7 @@ async def admin_delete_bulletin_post(post_id: int, request: Request, db: Session
 
 # Shirt Campaigns
 @router.post("/campaigns/", response_model=schemas.ShirtCampaign)
-async def create_shirt_campaign_api(
+def create_shirt_campaign_api(
     request: Request,
     title: str = Form(...),
     description: Optional[str] = Form(None),
@@ -1371,7 +1517,7 @@ async def create_shirt_campaign_api(
 
     size_chart_image_path = None
     if size_chart_image and size_chart_image.filename:
-        size_chart_image_path = await handle_file_upload(
+        size_chart_image_path = handle_file_upload(
             size_chart_image,
             CAMPAIGN_IMAGES_SUBDIRECTORY,
             ["image/jpeg", "image/png", "image/gif", "image/svg+xml"],
@@ -1396,7 +1542,7 @@ async def create_shirt_campaign_api(
     )
 
     description_log = f"Admin '{admin.first_name} {admin.last_name}' created shirt campaign: '{db_campaign.title}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1413,7 +1559,7 @@ async def create_shirt_campaign_api(
 async def get_shirt_campaign_api(
     campaign_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         current_entity, organization = get_current_admin_with_org(request, db)
@@ -1433,7 +1579,7 @@ async def get_shirt_campaign_api(
 @router.get("/campaigns/", response_model=List[schemas.ShirtCampaign])
 async def get_all_shirt_campaigns_api(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin_info_tuple: Tuple[models.Admin, models.Organization] = Depends(get_current_admin_with_org),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
@@ -1459,7 +1605,7 @@ async def get_all_shirt_campaigns_api(
     return campaigns
 
 @router.put("/campaigns/{campaign_id}", response_model=schemas.ShirtCampaign)
-async def update_shirt_campaign_api(
+def update_shirt_campaign_api(
     campaign_id: int,
     request: Request,
     title: Optional[str] = Form(None),
@@ -1504,7 +1650,7 @@ async def update_shirt_campaign_api(
     final_size_chart_image_path = campaign.size_chart_image_path
     if size_chart_image is not None:
         if size_chart_image.filename:
-            final_size_chart_image_path = await handle_file_upload(
+            final_size_chart_image_path = handle_file_upload(
                 size_chart_image,
                 CAMPAIGN_IMAGES_SUBDIRECTORY,
                 ["image/jpeg", "image/png", "image/gif", "image/svg+xml"],
@@ -1528,7 +1674,7 @@ async def update_shirt_campaign_api(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shirt Campaign not found after update attempt.")
 
     description_log = f"Admin '{admin.first_name} {admin.last_name}' updated shirt campaign: '{updated_campaign.title}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1542,7 +1688,7 @@ async def update_shirt_campaign_api(
     return updated_campaign
 
 @router.delete("/campaigns/{campaign_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_shirt_campaign_api(
+def delete_shirt_campaign_api(
     campaign_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -1561,7 +1707,7 @@ async def delete_shirt_campaign_api(
     crud.delete_shirt_campaign(db, campaign_id=campaign_id)
 
     description_log = f"Admin '{admin.first_name} {admin.last_name}' deleted shirt campaign: '{campaign.title}' (ID: {campaign.id})."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -1575,7 +1721,7 @@ async def delete_shirt_campaign_api(
 
 # Shirt Orders
 @router.post("/orders/", response_model=schemas.StudentShirtOrder)
-async def create_student_shirt_order_api(
+def create_student_shirt_order_api(
     request: Request,
     campaign_id: int = Form(...),
     student_name: str = Form(...),
@@ -1610,7 +1756,7 @@ async def create_student_shirt_order_api(
 async def get_student_shirt_order_api(
     order_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     current_entity = None
     organization = None
@@ -1642,7 +1788,7 @@ async def get_student_shirt_order_api(
 async def get_student_shirt_orders_by_campaign_api(
     campaign_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
 
@@ -1667,7 +1813,7 @@ async def get_student_shirt_orders_by_campaign_api(
 async def get_student_shirt_orders_by_student_api(
     student_id: int,
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
 
@@ -1697,7 +1843,7 @@ async def get_student_shirt_orders_by_student_api(
     return orders
 
 @router.put("/orders/{order_id}", response_model=schemas.StudentShirtOrder)
-async def update_student_shirt_order_api(
+def update_student_shirt_order_api(
     order_id: int,
     request: Request,
     order_update_data: schemas.StudentShirtOrderUpdate = Body(...), 
@@ -1727,7 +1873,7 @@ async def update_student_shirt_order_api(
     return updated_order
 
 @router.delete("/orders/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_student_shirt_order_api(
+def delete_student_shirt_order_api(
     order_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -1751,7 +1897,7 @@ async def delete_student_shirt_order_api(
 @router.get("/orders/", response_model=List[schemas.StudentShirtOrder]) 
 async def get_all_organization_orders_for_admin(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
 ):
@@ -1768,7 +1914,7 @@ async def get_all_organization_orders_for_admin(
 @router.get("/student/shirt-management", response_class=HTMLResponse, name="student_shirt_management")
 async def get_student_shirt_management_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_and_org: tuple = Depends(get_current_user_with_org)
 ):
     logger.info("--- Entering /student/shirt-management route ---")
@@ -1811,7 +1957,7 @@ async def get_student_shirt_management_page(
     order_detail = None 
     logger.info(f"Order Detail set to: {order_detail}")
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     logger.info(f"Base Template Context Keys: {list(context.keys())}")
 
     context.update({
@@ -1833,7 +1979,7 @@ async def get_student_shirt_management_page(
 async def get_student_shirt_order_detail_page(
     request: Request,
     order_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_and_org: tuple = Depends(get_current_user_with_org)
 ):
     logger.info(f"--- Entering /student/shirt-management/order/{order_id} route ---")
@@ -1873,7 +2019,7 @@ async def get_student_shirt_order_detail_page(
     else:
         logger.info("'now' already exists in Jinja2 globals.")
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     logger.info(f"Base Template Context Keys: {list(context.keys())}")
     context.update({
         "shirt_campaigns": shirt_campaigns,
@@ -1889,9 +2035,9 @@ async def get_student_shirt_order_detail_page(
     )
 
 @router.get("/admin/shirt_management", response_class=HTMLResponse, name="admin_shirt_management")
-async def admin_shirt_management(request: Request, db: Session = Depends(get_db)):
+async def admin_shirt_management(request: Request, db: Session = Depends(get_read_db)):
     admin, organization = get_current_admin_with_org(request, db)
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "admin_id": admin.admin_id,
         "organization_id": organization.id,
@@ -1900,87 +2046,42 @@ async def admin_shirt_management(request: Request, db: Session = Depends(get_db)
 
 #STUDENTS PROFILE
 @router.get("/admin/students_profile", response_class=HTMLResponse, name="admin_students_profile")
-async def admin_shirt_management(request: Request, db: Session = Depends(get_db)):
+async def admin_shirt_management(request: Request, db: Session = Depends(get_read_db)):
     admin, organization = get_current_admin_with_org(request, db)
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "admin_id": admin.admin_id,
         "organization_id": organization.id,
     })
     return templates.TemplateResponse("admin_dashboard/admin_students_profile.html", context)
 
-@router.get("/admin/students", response_model=List[dict])
+@router.get("/admin/students", response_model=dict)
 async def get_students(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin_with_org: Tuple[models.Admin, models.Organization] = Depends(get_current_admin_with_org),
-    search: Optional[str] = Query(None, description="Search query for student name or student number"),
+    search: Optional[str] = Query(None, description="Search query for student name, student number, email or section"),
     year_level: Optional[str] = Query(None, description="Filter by year level"),
     section: Optional[str] = Query(None, description="Filter by section"),
-    sort_by: Optional[str] = Query("last_name", description="Column to sort by (e.g., first_name, last_name, student_number, year_level, section, email)"),
+    sort_by: Optional[str] = Query(None, description="Column to sort by (e.g., first_name, last_name, student_number, year_level, section, email); searches default to relevance, lists to last_name"),
     sort_direction: Optional[str] = Query("asc", description="Sort direction (asc or desc)"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(app_search.STUDENT_PAGE_SIZE, ge=1, le=200),
 ):
     """
-    Retrieves a list of students for the admin's organization with optional search, filter, and sort capabilities.
+    Retrieves a page of students for the admin's organization with optional search, filter, and sort capabilities.
     """
     admin, organization = admin_with_org 
 
-    query = db.query(models.User)
-
-    query = query.filter(models.User.organization_id == organization.id)
-
-    if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            (models.User.first_name.ilike(search_pattern)) |
-            (models.User.last_name.ilike(search_pattern)) |
-            (models.User.student_number.ilike(search_pattern))
-        )
-
-    if year_level:
-        query = query.filter(models.User.year_level == year_level)
-
-    if section:
-        query = query.filter(models.User.section == section)
-
-    sortable_columns = {
-        "student_number": models.User.student_number,
-        "first_name": models.User.first_name,
-        "last_name": models.User.last_name,
-        "year_level": models.User.year_level,
-        "section": models.User.section,
-        "email": models.User.email,
-    }
-
-    sort_column_attr = sortable_columns.get(sort_by)
-    if sort_column_attr:
-        if sort_direction == 'desc':
-            query = query.order_by(sort_column_attr.desc())
-        else:
-            query = query.order_by(sort_column_attr.asc())
-    else:
-        query = query.order_by(models.User.last_name.asc())
-
-    students = query.all()
-
-    students_data = [
-        {
-            "student_number": student.student_number,
-            "first_name": student.first_name,
-            "last_name": student.last_name,
-            "year_level": student.year_level,
-            "section": student.section,
-            "email": student.email,
-        }
-        for student in students
-    ]
-
-    return students_data
+    return app_search.search_students(
+        db, organization.id, search=search, year_level=year_level, section=section,
+        sort_by=sort_by, descending=sort_direction == "desc", page=page, page_size=page_size,
+    )
 
 # Admin View Student Profile
 @router.get("/admin/students/profile/{student_number}", response_model=dict)
 async def get_student_profile(
     student_number: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin_with_org: Tuple[models.Admin, models.Organization] = Depends(get_current_admin_with_org),
 ):
     """
@@ -2029,7 +2130,7 @@ async def get_student_profile(
 @router.get("/Admin/payments", response_class=HTMLResponse, name="admin_payments")
 async def admin_payments(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     student_number: Optional[str] = None,
 ):
     admin, organization = get_current_admin_with_org(request, db)
@@ -2057,7 +2158,7 @@ async def admin_payments(
             "student_number": item.user.student_number if item.user else None,
         })      
     
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "payment_items": payment_items_with_status,
         "now": date.today(),
@@ -2069,7 +2170,7 @@ async def admin_payments(
 @router.get("/admin/Payments/History", response_class=JSONResponse, name="admin_payment_history")
 async def admin_payment_history(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     student_number: Optional[str] = None
 ):
     admin, organization = get_current_admin_with_org(request, db)
@@ -2146,7 +2247,7 @@ async def admin_payment_history(
 
 # Update Payment Status
 @router.post("/admin/payment/{payment_item_id}/update_status")
-async def update_payment_status(
+def update_payment_status(
     request: Request,
     payment_item_id: int,
     status: str = Form(...),
@@ -2202,7 +2303,7 @@ async def update_payment_status(
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' updated payment status for '{user_name_affected}' (Item ID: {payment_item_id}) from '{old_status_text}' to '{status}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -2219,180 +2320,77 @@ async def update_payment_status(
 @router.get("/admin/membership/")
 async def admin_membership(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     academic_year: Optional[str] = None,
     semester: Optional[str] = None,
 ) -> List[Dict]:
-    admin, admin_org = get_current_admin_with_org(request, db)
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
 
-    # Start with a query for users in the organization
-    query = db.query(models.User).filter(models.User.organization_id == admin_org.id)
+    sections = (await db.execute(finance.section_totals_query(admin_org.id, academic_year, semester))).all()
 
-    # Apply filters by joining PaymentItem and filtering on its columns
-    if academic_year or semester:
-        # We need to join PaymentItem to filter users based on their payment items
-        query = query.join(
-            models.PaymentItem,
-            models.User.id == models.PaymentItem.user_id
-        )
-        # Add payment item specific filters
-        payment_item_filters = [
-            models.PaymentItem.student_shirt_order_id.is_(None)
-        ]
-        if academic_year:
-            payment_item_filters.append(models.PaymentItem.academic_year == academic_year)
-        if semester:
-            payment_item_filters.append(models.PaymentItem.semester == semester)
-        
-        query = query.filter(*payment_item_filters)
-    
-    # Ensure unique users are returned, and load payment items for calculation
-    # We load all payment items now, but we'll still filter them in Python for robust sums
-    # if a user has other payment items not related to the current filters
-    users = query.options(joinedload(models.User.payment_items)).distinct(models.User.id).all()
-    
     membership_data = []
-    processed_sections = set()
-
-    for user in users:
-        # This approach assumes 'users' now contains only users relevant to the filters.
-        # However, to maintain the section grouping and count, it's simpler to re-group
-        # if the goal is counts per section for filtered users.
-        
-        # A more direct approach to get overall counts for the stat card:
-        # Let's pivot this endpoint slightly. Since the frontend expects a sum
-        # for 'total_members_count' and 'total_collected', it might be better
-        # to return these aggregated values directly from this endpoint.
-        # The current structure returns an array of sections, which requires the frontend
-        # to sum them up. This is fine if section breakdown is still needed.
-
-        # If you still need the section breakdown AND accurate section_users_count:
-        # The 'users' list is now ALREADY filtered by academic_year and semester (if provided).
-        # So, the original len(section_users) will now be correct for the filtered set.
-        if user.section not in processed_sections:
-            # section_users will now only contain users that have payment items matching filters
-            section_users_for_filtered_period = [u for u in users if u.section == user.section]
-            
-            section_paid_count = 0
-            overall_section_total_amount = 0.0
-            overall_section_total_paid = 0.0
-
-            for other_user in section_users_for_filtered_period: # Iterate over the already filtered users
-                # user_relevant_payment_items will still filter by academic_year/semester for safety,
-                # in case a user has payment items outside the main query filter.
-                # But since the 'users' query is now pre-filtered, this loop will be more efficient.
-                user_relevant_payment_items = [
-                    pi for pi in other_user.payment_items
-                    if (academic_year is None or pi.academic_year == academic_year) and
-                       (semester is None or pi.semester == semester) and
-                       (pi.student_shirt_order_id is None) 
-                ]
-                
-                is_user_fully_paid_for_period = False
-                if user_relevant_payment_items:
-                    is_user_fully_paid_for_period = all((pi.is_paid or pi.is_not_responsible) for pi in user_relevant_payment_items)
-                    
-                if is_user_fully_paid_for_period:
-                    section_paid_count += 1
-                    
-                for pi in user_relevant_payment_items:
-                    if not pi.is_not_responsible:
-                        overall_section_total_amount += pi.fee
-                        if pi.is_paid:
-                            overall_section_total_paid += pi.fee
-
-            # Now, len(section_users_for_filtered_period) should be the correct filtered count
-            status_text = f"{section_paid_count}/{len(section_users_for_filtered_period)}" if academic_year and semester else str(len(section_users_for_filtered_period))
-            
-            membership_data.append({
-                'student_number': section_users_for_filtered_period[0].student_number, # Assuming at least one user in section
-                'email': section_users_for_filtered_period[0].email,
-                'first_name': section_users_for_filtered_period[0].first_name,
-                'last_name': section_users_for_filtered_period[0].last_name,
-                'year_level': section_users_for_filtered_period[0].year_level,
-                'section': section_users_for_filtered_period[0].section,
-                'status': status_text,
-                'total_paid': overall_section_total_paid, 
-                'total_amount': overall_section_total_amount,
-                'academic_year': academic_year,
-                'semester': semester,
-                'section_users_count': len(section_users_for_filtered_period), # This will now be the filtered count
-                'section_paid_count': section_paid_count
-            })
-            processed_sections.add(user.section)
+    for section in sections:
+        first_user = section.User
+        status_text = f"{section.section_paid_count}/{section.section_users_count}" if academic_year and semester else str(section.section_users_count)
+        membership_data.append({
+            'student_number': first_user.student_number,
+            'email': first_user.email,
+            'first_name': first_user.first_name,
+            'last_name': first_user.last_name,
+            'year_level': first_user.year_level,
+            'section': first_user.section,
+            'status': status_text,
+            'total_paid': section.total_paid,
+            'total_amount': section.total_amount,
+            'academic_year': academic_year,
+            'semester': semester,
+            'section_users_count': section.section_users_count,
+            'section_paid_count': section.section_paid_count
+        })
     return membership_data
 
 # Admin Individual Members Data
-@router.get("/admin/individual_members/")
+@router.get("/admin/individual_members/", response_class=JSONResponse)
 async def admin_individual_members(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     academic_year: Optional[str] = None,
     semester: Optional[str] = None,
-) -> List[Dict]:
-    admin, admin_org = get_current_admin_with_org(request, db)
-
-    query = db.query(models.User).outerjoin(
-        models.PaymentItem,
-        models.User.id == models.PaymentItem.user_id
-    ).filter(models.User.organization_id == admin_org.id)
-
-    payment_item_filters = [
-        models.PaymentItem.student_shirt_order_id.is_(None) 
-    ]
-    if academic_year:
-        payment_item_filters.append(models.PaymentItem.academic_year == academic_year)
-    if semester:
-        payment_item_filters.append(models.PaymentItem.semester == semester)
-
-    if payment_item_filters:
-        query = query.filter(*payment_item_filters)
-
-    query = query.options(contains_eager(models.User.payment_items))
-    
-    query = query.distinct(models.User.id).order_by(models.User.id) 
-
-
-    users = query.all()
-    membership_data = []
-
-    for user in users:
-        total_paid = 0
-        total_amount = 0
-        payment_status = "No Dues" if not (academic_year or semester) else "Not Applicable"
-
-        for pi in user.payment_items:
-            if not pi.is_not_responsible:
-                total_amount += pi.fee
-                
-                if pi.is_paid:
-                    total_paid += pi.fee
-
-        if total_amount > 0:
-            payment_status = "Paid" if total_paid >= total_amount else "Partially Paid"
-        else:
-            if academic_year or semester:
-                payment_status = "No Dues for Period"
-            else:
-                payment_status = "No Dues"
-
-        membership_data.append({
-            'student_number': user.student_number, 'email': user.email, 'first_name': user.first_name,
-            'last_name': user.last_name, 'year_level': user.year_level, 'section': user.section,
-            'total_paid': total_paid, 'total_amount': total_amount, 'payment_status': payment_status,
-            'academic_year': academic_year, 'semester': semester,
-        })
-    return membership_data
+    sort: str = Query("id", description=f"One of: {', '.join(finance.MEMBER_SORTS)}"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: int = Query(finance.MEMBER_PAGE_SIZE, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+) -> JSONResponse:
+    """A page of the organization's members with their fee totals, and the cursor of the next page."""
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
+    if sort not in finance.MEMBER_SORTS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid sort: {sort}. Allowed sorts are: {', '.join(finance.MEMBER_SORTS)}")
+    after = None
+    if cursor:
+        try:
+            after = finance.decode_member_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid members cursor.")
+    members, next_cursor = await finance.load_individual_members(
+        db, admin_org.id, academic_year, semester, sort=sort, descending=order == "desc", limit=limit, after=after
+    )
+    return JSONResponse(content={"members": members, "next_cursor": next_cursor})
 
 # Financial Trends (Monthly Revenue)
 @router.get("/financial_trends")
 async def get_financial_trends(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     academic_year: str = Query(None, description="Filter by academic year (e.g., '2023-2024')"),
     semester: str = Query(None, description="Filter by semester (e.g., '1st Semester', '2nd Semester')")
 ):
-    admin, admin_org = get_current_admin_with_org(request, db)
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
+    return await cache.cached_json_response(
+        request, db, "financial_trends", admin_org.id, (academic_year, semester, date.today()),
+        lambda: build_financial_trends(db, admin_org, academic_year, semester)
+    )
+
+async def build_financial_trends(db: AsyncSession, admin_org: models.Organization, academic_year: Optional[str], semester: Optional[str]) -> Dict[str, Any]:
 
     start_date_filter = None
     end_date_filter = None
@@ -2438,33 +2436,19 @@ async def get_financial_trends(
         start_date_filter = datetime(earliest_year, earliest_month, 1).date()
         end_date_filter = today # Default end date is today
 
-    query = db.query(
-        func.extract('year', models.PaymentItem.updated_at).label('year'),  # Use PaymentItem.updated_at
-        func.extract('month', models.PaymentItem.updated_at).label('month'), # Use PaymentItem.updated_at
-        models.PaymentItem.academic_year.label('payment_academic_year'),
-        func.sum(models.PaymentItem.fee).label('total'), # Sum PaymentItem.fee
-    ).join(models.PaymentItem.user).filter( # Join PaymentItem directly with User
-        and_(
-            models.PaymentItem.is_paid == True, # Use PaymentItem.is_paid to determine success
-            models.User.organization_id == admin_org.id,
-            models.PaymentItem.student_shirt_order_id == None
-        )
+    # Monthly buckets come from the financial rollups, grouped by month and the payment's academic year
+    query = finance.membership_fees_by_month_query(
+        admin_org.id,
+        start_month=start_date_filter.strftime("%Y-%m") if start_date_filter else None,
+        end_month=end_date_filter.strftime("%Y-%m") if end_date_filter else None,
+        semester=semester if semester and semester != 'Semester ▼' else None,
     )
-
-    if start_date_filter:
-        query = query.filter(models.PaymentItem.updated_at >= start_date_filter) # Filter by PaymentItem.updated_at
-    if end_date_filter:
-        query = query.filter(models.PaymentItem.updated_at <= end_date_filter) # Filter by PaymentItem.updated_at
-
-    if semester and semester != 'Semester ▼':
-        query = query.filter(models.PaymentItem.semester == semester)
-
-    # Group by year, month, AND academic_year of the payment item to get breakdowns
-    financial_data_raw = query.group_by('year', 'month', 'payment_academic_year').order_by('year', 'month', 'payment_academic_year').all()    
-    for row in financial_data_raw:
-        month_key = (int(row.year), int(row.month))
-        payment_ay = row.payment_academic_year
-        total_amount = float(row.total)
+    financial_data_raw = (await db.execute(query)).all()
+    for month, payment_academic_year, total in financial_data_raw:
+        year_str, month_str = month.split('-')
+        month_key = (int(year_str), int(month_str))
+        payment_ay = payment_academic_year or None
+        total_amount = float(total)
 
         if month_key in monthly_academic_year_data:
             if payment_ay not in monthly_academic_year_data[month_key]:
@@ -2554,12 +2538,10 @@ async def get_financial_trends(
 
 # Expenses by Category
 @router.get("/expenses_by_category")
-async def get_expenses_by_category(request: Request, db: Session = Depends(get_db)):
-    admin, admin_org = get_current_admin_with_org(request, db)
+async def get_expenses_by_category(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
 
-    expenses_data = db.query(models.Expense.category, func.sum(models.Expense.amount)).filter(
-        models.Expense.organization_id == admin_org.id
-    ).group_by(models.Expense.category).all()
+    expenses_data = (await db.execute(finance.expenses_by_category_query(admin_org.id))).all()
 
     labels = [category if category else "Uncategorized" for category, total in expenses_data]
     data = [float(total) for category, total in expenses_data]
@@ -2568,44 +2550,38 @@ async def get_expenses_by_category(request: Request, db: Session = Depends(get_d
 @router.get("/fund_distribution")
 async def get_fund_distribution(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     academic_year: str = Query(None, description="Filter by academic year (e.g., '2023-2024')"),
     semester: str = Query(None, description="Filter by semester (e.g., '1st Semester', '2nd Semester')")
 ):
-    admin, admin_org = get_current_admin_with_org(request, db)
-
-    query = db.query(
-        models.PaymentItem.academic_year,
-        models.PaymentItem.semester,
-        func.sum(models.Payment.amount)
-    ).join(
-        models.Payment, models.PaymentItem.id == models.Payment.payment_item_id
-    ).join(models.PaymentItem.user).filter(
-        and_(
-            models.Payment.status == "success",
-            models.User.organization_id == admin_org.id,
-            models.PaymentItem.student_shirt_order_id == None # Exclude shirt orders
-        )
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
+    return await cache.cached_json_response(
+        request, db, "fund_distribution", admin_org.id, (academic_year, semester),
+        lambda: build_fund_distribution(db, admin_org, academic_year, semester)
     )
 
-    if academic_year and academic_year != 'Academic Year ▼':
-        query = query.filter(models.PaymentItem.academic_year == academic_year)
+async def build_fund_distribution(db: AsyncSession, admin_org: models.Organization, academic_year: Optional[str], semester: Optional[str]) -> Dict[str, Any]:
 
-    if semester and semester != 'Semester ▼':
-        query = query.filter(models.PaymentItem.semester == semester)
+    # Successful payments per academic year and semester, read from the financial rollups
+    fund_allocation = [
+        (ay or None, sem or None, total_amount)
+        for ay, sem, total_amount in (await db.execute(finance.payments_by_period_query(
+            admin_org.id,
+            academic_year=academic_year if academic_year and academic_year != 'Academic Year ▼' else None,
+            semester=semester if semester and semester != 'Semester ▼' else None,
+        ))).all()
+    ]
 
     distribution_data = {}
 
     # Logic to handle grouping and labeling based on selected filters
     if academic_year and academic_year != 'Academic Year ▼' and semester and semester != 'Semester ▼':
         # If both are specific, group by academic_year and semester (will likely result in one slice)
-        fund_allocation = query.group_by(models.PaymentItem.academic_year, models.PaymentItem.semester).all()
         for ay, sem, total_amount in fund_allocation:
             label = f"{ay} - {sem}"
             distribution_data[label] = distribution_data.get(label, 0.0) + float(total_amount)
     elif academic_year and academic_year != 'Academic Year ▼':
         # If only academic_year is specific, group by semester within that AY
-        fund_allocation = query.group_by(models.PaymentItem.academic_year, models.PaymentItem.semester).all()
         for ay, sem, total_amount in fund_allocation:
             if ay == academic_year:
                 label = ""
@@ -2620,15 +2596,13 @@ async def get_fund_distribution(
                 distribution_data[label] = distribution_data.get(label, 0.0) + float(total_amount)
     elif semester and semester != 'Semester ▼':
         # If only semester is specific, group by academic_year for that semester
-        fund_allocation = query.group_by(models.PaymentItem.academic_year, models.PaymentItem.semester).all()
         for ay, sem, total_amount in fund_allocation:
             if sem == semester:
                 label = f"{ay if ay else 'Unspecified Academic Year'}"
                 distribution_data[label] = distribution_data.get(label, 0.0) + float(total_amount)
     else:
         # If neither is specific, group by academic_year for a general overview
-        fund_allocation = query.group_by(models.PaymentItem.academic_year).all()
-        for ay, _, total_amount in fund_allocation: #semester is also in query, but not used in group_by
+        for ay, _, total_amount in fund_allocation:
             label = f"{ay if ay else 'General Funds'}"
             distribution_data[label] = distribution_data.get(label, 0.0) + float(total_amount)
 
@@ -2638,11 +2612,11 @@ async def get_fund_distribution(
 @router.get("/admin/outstanding_dues/")
 async def admin_outstanding_dues(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     academic_year: Optional[str] = None,
     semester: Optional[str] = None, # <--- ADD THIS PARAMETER
 ) -> List[Dict[str, Any]]:
-    admin, admin_org = get_current_admin_with_org(request, db)
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
 
     today = date.today()
 
@@ -2668,20 +2642,16 @@ async def admin_outstanding_dues(
     total_outstanding_amount = 0.0
     # Only proceed if a valid semester (not Summer Break) is determined
     if resolved_semester_name in ["1st", "2nd"]: # <--- Use resolved_semester_name here
-        relevant_payment_items = db.query(models.PaymentItem).join(models.User).filter(
+        total_outstanding_amount = (await db.execute(select(func.sum(models.PaymentItem.fee)).where(
             and_(
                 func.lower(models.PaymentItem.academic_year) == resolved_academic_year.lower(),
                 models.PaymentItem.semester == resolved_semester_name, # <--- Use resolved_semester_name here
-                models.User.organization_id == admin_org.id,
+                models.PaymentItem.organization_id == admin_org.id,
+                models.PaymentItem.is_paid == False,
                 models.PaymentItem.is_not_responsible == False,
                 models.PaymentItem.student_shirt_order_id == None 
             )
-        ).all()
-
-        total_outstanding_amount = sum(
-            item.fee for item in relevant_payment_items
-            if not item.is_paid
-        )
+        ))).scalar() or 0.0
 
     return [{
         "total_outstanding_amount": total_outstanding_amount,
@@ -2690,34 +2660,70 @@ async def admin_outstanding_dues(
     }]
 
 # Total Members Page (Admin)
+# The page renders the first window of members; total_members.js fetches the rest from
+# /admin/payments/total_members/data as the table is scrolled and keeps only the visible rows in the DOM.
 @router.get("/admin/payments/total_members", response_class=HTMLResponse, name="payments_total_members")
 async def payments_total_members(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     section: Optional[str] = None,
     year_level: Optional[str] = None,
     student_number: Optional[str] = None
 ):
     admin, admin_org = get_current_admin_with_org(request, db)
 
-    query = db.query(models.User).filter(models.User.organization_id == admin_org.id)
-    if section: query = query.filter(models.User.section == section)
-    if year_level: query = query.filter(models.User.year_level == year_level)
-    if student_number: query = query.filter(models.User.student_number == student_number)
-    users = query.all()
+    filters = crud.organization_member_filters(admin_org.id, section, year_level, student_number)
+    fields = crud.DEFAULT_MEMBER_LIST_FIELDS
+    rows = db.execute(crud.organization_members_query(filters, fields)).all()
+    members, next_cursor = crud.format_member_page(rows, fields, crud.MEMBER_LIST_PAGE_SIZE)
+    total_count = db.execute(crud.organization_members_count_query(filters)).scalar() if next_cursor else len(members)
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
-        "members": users,
+        "members": members,
+        "next_cursor": next_cursor,
+        "total_count": total_count,
         "section": section,
         "year_level": year_level,
         "student_number": student_number,
     })
     return templates.TemplateResponse("admin_dashboard/payments/total_members.html", context)
 
+@router.get("/admin/payments/total_members/data", response_class=JSONResponse)
+async def payments_total_members_data(
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    section: Optional[str] = None,
+    year_level: Optional[str] = None,
+    student_number: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=f"Comma-separated columns to return, from: {', '.join(crud.MEMBER_LIST_FIELDS)}"),
+    limit: int = Query(crud.MEMBER_LIST_PAGE_SIZE, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+) -> JSONResponse:
+    """A page of the organization's members; the first page also carries the total count."""
+    admin, admin_org = await get_current_admin_with_org_async(request, db)
+    selected_fields = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip())) if fields else crud.DEFAULT_MEMBER_LIST_FIELDS
+    after_id = None
+    if cursor:
+        try:
+            after_id = crud.decode_member_list_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid members cursor.")
+    filters = crud.organization_member_filters(admin_org.id, section, year_level, student_number)
+    try:
+        query = crud.organization_members_query(filters, selected_fields, after_id=after_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    rows = (await db.execute(query)).all()
+    members, next_cursor = crud.format_member_page(rows, selected_fields, limit)
+    content = {"members": members, "next_cursor": next_cursor}
+    if cursor is None:
+        content["total_count"] = (await db.execute(crud.organization_members_count_query(filters))).scalar()
+    return JSONResponse(content=content)
+
 # Admin Bulletin Board Page 
 @router.get('/admin/bulletin_board', response_class=HTMLResponse)
-async def admin_bulletin_board(request: Request, db: Session = Depends(get_db)):
+def admin_bulletin_board(request: Request, db: Session = Depends(get_db)):
     admin, admin_org = get_current_admin_with_org(request, db)
 
     posts = db.query(models.BulletinBoard).options(
@@ -2730,7 +2736,7 @@ async def admin_bulletin_board(request: Request, db: Session = Depends(get_db)):
         models.RuleWikiEntry.organization_id == admin_org.id
     ).order_by(models.RuleWikiEntry.updated_at.desc()).all()
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "posts": posts,
         "wiki_posts": wiki_posts 
@@ -2739,7 +2745,7 @@ async def admin_bulletin_board(request: Request, db: Session = Depends(get_db)):
 
 # --- Rules & Wiki specific: New Route for creating Rule/Wiki entries ---
 @router.post('/admin/rules_wiki', response_class=RedirectResponse, name='admin_post_rule_wiki')
-async def admin_post_rule_wiki(
+def admin_post_rule_wiki(
     request: Request,
     title: str = Form(...),
     category: str = Form(...),
@@ -2751,7 +2757,7 @@ async def admin_post_rule_wiki(
 
     image_path = None
     if image and image.filename: 
-        image_path = await handle_file_upload(
+        image_path = handle_file_upload(
             image,
             WIKI_IMAGES_SUBDIRECTORY, 
             ["image/jpeg", "image/png", "image/gif", "image/svg+xml"],
@@ -2772,7 +2778,7 @@ async def admin_post_rule_wiki(
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' created Rule/Wiki entry: '{db_rule_wiki.title}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -2788,7 +2794,7 @@ async def admin_post_rule_wiki(
 
 # --- Rules & Wiki specific: Route for displaying edit form ---
 @router.get('/admin/rules_wiki/edit/{post_id}', name='admin_edit_rule_wiki')
-async def admin_edit_rule_wiki(
+def admin_edit_rule_wiki(
     request: Request,
     post_id: int,
     db: Session = Depends(get_db)
@@ -2807,9 +2813,13 @@ async def admin_edit_rule_wiki(
     return RedirectResponse(url=redirect_url, status_code=302)
 
 @router.post('/admin/rules_wiki/update/{post_id}', name='admin_update_rule_wiki')
-async def admin_update_rule_wiki(
+def admin_update_rule_wiki(
     request: Request,
     post_id: int,
+    title: Optional[str] = Form(None),
+    category: Optional[str] = Form(None),
+    content: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
     db: Session = Depends(get_db)
 ):
     admin, admin_org = get_current_admin_with_org(request, db)
@@ -2822,12 +2832,10 @@ async def admin_update_rule_wiki(
     if not rule_wiki_entry:
         raise HTTPException(status_code=404, detail="Rule/Wiki entry not found.")
 
-    form = await request.form()
-    rule_wiki_entry.title = form.get('title')
-    rule_wiki_entry.category = form.get('category')
-    rule_wiki_entry.content = form.get('content')
-    uploaded_image = form.get('image')
-    if uploaded_image and uploaded_image.filename:
+    rule_wiki_entry.title = title
+    rule_wiki_entry.category = category
+    rule_wiki_entry.content = content
+    if image and image.filename:
         pass 
 
     db.add(rule_wiki_entry)
@@ -2839,7 +2847,7 @@ async def admin_update_rule_wiki(
 
 # --- Rules & Wiki specific: Route for updating Rule/Wiki entries ---
 @router.post('/admin/rules_wiki/edit/{post_id}', response_class=RedirectResponse, name='admin_update_rule_wiki')
-async def admin_update_rule_wiki(
+def admin_update_rule_wiki(
     request: Request,
     post_id: int,
     title: str = Form(...),
@@ -2863,7 +2871,7 @@ async def admin_update_rule_wiki(
     old_content_snippet = rule_wiki_entry.content[:50]
 
     if image and image.filename:
-        new_image_path = await handle_file_upload(
+        new_image_path = handle_file_upload(
             image,
             WIKI_IMAGES_SUBDIRECTORY, 
             ["image/jpeg", "image/png", "image/gif", "image/svg+xml"],
@@ -2888,7 +2896,7 @@ async def admin_update_rule_wiki(
         f"Category changed from '{old_category}' to '{category}'. "
         f"Content updated (snippet: '{old_content_snippet}...' to '{content[:50]}...')."
     )
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -2904,7 +2912,7 @@ async def admin_update_rule_wiki(
 
 # --- Rules & Wiki specific: Route for deleting Rule/Wiki entries ---
 @router.post('/admin/rules_wiki/delete/{post_id}', response_class=RedirectResponse, name='admin_delete_rule_wiki')
-async def admin_delete_rule_wiki(
+def admin_delete_rule_wiki(
     request: Request,
     post_id: int,
     db: Session = Depends(get_db)
@@ -2929,7 +2937,7 @@ async def admin_delete_rule_wiki(
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' deleted Rule/Wiki entry: '{title_deleted}' (ID: {post_id})."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=admin_org.id,
@@ -2945,7 +2953,7 @@ async def admin_delete_rule_wiki(
 
 
 @app.get("/api/events/{event_id}/participants", response_model=List[schemas.ParticipantResponse])
-async def get_event_participants_api(event_id: int, db: Session = Depends(get_db)):
+async def get_event_participants_api(event_id: int, db: Session = Depends(get_read_db)):
     """
     Fetches the list of participants for a given event ID.
     Returns a list of dictionaries, each with a 'name' key.
@@ -2961,26 +2969,26 @@ async def get_event_participants_api(event_id: int, db: Session = Depends(get_db
 
 # Admin Events Page 
 @router.get('/admin/events', response_class=HTMLResponse)
-async def admin_events(request: Request, db: Session = Depends(get_db)):
+def admin_events(request: Request, db: Session = Depends(get_db)):
     admin, admin_org = get_current_admin_with_org(request, db)
     events = db.query(models.Event).options(joinedload(models.Event.participants)).join(models.Admin).join(models.Admin.organizations).filter(
         models.Organization.id == admin_org.id
     ).order_by(models.Event.created_at.desc()).all()
     
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"events": events})
     return templates.TemplateResponse("admin_dashboard/admin_events.html", context)
 
 # Admin Financial Statement Page
 @router.get("/admin/financial_statement", response_class=HTMLResponse, name="admin_financial_statement")
-async def admin_financial_statement_page(request: Request, db: Session = Depends(get_db)):
+async def admin_financial_statement_page(request: Request, db: Session = Depends(get_read_db)):
     admin, _ = get_current_admin_with_org(request, db) 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     return templates.TemplateResponse("admin_dashboard/admin_financial_statement.html", context)
 
 # Get Expenses
 @router.get("/expenses/", response_model=List[schemas.Expense], status_code=status.HTTP_200_OK)
-async def get_expenses(request: Request, db: Session = Depends(get_db)):
+async def get_expenses(request: Request, db: Session = Depends(get_read_db)):
     admin, organization = get_current_admin_with_org(request, db)
     expenses = db.query(models.Expense).filter(models.Expense.organization_id == organization.id).order_by(models.Expense.incurred_at.desc()).all()
     for expense in expenses:
@@ -2990,11 +2998,11 @@ async def get_expenses(request: Request, db: Session = Depends(get_db)):
 
 # Create Expense
 @router.post("/expenses/", response_model=schemas.Expense, status_code=status.HTTP_201_CREATED)
-async def create_expense(request: Request, expense: schemas.ExpenseCreate, db: Session = Depends(get_db)):
+def create_expense(request: Request, expense: schemas.ExpenseCreate, db: Session = Depends(get_db)):
     admin, organization = get_current_admin_with_org(request, db)
     
-    total_revenue = db.query(func.sum(models.PaymentItem.fee)).join(models.User).filter(
-        models.User.organization_id == organization.id, models.PaymentItem.is_paid.is_(True)
+    total_revenue = db.query(func.sum(models.PaymentItem.fee)).filter(
+        models.PaymentItem.organization_id == organization.id, models.PaymentItem.is_paid.is_(True)
     ).scalar() or 0.0
     total_expenses = db.query(func.sum(models.Expense.amount)).filter(
         models.Expense.organization_id == organization.id
@@ -3020,7 +3028,7 @@ async def create_expense(request: Request, expense: schemas.ExpenseCreate, db: S
 
     # Log the action
     description = f"Admin '{admin.first_name} {admin.last_name}' created expense: '{db_expense.description}' for {db_expense.amount:.2f} in category '{db_expense.category or 'Uncategorized'}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=organization.id,
@@ -3034,264 +3042,25 @@ async def create_expense(request: Request, expense: schemas.ExpenseCreate, db: S
     return db_expense
 
 @router.get("/api/admin/financial_data", response_class=JSONResponse, name="admin_financial_data_api")
-async def admin_financial_data_api(request: Request, db: Session = Depends(get_db)):
-    admin, organization = get_current_admin_with_org(request, db)
-    
-    current_year = datetime.now().year # This will be the current calendar year (e.g., 2025)
+async def admin_financial_data_api(request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    admin, organization = await get_current_admin_with_org_async(request, db)
     today = datetime.now().date()
 
-    # Determine the current academic year (e.g., if it's June 2025, current AY is 2024-2025)
-    # This logic assumes academic year starts in August (month 8)
-    academic_year_start_month = 8 # August
-    current_academic_year_start = current_year
-    if today.month < academic_year_start_month: # If before August, it's the previous academic year
-        current_academic_year_start -= 1
-    current_academic_year_str = f"{current_academic_year_start}-{current_academic_year_start + 1}"
-    
-    # Calculate Turnover Funds (Accumulated collected membership fees from previous academic years)
-    # This query will sum all paid membership fees *before* the current academic year
-    # We'll assume 'academic_year' in PaymentItem is stored as 'YYYY-YYYY' (e.g., '2023-2024')
-    turnover_funds = db.query(func.sum(models.PaymentItem.fee)).join(models.User).filter(
-        models.PaymentItem.is_paid == True,
-        models.User.organization_id == organization.id,
-        models.PaymentItem.student_shirt_order_id.is_(None), # Exclude shirt orders
-        models.PaymentItem.academic_year < current_academic_year_str # Academic years strictly less than current AY
-    ).scalar() or 0.0
-
-    # Calculate Current Academic Year Revenue (Membership fees collected for the current academic year)
-    current_ay_membership_revenue = db.query(func.sum(models.PaymentItem.fee)).join(models.User).filter(
-        models.PaymentItem.is_paid == True,
-        models.User.organization_id == organization.id,
-        models.PaymentItem.student_shirt_order_id.is_(None), # Exclude shirt orders
-        models.PaymentItem.academic_year == current_academic_year_str # Only for the current academic year
-    ).scalar() or 0.0
-
-    # Calculate Upcoming Year Funds (Collected) (Advanced payments for next academic year's fees and beyond)
-    # This now includes ALL academic years greater than or equal to the immediate next one
-    next_academic_year_start = current_academic_year_start + 1
-    next_academic_year_str = f"{next_academic_year_start}-{next_academic_year_start + 1}"
-    
-    upcoming_funds_collected = db.query(func.sum(models.PaymentItem.fee)).join(models.User).filter(
-        models.PaymentItem.is_paid == True,
-        models.User.organization_id == organization.id,
-        models.PaymentItem.student_shirt_order_id.is_(None), # Exclude shirt orders
-        models.PaymentItem.academic_year >= next_academic_year_str # IMPORTANT CHANGE: >= to include all future AYs
-    ).scalar() or 0.0
-
-    # Total expenses for the current calendar year (This seems to be the current definition)
-    total_expenses_ytd = db.query(func.sum(models.Expense.amount)).filter(
-        extract('year', models.Expense.incurred_at) == current_year, # Assuming calendar year for expenses
-        models.Expense.organization_id == organization.id
-    ).scalar() or 0.0
-
-    # Net Income YTD (Current AY Membership Fees - Current AY Expenses)
-    net_income_ytd = current_ay_membership_revenue - total_expenses_ytd
-    
-    # Total Current Balance = Turnover Funds + Net Income (Current AY) + Upcoming Year Funds
-    total_current_balance = turnover_funds + net_income_ytd + upcoming_funds_collected
-
-    profit_margin_ytd = round((net_income_ytd / current_ay_membership_revenue) * 100, 2) if current_ay_membership_revenue != 0 else 0.0
-    
-    # Top Revenue Source - Adjusted to prioritize membership fees from current AY or upcoming AY if higher
-    # Otherwise, consider previous AYs if they represent the highest single source
-    top_revenue_source_query = db.query(
-        models.PaymentItem.academic_year, 
-        models.PaymentItem.semester, 
-        func.sum(models.PaymentItem.fee).label('total_fee')
-    ).join(models.User).filter(
-        models.PaymentItem.is_paid == True, 
-        models.User.organization_id == organization.id,
-        models.PaymentItem.student_shirt_order_id.is_(None) 
-    ).group_by(models.PaymentItem.academic_year, models.PaymentItem.semester).order_by(func.sum(models.PaymentItem.fee).desc()).first()
-
-    top_revenue_source = {"name": "N/A", "amount": 0.0}
-    if top_revenue_source_query:
-        source_name = f"AY {top_revenue_source_query.academic_year} - {top_revenue_source_query.semester} Fees" if top_revenue_source_query.academic_year and top_revenue_source_query.semester else "Miscellaneous Membership Fees"
-        top_revenue_source = {"name": source_name, "amount": round(float(top_revenue_source_query.total_fee), 2)}
-
-    # Largest expense remains the same (based on calendar year)
-    largest_expense_query = db.query(models.Expense.category, func.sum(models.Expense.amount).label('total_amount')).filter(
-        extract('year', models.Expense.incurred_at) == current_year, models.Expense.organization_id == organization.id
-    ).group_by(models.Expense.category).order_by(func.sum(models.Expense.amount).desc()).first()
-    largest_expense_category = "N/A"
-    largest_expense_amount = 0.0
-    if largest_expense_query:
-        largest_expense_category = largest_expense_query.category if largest_expense_query.category else "Uncategorized"
-        largest_expense_amount = round(float(largest_expense_query.total_amount), 2)
-
-    # Revenues Breakdown - structured by academic year, including upcoming funds
-    revenues_breakdown_dict = {}
-
-    all_membership_revenues = db.query(
-        models.PaymentItem.academic_year, 
-        models.PaymentItem.semester, 
-        func.sum(models.PaymentItem.fee).label('total_fee')
-    ).join(models.User).filter(
-        models.PaymentItem.is_paid == True, 
-        models.User.organization_id == organization.id,
-        models.PaymentItem.student_shirt_order_id.is_(None) 
-    ).group_by(models.PaymentItem.academic_year, models.PaymentItem.semester).order_by(models.PaymentItem.academic_year, models.PaymentItem.semester).all()
-
-    # Helper to calculate percentage based on total collected (turnover + current AY + all upcoming)
-    total_all_collected_membership_fees = turnover_funds + current_ay_membership_revenue + upcoming_funds_collected
-    
-    for item in all_membership_revenues:
-        year_str = item.academic_year
-        if year_str not in revenues_breakdown_dict:
-            revenues_breakdown_dict[year_str] = {
-                "year": year_str,
-                "total": 0.0,
-                "percentage": 0.0,
-                "semesters": []
-            }
-        
-        semester_source_name = f"{item.semester} Fees" if item.semester else "Miscellaneous Fees"
-        item_percentage = round((float(item.total_fee) / total_all_collected_membership_fees) * 100, 2) if total_all_collected_membership_fees != 0 else 0.0
-        
-        revenues_breakdown_dict[year_str]["semesters"].append({
-            "source": semester_source_name, 
-            "amount": round(float(item.total_fee), 2), 
-            "percentage": item_percentage
-        })
-        revenues_breakdown_dict[year_str]["total"] += round(float(item.total_fee), 2)
-    
-    revenues_breakdown = list(revenues_breakdown_dict.values())
-    # Recalculate year percentages after all semesters are added for that year
-    for year_data in revenues_breakdown:
-        year_data["percentage"] = round((year_data["total"] / total_all_collected_membership_fees) * 100, 2) if total_all_collected_membership_fees != 0 else 0.0
-
-    # Ensure all percentages sum to 100% or adjust if needed
-    if revenues_breakdown and total_all_collected_membership_fees > 0:
-        current_total_percentage = sum(item["percentage"] for item in revenues_breakdown)
-        if abs(current_total_percentage - 100) > 0.01: # Allow for minor floating point discrepancies
-            adjustment_factor = 100 / current_total_percentage
-            for item in revenues_breakdown:
-                item["percentage"] = round(item["percentage"] * adjustment_factor, 2)
-
-
-    # Expenses breakdown (based on calendar year)
-    expenses_breakdown_query = db.query(models.Expense.category, func.sum(models.Expense.amount).label('total_amount')).filter(
-        extract('year', models.Expense.incurred_at) == current_year, models.Expense.organization_id == organization.id
-    ).group_by(models.Expense.category).all()
-    expenses_breakdown = []
-    for item in expenses_breakdown_query:
-        percentage = round((float(item.total_amount) / total_expenses_ytd) * 100, 2) if total_expenses_ytd != 0 else 0.0
-        expenses_breakdown.append({"category": item.category if item.category else "Uncategorized", "amount": round(float(item.total_amount), 2), "trend": "Stable", "percentage": percentage})
-    if expenses_breakdown and sum(item['percentage'] for item in expenses_breakdown) != 100 and sum(item['percentage'] for item in expenses_breakdown) != 0:
-        adjustment_factor = 100 / sum(item['percentage'] for item in expenses_breakdown)
-        for item in expenses_breakdown: item['percentage'] = round(item['percentage'] * adjustment_factor, 2)
-
-    # Monthly summary should reflect monthly collected fees (membership+upcoming) vs monthly expenses
-    monthly_summary = []
-    chart_net_income_trend_data = []
-    chart_net_income_trend_labels = []
-    
-    # Iterate through months of the current calendar year
-    for i in range(1, 13):
-        dummy_date = date(current_year, i, 1)
-        month_name_full = dummy_date.strftime('%B')
-        month_name_abbr = dummy_date.strftime('%b')
-        chart_net_income_trend_labels.append(month_name_abbr)
-
-        # Monthly collected fees (includes current AY and any upcoming AY fees collected in this month)
-        monthly_collected_fees = db.query(func.sum(models.PaymentItem.fee)).join(models.User).filter(
-            extract('year', models.PaymentItem.updated_at) == current_year, 
-            extract('month', models.PaymentItem.updated_at) == i,
-            models.PaymentItem.is_paid == True, 
-            models.User.organization_id == organization.id,
-            models.PaymentItem.student_shirt_order_id.is_(None) # Exclude shirt orders
-        ).scalar() or 0.0
-
-        monthly_expenses = db.query(func.sum(models.Expense.amount)).filter(
-            extract('year', models.Expense.incurred_at) == current_year, extract('month', models.Expense.incurred_at) == i,
-            models.Expense.organization_id == organization.id
-        ).scalar() or 0.0
-
-        monthly_net_income = monthly_collected_fees - monthly_expenses
-        monthly_summary.append({
-            "month": month_name_full, "revenue": monthly_collected_fees, "expenses": monthly_expenses,
-            "net_income": monthly_net_income, "net_income_class": "positive" if monthly_net_income >= 0 else "negative"
-        })
-        # The chart_net_income_trend_data will now reflect the monthly net income based on all collected fees vs expenses for that month
-        chart_net_income_trend_data.append(round(monthly_net_income, 2))
-
-
-    # Num paid/unpaid members based on *current academic year* membership fees
-    num_paid_members = db.query(func.count(models.User.id.distinct())).join(models.PaymentItem).filter(
-        models.PaymentItem.academic_year == current_academic_year_str,
-        models.PaymentItem.is_paid == True, 
-        models.User.organization_id == organization.id,
-        models.PaymentItem.student_shirt_order_id.is_(None) # Count only members who paid current AY membership fees
-    ).scalar() or 0
-    total_members = db.query(func.count(models.User.id)).filter(models.User.is_active == True, models.User.organization_id == organization.id).scalar() or 0
-    num_unpaid_members = max(0, total_members - num_paid_members)
-
-
-    financial_data = {
-        "organization_id": organization.id, 
-        "organization_name": organization.name, 
-        "year": str(current_year), # Still calendar year for general summary
-        "total_current_balance": total_current_balance, # New definition
-        "total_revenue_ytd": turnover_funds, # Now 'Turnover Funds' (previous AYs only)
-        "upcoming_funds_ytd": upcoming_funds_collected, # Now 'Upcoming Year Funds' (all future AYs)
-        "total_expenses_ytd": total_expenses_ytd, # Still current calendar year expenses
-        "net_income_ytd": net_income_ytd, # New definition: Current AY membership revenue - Current AY expenses
-        "balance_turnover": round(total_current_balance / turnover_funds, 2) if turnover_funds != 0 else 0.0, # Adjusted ratio
-        "total_funds_available": total_current_balance, # This is the same as total_current_balance
-        "reporting_date": today.strftime("%B %d, %Y"),
-        "top_revenue_source_name": top_revenue_source["name"], 
-        "top_revenue_source_amount": top_revenue_source['amount'],
-        "largest_expense_category": largest_expense_category, 
-        "largest_expense_amount": largest_expense_amount,
-        "profit_margin_ytd": profit_margin_ytd, 
-        "revenues_breakdown": revenues_breakdown, # Structured by academic year
-        "expenses_breakdown": expenses_breakdown, 
-        "monthly_summary": monthly_summary, # Monthly data for current calendar year
-        "accounts_balances": [], 
-        "chart_revenue_data": [current_ay_membership_revenue, total_expenses_ytd], # Reflects current AY revenue vs expenses
-        "chart_net_income_data": chart_net_income_trend_data, # Trend for monthly net income (calendar year)
-        "chart_net_income_labels": chart_net_income_trend_labels,
-        "num_paid_members": num_paid_members, 
-        "num_unpaid_members": num_unpaid_members, 
-        "total_members": total_members
-    }    
-
-    if total_current_balance >= 0:
-        financial_data["accounts_balances"] = [            
-            {"account": "Savings Account", "balance": round(total_current_balance * 0.2, 2), "last_transaction": (today - timedelta(days=15)).strftime("%Y-%m-%d"), "status": "Active"},
-            
-        ]
-
-        event_expenses_percentage = 0.10          # 10% - Increased for more realistic event needs
-        operations_maintenance_percentage = 0.08   # 8% - Solid for ongoing operations and supplies
-        food_refreshments_percentage = 0.05      # 5% - Dedicated for meeting/guest meals
-        transportation_logistics_percentage = 0.03 # 3% - For travel and logistics
-
-        # Dedicated Emergency Contingency
-        contingency_fund_percentage = 0.15  
-
-        financial_data["accounts_balances"].extend([
-            {"account": "Event Expenses (Decoration, Tokens)", "balance": round(total_current_balance * event_expenses_percentage, 2), "last_transaction": today.strftime("%Y-%m-%d"), "status": "Budgeted"},
-            {"account": "Operations & Maintenance (Supplies)", "balance": round(total_current_balance * operations_maintenance_percentage, 2), "last_transaction": today.strftime("%Y-%m-%d"), "status": "Budgeted"},
-            {"account": "Food & Refreshments (Meeting/Event Meals)", "balance": round(total_current_balance * food_refreshments_percentage, 2), "last_transaction": today.strftime("%Y-%m-%d"), "status": "Budgeted"},
-            {"account": "Transportation & Logistics (Fare/Allowance)", "balance": round(total_current_balance * transportation_logistics_percentage, 2), "last_transaction": today.strftime("%Y-%m-%d"), "status": "Budgeted"},
-            {"account": "Contingency Fund (Emergency Use)", "balance": round(total_current_balance * contingency_fund_percentage, 2), "last_transaction": today.strftime("%Y-%m-%d"), "status": "Budgeted"}
-        ])
-
-        current_sum = sum(acc['balance'] for acc in financial_data["accounts_balances"])
-        if abs(current_sum - total_current_balance) > 0.01:
-            # Distribute the remainder to the last account for accuracy
-            financial_data["accounts_balances"][-1]['balance'] += (total_current_balance - current_sum)
-            financial_data["accounts_balances"][-1]['balance'] = round(financial_data["accounts_balances"][-1]['balance'], 2)
-    else:
-        financial_data["accounts_balances"] = [{"account": "Main Operating Account", "balance": total_current_balance, "last_transaction": today.strftime("%Y-%m-%d"), "status": "Critical"}]
+    async def build_financial_data() -> Dict[str, Any]:
+        # All revenue and expense buckets come from the financial rollups; every figure is derived from them
+        buckets = await finance.load_financial_buckets(db, organization.id)
+        current_academic_year_start = finance.get_current_academic_year_start(today)
+        num_paid_members, total_members = await finance.load_member_counts(
+            db, organization.id, f"{current_academic_year_start}-{current_academic_year_start + 1}"
+        )
+        return finance.build_financial_summary(organization, buckets, num_paid_members, total_members, today)
 
-    return JSONResponse(content=financial_data)
+    return await cache.cached_json_response(request, db, "admin_financial_data_api", organization.id, (today,), build_financial_data)
 
 
 # Create Organization
 @router.post("/admin/organizations/", response_model=schemas.Organization, status_code=status.HTTP_201_CREATED)
-async def create_organization_route(
+def create_organization_route(
     request: Request,
     organization_data: schemas.OrganizationCreate,
     db: Session = Depends(get_db)
@@ -3319,7 +3088,7 @@ async def create_organization_route(
     # Log the action
     admin_id_for_log = request.session.get("admin_id") or 0 
     description = f"Organization '{new_org.name}' created with primary course code '{new_org.primary_course_code}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin_id_for_log, 
         organization_id=new_org.id,
@@ -3334,7 +3103,7 @@ async def create_organization_route(
     
 # Create Admin User
 @router.post("/admin/admins/", response_model=schemas.Admin, status_code=status.HTTP_201_CREATED)
-async def create_admin_user_route(
+def create_admin_user_route(
     request: Request,
     admin_data: schemas.AdminCreate,
     db: Session = Depends(get_db)
@@ -3360,7 +3129,7 @@ async def create_admin_user_route(
     admin_org_id = admin_data.organization_id 
 
     description = f"Admin '{admin_performing_action or 'System'}' created new admin user: '{new_admin.first_name} {new_admin.last_name}' with email '{new_admin.email}' and role '{new_admin.role}'."
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin_performing_action or 0, 
         organization_id=admin_org_id,
@@ -3375,7 +3144,7 @@ async def create_admin_user_route(
 
 # Update Organization Theme Color
 @router.put("/admin/organizations/{org_id}/theme", response_model=Dict[str, str])
-async def update_organization_theme_color_route(
+def update_organization_theme_color_route(
     request: Request,
     org_id: int,
     theme_update: schemas.OrganizationThemeUpdate,
@@ -3400,7 +3169,7 @@ async def update_organization_theme_color_route(
         f"Admin '{admin.first_name} {admin.last_name}' updated organization '{organization.name}' (ID: {org_id}) "
         f"theme color from '{old_theme_color}' to '{organization.theme_color}' and regenerated palette."
     )
-    await crud.create_admin_log(
+    crud.create_admin_log(
         db=db,
         admin_id=admin.admin_id,
         organization_id=organization.id,
@@ -3415,7 +3184,7 @@ async def update_organization_theme_color_route(
 
 # Update Organization Logo
 @router.put("/admin/organizations/{org_id}/logo", response_model=Dict[str, str])
-async def update_organization_logo_route(
+def update_organization_logo_route(
     request: Request,
     org_id: int,
     logo_file: UploadFile = File(...),
@@ -3456,7 +3225,7 @@ async def update_organization_logo_route(
             f"Admin '{admin.first_name} {admin.last_name}' updated organization '{organization.name}' (ID: {org_id}) "
             f"logo from '{old_logo_url or 'None'}' to '{logo_url}'."
         )
-        await crud.create_admin_log(
+        crud.create_admin_log(
             db=db,
             admin_id=admin.admin_id,
             organization_id=organization.id,
@@ -3475,7 +3244,7 @@ async def update_organization_logo_route(
 
 # Create PayMaya Payment Request
 @router.post("/payments/paymaya/create", response_class=JSONResponse, name="paymaya_create_payment")
-async def paymaya_create_payment(
+def paymaya_create_payment(
     request: Request,
     payment_item_id: int = Form(...),
     db: Session = Depends(get_db),
@@ -3574,7 +3343,7 @@ async def paymaya_create_payment(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"PayMaya API error: {e.response.text if hasattr(e.response, 'text') else str(e)}")
 
 @router.post("/payments/paymaya/create", response_class=JSONResponse, name="paymaya_create_payment")
-async def paymaya_create_payment(
+def paymaya_create_payment(
     request: Request,
     payment_item_id: int = Form(...),
     db: Session = Depends(get_db),
@@ -3673,7 +3442,7 @@ async def paymaya_create_payment(
 
 # Success Callback
 @router.get("/Success", response_class=HTMLResponse, name="payment_success")
-async def payment_success(
+def payment_success(
     request: Request,
     paymentId: int = Query(...),
     paymentItemId: int = Query(...),
@@ -3696,7 +3465,7 @@ async def payment_success(
         if payment_item:
             logging.info(f"Associated Payment Item {payment_item.id} already processed or found.")
         
-        context = await get_base_template_context(request, db)
+        context = get_base_template_context(request, db)
         context.update({
             "payment_id": payment.paymaya_payment_id if payment.paymaya_payment_id else payment.id, 
             "payment_item_id": paymentItemId, 
@@ -3749,16 +3518,18 @@ async def payment_success(
                         if updated_shirt_order.campaign and updated_shirt_order.campaign.organization_id:
                             organization = db.query(models.Organization).filter(models.Organization.id == updated_shirt_order.campaign.organization_id).first()
                             if organization:
-                                for admin in organization.admins:
-                                    message = f"Shirt Order Payment: Student {updated_shirt_order.student_name} has paid for Shirt Order ID: {updated_shirt_order.id} (Campaign: {updated_shirt_order.campaign.title})."
-                                    crud.create_notification(db, message, 
-                                                            admin_id=admin.admin_id,
-                                                            organization_id=organization.id, 
-                                                            notification_type="shirt_order_payment",
-                                                            payment_id=payment.id, 
-                                                            url=f"/admin/shirt_management", 
-                                                            event_identifier=f"shirt_order_payment_admin_{admin.admin_id}_order_{updated_shirt_order.id}") 
-                                    logging.info(f"Notification created for admin {admin.admin_id} for shirt order payment {updated_shirt_order.id}.")
+                                jobs.enqueue(
+                                    db,
+                                    "notify_organization_admins",
+                                    organization_id=organization.id,
+                                    message=f"Shirt Order Payment: Student {updated_shirt_order.student_name} has paid for Shirt Order ID: {updated_shirt_order.id} (Campaign: {updated_shirt_order.campaign.title}).",
+                                    event_identifier_prefix="shirt_order_payment",
+                                    event_identifier_suffix=f"order_{updated_shirt_order.id}",
+                                    notification_type="shirt_order_payment",
+                                    url=f"/admin/shirt_management",
+                                    payment_id=payment.id,
+                                )
+                                logging.info(f"Admin notifications queued for shirt order payment {updated_shirt_order.id}.")
                             else:
                                 logging.warning(f"Organization not found for campaign {updated_shirt_order.campaign.id} linked to shirt order {updated_shirt_order.id}.")
                         else:
@@ -3777,13 +3548,18 @@ async def payment_success(
         user = db.query(models.User).filter(models.User.id == payment.user_id).first()
         if user and user.organization and payment_item.academic_year and payment_item.semester: 
             logging.info(f"User {user.id} and organization {user.organization.id} found for general fee payment.")
-            for admin in user.organization.admins:
-                message = f"Payment Successful: {user.first_name} {user.last_name} has successfully paid {payment.amount} for {payment_item.academic_year} {payment_item.semester} fees."
-                crud.create_notification(db, message, admin_id=admin.admin_id, organization_id=user.organization.id, notification_type="payment_success",
-                                         payment_id=payment.id, 
-                                         url=f"/admin/payments/total_members?student_number={user.student_number}",
-                                         event_identifier=f"payment_success_admin_{admin.admin_id}_payment_{payment.id}")
-                logging.info(f"Notification created for admin {admin.admin_id} for general fee payment {payment.id}.")
+            jobs.enqueue(
+                db,
+                "notify_organization_admins",
+                organization_id=user.organization.id,
+                message=f"Payment Successful: {user.first_name} {user.last_name} has successfully paid {payment.amount} for {payment_item.academic_year} {payment_item.semester} fees.",
+                event_identifier_prefix="payment_success",
+                event_identifier_suffix=f"payment_{payment.id}",
+                notification_type="payment_success",
+                url=f"/admin/payments/total_members?student_number={user.student_number}",
+                payment_id=payment.id,
+            )
+            logging.info(f"Admin notifications queued for general fee payment {payment.id}.")
         else:
             logging.warning(f"Could not find user, organization, or academic year/semester for general fee payment {payment.id}. Notification skipped.")
     
@@ -3797,7 +3573,7 @@ async def payment_success(
 
     logging.info(f"PayMaya payment success processing completed for payment_id={payment.id}, paymaya_payment_id={payment.paymaya_payment_id}. Redirecting to success page.")
     
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "payment_id": payment.paymaya_payment_id if payment.paymaya_payment_id else payment.id, 
         "payment_item_id": paymentItemId, 
@@ -3809,7 +3585,7 @@ async def payment_success(
 
 # Payment Failure Callback
 @router.get("/Failure", response_class=HTMLResponse, name="payment_failure")
-async def payment_failure(request: Request, paymentId: int = Query(...), db: Session = Depends(get_db)):
+def payment_failure(request: Request, paymentId: int = Query(...), db: Session = Depends(get_db)):
     payment = crud.get_payment_by_id(db, payment_id=paymentId)
     if not payment: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment record not found")
     db.refresh(payment) 
@@ -3819,13 +3595,13 @@ async def payment_failure(request: Request, paymentId: int = Query(...), db: Ses
 
     db.commit() 
     logging.info(f"PayMaya payment failure: payment_id={payment.id}, paymaya_payment_id={payment.paymaya_payment_id}")
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"payment_id": payment.paymaya_payment_id, "payment_item": payment_item})
     return templates.TemplateResponse("student_dashboard/payment_failure.html", context)
 
 # Payment Cancellation Callback
 @router.get("/Cancel", response_class=HTMLResponse, name="payment_cancel")
-async def payment_cancel(request: Request, paymentId: int = Query(...), db: Session = Depends(get_db)):
+def payment_cancel(request: Request, paymentId: int = Query(...), db: Session = Depends(get_db)):
     payment = crud.get_payment_by_id(db, payment_id=paymentId)
     if not payment: raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment record not found")
     db.refresh(payment) 
@@ -3835,7 +3611,7 @@ async def payment_cancel(request: Request, paymentId: int = Query(...), db: Sess
 
     db.commit() 
     logging.info(f"PayMaya payment cancelled: payment_id={payment.id}, paymaya_payment_id={payment.paymaya_payment_id}")
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"payment_id": payment.paymaya_payment_id, "payment_item": payment_item})
     return templates.TemplateResponse("student_dashboard/payment_cancel.html", context)
 
@@ -3844,7 +3620,7 @@ app.include_router(router)
 
 # User Logout
 @app.get("/logout", response_class=RedirectResponse, name="logout")
-async def logout(request: Request, db: Session = Depends(get_db)):
+def logout(request: Request, db: Session = Depends(get_db)):
     admin_id = request.session.get("admin_id")
     
     if admin_id:
@@ -3862,7 +3638,7 @@ async def logout(request: Request, db: Session = Depends(get_db)):
                 organization_id_to_log = admin_organizations.id
 
             description = f"Admin '{admin.first_name} {admin.last_name}' successfully logged out."
-            await crud.create_admin_log(
+            crud.create_admin_log(
                 db=db,
                 admin_id=admin.admin_id,
                 organization_id=organization_id_to_log, 
@@ -3885,7 +3661,7 @@ async def read_root(request: Request):
 
 # Home Dashboard (Admin/User)
 @app.get("/home", response_class=HTMLResponse, name="home")
-async def home(request: Request, db: Session = Depends(get_db)):
+async def home(request: Request, db: Session = Depends(get_read_db)):
     user_id = request.session.get("user_id")
     admin_id = request.session.get("admin_id")
     user_role = request.session.get("user_role")
@@ -3893,7 +3669,7 @@ async def home(request: Request, db: Session = Depends(get_db)):
     if not (user_id or admin_id) or not user_role:
         return templates.TemplateResponse("index.html", {"request": request, "error": "Please log in to access this page."})
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     latest_bulletin_posts = []
 
     if context["organization_id"]:
@@ -3901,39 +3677,12 @@ async def home(request: Request, db: Session = Depends(get_db)):
             models.Organization.id == context["organization_id"]
         ).order_by(models.BulletinBoard.created_at.desc()).limit(5).all()
 
+    # Past-due alerts are sent by the past-due sweep (see past_due.py)
     if user_role == "Admin":
-        admin = db.query(models.Admin).filter(models.Admin.admin_id == admin_id).first()
-        if admin and context["organization_id"]:
-            past_due_users = db.query(models.User).join(models.PaymentItem).filter(
-                models.User.organization_id == context["organization_id"],
-                models.PaymentItem.is_past_due == True,
-                models.PaymentItem.is_paid == False
-            ).distinct(models.User.id).all()
-            for past_due_user in past_due_users:
-                crud.create_notification(db, f"Past Due Payments: {past_due_user.first_name} {past_due_user.last_name} has past due payment items.",
-                                         admin_id=admin.admin_id, organization_id=context["organization_id"],
-                                         notification_type="past_due_payments", 
-                                         payment_item_id=None, 
-                                         url=f"/admin/payments/total_members?student_number={past_due_user.student_number}",
-                                         event_identifier=f"admin_past_due_user_{past_due_user.id}_admin_{admin.admin_id}")
-        db.commit() 
         context.update({"bulletin_posts": latest_bulletin_posts})
         return templates.TemplateResponse("admin_dashboard/home.html", context)
     
     elif user_role == "user":
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-        if user and context["organization_id"]:
-            user_past_due_items = db.query(models.PaymentItem).filter(
-                models.PaymentItem.user_id == user_id, models.PaymentItem.is_past_due == True, models.PaymentItem.is_paid == False
-            ).all()
-            if user_past_due_items:                
-                crud.create_notification(db, "You have past due payment items. Please check your payments page.",
-                                         user_id=user_id, organization_id=context["organization_id"],
-                                         notification_type="user_past_due", 
-                                         payment_item_id=None,
-                                         url="/Payments",
-                                         event_identifier=f"user_past_due_alert_user_{user_id}")
-        db.commit() 
         temporary_faqs = [
             {"question": "What is the schedule for student orientation?", "answer": "The student orientation will be held on August 20, 2025, from 9:00 AM to 12:00 PM in the main auditorium."},
             {"question": "How do I access the online learning platform?", "answer": "You can access the online learning platform by visiting our website and clicking on the 'Student Portal' link. Use your student ID and password to log in."},
@@ -3946,7 +3695,7 @@ async def home(request: Request, db: Session = Depends(get_db)):
 
 # Bulletin Board Page (User)
 @app.get("/BulletinBoard", response_class=HTMLResponse, name="bulletin_board")
-async def bulletin_board(request: Request, db: Session = Depends(get_db)):
+async def bulletin_board(request: Request, db: Session = Depends(get_read_db)):
     user, user_org = get_current_user_with_org(request, db)
     posts = []
     wiki_posts = []  
@@ -3966,14 +3715,14 @@ async def bulletin_board(request: Request, db: Session = Depends(get_db)):
             user_likes = db.query(models.UserLike).filter(models.UserLike.user_id == user.id).all()
             hearted_post_ids = {like.post_id for like in user_likes}
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"posts": posts, "hearted_posts": hearted_post_ids, "wiki_posts": wiki_posts})
 
     return templates.TemplateResponse("student_dashboard/bulletin_board.html", context)
 
 # Events Page (User)
 @app.get("/Events", response_class=HTMLResponse, name="events")
-async def events(request: Request, db: Session = Depends(get_db)):
+async def events(request: Request, db: Session = Depends(get_read_db)):
     user, user_org = get_current_user_with_org(request, db)
     events = []
     if user_org:
@@ -3981,13 +3730,13 @@ async def events(request: Request, db: Session = Depends(get_db)):
             models.Organization.id == user_org.id
         ).order_by(models.Event.created_at.desc()).all()
     
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"events": events})
     return templates.TemplateResponse("student_dashboard/events.html", context)
 
 # Payments Page (User)
 @app.get("/Payments", response_class=HTMLResponse, name="payments")
-async def payments(request: Request, db: Session = Depends(get_db)):
+async def payments(request: Request, db: Session = Depends(get_read_db)):
     user, _ = get_current_user_with_org(request, db)
 
     print(f"DEBUG: Current User ID: {user.id}")
@@ -4019,7 +3768,7 @@ async def payments(request: Request, db: Session = Depends(get_db)):
     ]
     print(f"DEBUG: Found {len(items_with_shirt_id_in_unpaid_upcoming)} payment items WITH student_shirt_order_id in unpaid_upcoming_items (should be 0).")
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({
         "past_due_items": past_due_items,
         "unpaid_upcoming_items": unpaid_upcoming_items,
@@ -4029,7 +3778,7 @@ async def payments(request: Request, db: Session = Depends(get_db)):
 
 # Payment History (User)
 @app.get("/Payments/History", response_class=HTMLResponse, name="payment_history")
-async def payment_history(request: Request, db: Session = Depends(get_db)):
+async def payment_history(request: Request, db: Session = Depends(get_read_db)):
     user, _ = get_current_user_with_org(request, db)
 
     payments = db.query(models.Payment).options(joinedload(models.Payment.payment_item)).filter(
@@ -4059,100 +3808,110 @@ async def payment_history(request: Request, db: Session = Depends(get_db)):
             logging.warning(f"Skipping payment ID {payment.id} due to missing PaymentItem or incomplete data.")
             continue
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"payment_history": payment_history_data, "current_user": user})
     return templates.TemplateResponse("student_dashboard/payment_history.html", context)
 
 # Financial Statement (User)
 @app.get("/FinancialStatement", response_class=HTMLResponse, name="financial_statement")
-async def financial_statement(request: Request, db: Session = Depends(get_db)):
+async def financial_statement(request: Request, db: Session = Depends(get_read_db)):
     """
     Retrieves and categorizes financial data for a user and their organization,
     excluding shirt payments from membership fee calculations.
     """
     user, user_org = get_current_user_with_org(request, db)
+    organization_id = user_org.id if user_org else None
+    today = date.today()
 
-    # Filter out payment items related to student shirt orders for membership fee calculations
-    all_user_membership_payment_items = db.query(models.PaymentItem).filter(
+    # User-level totals and per-period fees in one aggregate query (shirt orders excluded)
+    is_past_due = case((and_(models.PaymentItem.is_paid.isnot(True), models.PaymentItem.due_date < today), True), else_=False)
+    user_fee_groups = db.query(
+        models.PaymentItem.academic_year, models.PaymentItem.semester, models.PaymentItem.is_paid,
+        is_past_due, func.sum(models.PaymentItem.fee)
+    ).filter(
         models.PaymentItem.user_id == user.id,
         models.PaymentItem.student_shirt_order_id.is_(None)  # Exclude shirt orders
-    ).all()
-
-    total_paid_by_user = sum(item.fee for item in all_user_membership_payment_items if item.is_paid)
-    total_outstanding_fees_user = sum(item.fee for item in all_user_membership_payment_items if not item.is_paid)
-    total_past_due_fees_user = sum(item.fee for item in all_user_membership_payment_items if not item.is_paid and item.due_date and item.due_date < date.today())
+    ).group_by(
+        models.PaymentItem.academic_year, models.PaymentItem.semester, models.PaymentItem.is_paid, is_past_due
+    ).order_by(func.min(models.PaymentItem.id)).all()
 
+    total_paid_by_user = 0
+    total_outstanding_fees_user = 0
+    total_past_due_fees_user = 0
     collected_fees_by_category_user = defaultdict(float)
     outstanding_fees_by_category_user = defaultdict(float)
 
-    for item in all_user_membership_payment_items:
-        category_name = ""
-        # The `student_shirt_order_id` check is no longer strictly necessary here for categorizing
-        # since we've already filtered them out from `all_user_membership_payment_items`.
-        # However, keeping it makes the categorization logic robust if the filtering changes.
-        if item.student_shirt_order_id is not None:
-            # This branch won't be hit with the current filtering but is kept for logical completeness
-            category_name = "Student Shirt Order Fees"
-        elif item.academic_year and item.semester:
-            category_name = f"AY {item.academic_year} - {item.semester} Fees (Membership)"
+    for academic_year, semester, is_paid, past_due, fees in user_fee_groups:
+        if academic_year and semester:
+            category_name = f"AY {academic_year} - {semester} Fees (Membership)"
         else:
-            category_name = "Miscellaneous Fees" 
+            category_name = "Miscellaneous Fees"
 
-        if item.is_paid:
-            collected_fees_by_category_user[category_name] += item.fee
+        if is_paid:
+            total_paid_by_user += fees
+            collected_fees_by_category_user[category_name] += fees
         else:
-            outstanding_fees_by_category_user[category_name] += item.fee
-
-    organization_total_revenue = 0.0
-    # Filter organization's paid payment items to exclude shirt orders
-    all_org_paid_membership_payment_items = db.query(models.PaymentItem).join(models.User).filter(
-        models.PaymentItem.is_paid == True,
-        models.User.organization_id == (user_org.id if user_org else None),
-        models.PaymentItem.student_shirt_order_id.is_(None)  # Exclude shirt orders
+            total_outstanding_fees_user += fees
+            outstanding_fees_by_category_user[category_name] += fees
+            if past_due:
+                total_past_due_fees_user += fees
+
+    # Organization totals, expense categories and monthly flows come from the financial rollups
+    org_membership_fees_by_month = db.execute(
+        finance.membership_fees_by_month_query(organization_id, include_undated=True)
     ).all()
-    organization_total_revenue = sum(item.fee for item in all_org_paid_membership_payment_items)
+    organization_total_revenue = sum(total for _, _, total in org_membership_fees_by_month)
 
-    all_expenses_org = db.query(models.Expense).filter(models.Expense.organization_id == (user_org.id if user_org else None)).all()
-    total_expenses_org = sum(expense.amount for expense in all_expenses_org)
+    expenses_by_category_org = defaultdict(float)
+    for category, total in db.execute(finance.expenses_by_category_query(organization_id)).all():
+        expenses_by_category_org[category if category else "Uncategorized"] += total
+    total_expenses_org = sum(expenses_by_category_org.values())
     net_income_org = organization_total_revenue - total_expenses_org
 
-    expenses_by_category_org = defaultdict(float)
-    for expense in all_expenses_org:
-        expenses_by_category_org[expense.category if expense.category else "Uncategorized"] += expense.amount
+    months_full = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
+    current_year_prefix = f"{datetime.now().year}-"
+    org_inflows_by_month_current_year = defaultdict(float)
+    for month, _, total in org_membership_fees_by_month:
+        if month.startswith(current_year_prefix):
+            org_inflows_by_month_current_year[months_full[int(month[5:7]) - 1].lower()] += total
+    # The statement dates a fee by updated_at, else created_at; the rollups only know updated_at
+    for month, total in db.execute(finance.undated_membership_fees_by_month_query(organization_id)).all():
+        if month.startswith(current_year_prefix):
+            org_inflows_by_month_current_year[months_full[int(month[5:7]) - 1].lower()] += total
+
+    expenses_by_month_current_year_org = defaultdict(float)
+    for month, total in db.execute(finance.expenses_by_month_query(organization_id)).all():
+        if month.startswith(current_year_prefix):
+            expenses_by_month_current_year_org[months_full[int(month[5:7]) - 1].lower()] += total
 
+    # Itemized statement: the user's own membership payments and the organization's dated expenses
     financial_summary_items_combined = []
-    # Only include membership-related payments in the combined summary
-    for item in all_user_membership_payment_items:
-        if item.is_paid and (item.updated_at or item.created_at):
-            relevant_date = item.updated_at or item.created_at
-            summary_category_name = ""
-            if item.academic_year and item.semester:
-                summary_category_name = f"AY {item.academic_year} - {item.semester} Fees (Your Payment)"
-            else:
-                summary_category_name = "Miscellaneous Fees (Your Payment)"
-            financial_summary_items_combined.append({"date": relevant_date, "event_item": summary_category_name, "inflows": item.fee, "outflows": 0.00})
+    user_paid_items = db.query(
+        models.PaymentItem.academic_year, models.PaymentItem.semester, models.PaymentItem.fee,
+        func.coalesce(models.PaymentItem.updated_at, models.PaymentItem.created_at)
+    ).filter(
+        models.PaymentItem.user_id == user.id,
+        models.PaymentItem.student_shirt_order_id.is_(None),
+        models.PaymentItem.is_paid == True,
+        or_(models.PaymentItem.updated_at.isnot(None), models.PaymentItem.created_at.isnot(None))
+    ).order_by(models.PaymentItem.id).all()
+    for academic_year, semester, fee, relevant_date in user_paid_items:
+        if academic_year and semester:
+            summary_category_name = f"AY {academic_year} - {semester} Fees (Your Payment)"
+        else:
+            summary_category_name = "Miscellaneous Fees (Your Payment)"
+        financial_summary_items_combined.append({"date": relevant_date, "event_item": summary_category_name, "inflows": fee, "outflows": 0.00})
 
-    for expense in all_expenses_org:
-        if expense.incurred_at:
-            financial_summary_items_combined.append({"date": expense.incurred_at, "event_item": f"Org Expense - {expense.category if expense.category else 'Uncategorized'}", "inflows": 0.00, "outflows": expense.amount})
+    org_dated_expenses = db.query(models.Expense.incurred_at, models.Expense.category, models.Expense.amount).filter(
+        models.Expense.organization_id == organization_id, models.Expense.incurred_at.isnot(None)
+    ).order_by(models.Expense.id).all()
+    for incurred_at, category, amount in org_dated_expenses:
+        financial_summary_items_combined.append({"date": incurred_at, "event_item": f"Org Expense - {category if category else 'Uncategorized'}", "inflows": 0.00, "outflows": amount})
 
     financial_summary_items_combined.sort(key=lambda x: x['date'])
     for item in financial_summary_items_combined:
         item['date'] = item['date'].strftime("%Y-%m-%d")
 
-    months_full = ["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"]
-    org_inflows_by_month_current_year = defaultdict(float)
-    # Use the filtered list for organization inflows
-    for item in all_org_paid_membership_payment_items:
-        relevant_date = item.updated_at or item.created_at
-        if relevant_date and relevant_date.year == datetime.now().year:
-            org_inflows_by_month_current_year[months_full[relevant_date.month - 1].lower()] += item.fee
-
-    expenses_by_month_current_year_org = defaultdict(float)
-    for expense in all_expenses_org:
-        if expense.incurred_at and expense.incurred_at.year == datetime.now().year:
-            expenses_by_month_current_year_org[months_full[expense.incurred_at.month - 1].lower()] += expense.amount
-
     running_balance_org_level = 0.00
     monthly_data_org = {}
     for i, month_name in enumerate(months_full):
@@ -4190,17 +3949,17 @@ async def financial_statement(request: Request, db: Session = Depends(get_db)):
         "current_date": date.today().strftime("%B %d, %Y")
     }
 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"financial_data": financial_data})
     return templates.TemplateResponse("student_dashboard/financial_statement.html", context)
 
 # Detailed Monthly Report Page (User)
 @app.get("/student_dashboard/detailed_monthly_report_page", response_class=HTMLResponse)
 async def detailed_monthly_report_page(
-    request: Request, month: str = Query(...), year: int = Query(...), db: Session = Depends(get_db)
+    request: Request, month: str = Query(...), year: int = Query(...), db: Session = Depends(get_read_db)
 ):
     user, _ = get_current_user_with_org(request, db) 
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"month": month, "year": year})
     return templates.TemplateResponse("student_dashboard/detailed_monthly_report.html", context)
 
@@ -4211,9 +3970,9 @@ async def get_detailed_monthly_report_json(
     month: str = Query(..., description="Month name (e.g., 'january')"),
     year: int = Query(..., description="Year (e.g., 2025)"),
     report_type: Optional[str] = Query(None, description="Type of report: 'user' or 'organization' or 'combined'"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    user, user_org = get_current_user_with_org(request, db)
+    user, user_org = await get_current_user_with_org_async(request, db)
 
     month_number = {
         'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
@@ -4224,85 +3983,50 @@ async def get_detailed_monthly_report_json(
     start_date_of_month = date(year, month_number, 1)
     end_date_of_month = date(year, month_number, calendar.monthrange(year, month_number)[1])
 
-    all_financial_events = []
-    if report_type in ['user', 'combined', None]:
-        for item in db.query(models.PaymentItem).filter(models.PaymentItem.user_id == user.id).all():
-            relevant_date = (item.updated_at or item.created_at)
-            if relevant_date and start_date_of_month <= relevant_date <= end_date_of_month:
-                category_name = ""
-                if item.student_shirt_order_id is not None:
-                    category_name = "Student Shirt Order"
-                elif item.academic_year and item.semester:
-                    category_name = f"AY {item.academic_year} - {item.semester} Membership Fee"
-                else:
-                    category_name = "Miscellaneous Fee"
-                status_str = "Paid" if item.is_paid else ("Past Due" if not item.is_paid and item.due_date and item.due_date < date.today() else "Unpaid")
-                
-                all_financial_events.append((relevant_date, f"You Paid - {category_name}", item.fee if item.is_paid else 0.00, 0.00, status_str, item.fee, item))
-
-    org_id_for_query = user_org.id if user_org else None
-    if report_type in ['organization', 'combined', None]:
-        org_inflows_query = db.query(models.PaymentItem).join(models.User).filter(models.PaymentItem.is_paid == True, models.User.organization_id == org_id_for_query)
-        if report_type in ['user', 'combined', None]: org_inflows_query = org_inflows_query.filter(models.PaymentItem.user_id != user.id)
-
-        org_inflows_for_month = org_inflows_query.filter(
-            or_(
-                and_(models.PaymentItem.updated_at >= start_date_of_month, models.PaymentItem.updated_at <= end_date_of_month),
-                and_(models.PaymentItem.created_at >= start_date_of_month, models.PaymentItem.created_at <= end_date_of_month)
-            )
-        ).all()
-        total_org_inflow_amount = sum(item.fee for item in org_inflows_for_month)
-        if total_org_inflow_amount > 0:
-            all_financial_events.append((start_date_of_month, "Organization Inflows", total_org_inflow_amount, 0.00, "Received", total_org_inflow_amount, None))
-
-        for expense in db.query(models.Expense).filter(models.Expense.organization_id == org_id_for_query).all():
-            if expense.incurred_at and start_date_of_month <= expense.incurred_at <= end_date_of_month:
-                all_financial_events.append((expense.incurred_at, f"Org Expense - {expense.category or 'Uncategorized'}", 0.00, expense.amount, "Recorded", expense.amount, expense))
-
-    all_financial_events.sort(key=lambda x: x[0])
+    include_user = report_type in ['user', 'combined', None]
+    include_organization = report_type in ['organization', 'combined', None]
+    starting_balance_month, ledger_rows = await finance.load_monthly_ledger(
+        db, user.id, user_org.id if user_org else None, start_date_of_month, end_date_of_month,
+        include_user=include_user, include_organization=include_organization
+    )
 
     transactions_for_report_month = []
     total_inflows_month = 0.00
     total_outflows_month = 0.00
     total_outstanding_month = 0.00
     total_past_due_month = 0.00
-    current_running_balance = 0.00
-    starting_balance_month = 0.00
 
-    for event_date, description, inflow, outflow, status_str, original_value, original_item_obj in all_financial_events:
-        if event_date < start_date_of_month: 
-            current_running_balance += inflow - outflow
+    for row in ledger_rows:
+        if row.source == finance.LEDGER_USER_PAYMENT:
+            if row.student_shirt_order_id is not None:
+                category_name = "Student Shirt Order"
+            elif row.academic_year and row.semester:
+                category_name = f"AY {row.academic_year} - {row.semester} Membership Fee"
+            else:
+                category_name = "Miscellaneous Fee"
+            description = f"You Paid - {category_name}"
+            is_past_due = not row.is_paid and row.due_date and row.due_date < date.today()
+            status_str = "Paid" if row.is_paid else ("Past Due" if is_past_due else "Unpaid")
+            if not row.is_paid:
+                total_outstanding_month += row.original_value
+                if is_past_due: total_past_due_month += row.original_value
+        elif row.source == finance.LEDGER_ORGANIZATION_INFLOWS:
+            description, status_str = "Organization Inflows", "Received"
         else:
-            starting_balance_month = current_running_balance
-            break
-    if not all_financial_events or all_financial_events[0][0] >= start_date_of_month:
-        starting_balance_month = 0.00
-    
-    current_running_balance = starting_balance_month 
-
-    for event_date, description, inflow, outflow, status_str, original_value, original_item_obj in all_financial_events:
-        if start_date_of_month <= event_date <= end_date_of_month: 
-            is_user_payment_event = "You Paid" in description 
-            is_org_inflow_event = "Organization Inflows" in description
-            is_org_expense_event = "Org Expense" in description
-
-            should_include_in_report = False
-            if report_type is None or report_type == 'combined': should_include_in_report = True
-            elif report_type == 'user' and is_user_payment_event: should_include_in_report = True
-            elif report_type == 'organization' and (is_org_inflow_event or is_org_expense_event): should_include_in_report = True
-
-            if should_include_in_report:
-                total_inflows_month += inflow
-                total_outflows_month += outflow
-                if is_user_payment_event and status_str != "Paid" and isinstance(original_item_obj, models.PaymentItem) and not original_item_obj.is_paid:
-                    total_outstanding_month += original_item_obj.fee
-                    if original_item_obj.due_date and original_item_obj.due_date < date.today(): total_past_due_month += original_item_obj.fee
-
-                current_running_balance += (inflow - outflow)
-                transactions_for_report_month.append({
-                    "date": event_date.strftime("%Y-%m-%d"), "description": description, "inflow": inflow, "outflow": outflow,
-                    "status": status_str, "original_value": original_value, "running_balance": current_running_balance
-                })
+            description, status_str = f"Org Expense - {row.category or 'Uncategorized'}", "Recorded"
+
+        total_inflows_month += row.inflow
+        total_outflows_month += row.outflow
+        transactions_for_report_month.append({
+            "date": row.event_date.strftime("%Y-%m-%d"), "description": description, "inflow": row.inflow, "outflow": row.outflow,
+            "status": status_str, "original_value": row.original_value, "running_balance": row.running_balance
+        })
+
+    total_all_original_fees = 0.00
+    if include_user:
+        total_all_original_fees = (await db.execute(
+            select(func.sum(models.PaymentItem.fee)).where(models.PaymentItem.user_id == user.id)
+        )).scalar() or 0
 
     response_content = {
         "month_name": month.capitalize(), "year": year, "current_date": date.today().strftime("%B %d, %Y"),
@@ -4310,13 +4034,13 @@ async def get_detailed_monthly_report_json(
         "total_outstanding": total_outstanding_month, "total_past_due": total_past_due_month,
         "ending_balance": starting_balance_month + total_inflows_month - total_outflows_month,
         "transactions": transactions_for_report_month, "user_name": f"{user.first_name} {user.last_name}",
-        "total_all_original_fees": sum(item.fee for item in db.query(models.PaymentItem).filter(models.PaymentItem.user_id == user.id).all()) if report_type in ['user', 'combined', None] else 0.00
+        "total_all_original_fees": total_all_original_fees
     }
     return JSONResponse(content=response_content)
 
 # Settings Page (User)
 @app.get("/Settings", response_class=HTMLResponse, name="settings")
-async def settings(request: Request, db: Session = Depends(get_db)):
+async def settings(request: Request, db: Session = Depends(get_read_db)):
     user, _ = get_current_user_with_org(request, db)
 
     formatted_birthdate = ""
@@ -4334,18 +4058,18 @@ async def settings(request: Request, db: Session = Depends(get_db)):
                     formatted_birthdate = user.birthdate
 
     user.verification_status = "Verified" if user.is_verified else "Not Verified"
-    context = await get_base_template_context(request, db)
+    context = get_base_template_context(request, db)
     context.update({"user": user, "formatted_birthdate": formatted_birthdate})
     return templates.TemplateResponse("student_dashboard/settings.html", context)
 
 # Get All Organizations
 @app.get("/api/organizations/", response_model=List[schemas.Organization])
-async def get_organizations(db: Session = Depends(get_db)):
+async def get_organizations(db: Session = Depends(get_read_db)):
     return db.query(models.Organization).all()
 
 # User Signup
 @app.post("/api/signup/")
-async def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
+def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
     if crud.get_user(db, identifier=user_data.student_number):
         raise HTTPException(status_code=400, detail="Student number already registered")
     if db.query(models.User).filter(models.User.email == user_data.email).first():
@@ -4386,7 +4110,7 @@ async def signup(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
 
 # Get User by ID
 @app.get("/api/user/{user_id}", response_model=schemas.User)
-async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
+async def get_user_by_id(user_id: int, db: Session = Depends(get_read_db)):
     user = crud.get_user(db, identifier=str(user_id))
     if user is None: raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -4395,7 +4119,7 @@ async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
 @app.get("/get_user_data", response_model=schemas.UserDataResponse)
 async def get_user_data(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     dark_mode: bool = Query(False, description="Request dark mode custom palette")
 ):
     user_id = request.session.get("user_id")
@@ -4453,7 +4177,7 @@ async def get_user_data(
 
 # User and Admin Login
 @app.post("/api/login/")
-async def login(request: Request, form_data: schemas.UserLogin, db: Session = Depends(get_db)):
+def login(request: Request, form_data: schemas.UserLogin, db: Session = Depends(get_db)):
     user = crud.authenticate_user(db, form_data.identifier, form_data.password)
     if user:
         request.session["user_id"] = user.id
@@ -4476,7 +4200,7 @@ async def login(request: Request, form_data: schemas.UserLogin, db: Session = De
                 organization_id_to_log = admin_organizations.id
             
             description = f"Admin '{admin.first_name} {admin.last_name}' successfully logged in."
-            await crud.create_admin_log(
+            crud.create_admin_log(
                 db=db,
                 admin_id=admin.admin_id,
                 organization_id=organization_id_to_log, 
@@ -4492,7 +4216,7 @@ async def login(request: Request, form_data: schemas.UserLogin, db: Session = De
 
 # Heart/Unheart Bulletin Posts
 @app.post("/bulletin/heart/{post_id}")
-async def heart_post(
+def heart_post(
     post_id: int,
     request: Request,
     db: Session = Depends(get_db),
@@ -4534,7 +4258,7 @@ async def heart_post(
 async def get_users_who_liked_post(
     post_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     user = None
     user_org = None
@@ -4587,7 +4311,7 @@ async def get_users_who_liked_post(
 
 # Join Event
 @app.post("/Events/join/{event_id}")
-async def join_event(event_id: int, request: Request, db: Session = Depends(get_db)):
+def join_event(event_id: int, request: Request, db: Session = Depends(get_db)):
     user, user_org = get_current_user_with_org(request, db)
 
     event = db.query(models.Event).options(joinedload(models.Event.participants), joinedload(models.Event.admin)).filter(models.Event.event_id == event_id).first()
@@ -4609,7 +4333,7 @@ async def join_event(event_id: int, request: Request, db: Session = Depends(get_
 
 # Leave Event
 @app.post("/Events/leave/{event_id}")
-async def leave_event(event_id: int, request: Request, db: Session = Depends(get_db)):
+def leave_event(event_id: int, request: Request, db: Session = Depends(get_db)):
     user, user_org = get_current_user_with_org(request, db)
 
     event = db.query(models.Event).options(joinedload(models.Event.participants), joinedload(models.Event.admin)).filter(models.Event.event_id == event_id).first()
@@ -4625,7 +4349,7 @@ async def leave_event(event_id: int, request: Request, db: Session = Depends(get
 
 # Upcoming Events Summary
 @app.get("/api/events/upcoming_summary")
-async def get_upcoming_events_summary(request: Request, db: Session = Depends(get_db)):
+async def get_upcoming_events_summary(request: Request, db: Session = Depends(get_read_db)):
     user, user_org = get_current_user_with_org(request, db)
 
     now = datetime.now()
@@ -4647,7 +4371,7 @@ def generate_email(first_name: str, last_name: str) -> str:
 
 # Update User Profile
 @app.post("/api/profile/update/")
-async def update_profile(
+def update_profile(
     request: Request,
     student_number: Optional[str] = Form(None),
     first_name: Optional[str] = Form(None),
@@ -4693,7 +4417,7 @@ async def update_profile(
                 setattr(user, field, value)
 
     if registration_form:
-        pdf_path = await handle_file_upload(registration_form, "documents/registration_forms", ["application/pdf"], old_file_path=user.registration_form)
+        pdf_path = handle_file_upload(registration_form, "documents/registration_forms", ["application/pdf"], old_file_path=user.registration_form)
         user.registration_form = pdf_path
         
         local_pdf_path = STATIC_DIR / pdf_path.lstrip("/static/")
@@ -4742,7 +4466,7 @@ async def update_profile(
             user.email = generate_email(user.first_name.replace(" ", ""), user.last_name)
 
     if profilePicture:
-        profile_pic_path = await handle_file_upload(profilePicture, "images/profile_pictures", ["image/jpeg", "image/png", "image/gif"], max_size_bytes=2 * 1024 * 1024, old_file_path=user.profile_picture)
+        profile_pic_path = handle_file_upload(profilePicture, "images/profile_pictures", ["image/jpeg", "image/png", "image/gif"], max_size_bytes=2 * 1024 * 1024, old_file_path=user.profile_picture)
         user.profile_picture = profile_pic_path
     
     current_date = datetime.now()
@@ -4772,28 +4496,33 @@ async def update_profile(
         changes.append(f"Verification status changed from '{original_is_verified_status}' to '{is_verified}'.")
 
     if not original_is_verified_status and user.is_verified and user.organization_id:
-        for admin in db.query(models.Admin).join(models.organization_admins).filter(models.organization_admins.c.organization_id == user.organization_id).all():
-            crud.create_notification(db=db, message=f"Member {user.first_name} {user.last_name} has been verified.",
-                                     organization_id=user.organization_id, admin_id=admin.admin_id, notification_type="member_verification",
-                                     verified_user_id=user.id, 
-                                     url=f"/admin/payments/total_members?student_number={user.student_number}",
-                                     event_identifier=f"member_verified_admin_{admin.admin_id}_user_{user.id}")
-            # Log the admin action of verifying a user (if an admin is logged in)
-            admin_id_for_log = request.session.get("admin_id")
-            if admin_id_for_log:
-                admin_performing_action = db.query(models.Admin).filter(models.Admin.admin_id == admin_id_for_log).first()
-                if admin_performing_action:
-                    description = f"Admin '{admin_performing_action.first_name} {admin_performing_action.last_name}' verified user: '{user.first_name} {user.last_name}' (ID: {user.id})."
-                    await crud.create_admin_log(
-                        db=db,
-                        admin_id=admin_performing_action.admin_id,
-                        organization_id=user.organization_id,
-                        action_type="User Verified",
-                        description=description,
-                        request=request,
-                        target_entity_type="User",
-                        target_entity_id=user.id
-                    )
+        jobs.enqueue(
+            db,
+            "notify_organization_admins",
+            organization_id=user.organization_id,
+            message=f"Member {user.first_name} {user.last_name} has been verified.",
+            event_identifier_prefix="member_verified",
+            event_identifier_suffix=f"user_{user.id}",
+            notification_type="member_verification",
+            url=f"/admin/payments/total_members?student_number={user.student_number}",
+            verified_user_id=user.id,
+        )
+        # Log the admin action of verifying a user (if an admin is logged in)
+        admin_id_for_log = request.session.get("admin_id")
+        if admin_id_for_log:
+            admin_performing_action = db.query(models.Admin).filter(models.Admin.admin_id == admin_id_for_log).first()
+            if admin_performing_action:
+                description = f"Admin '{admin_performing_action.first_name} {admin_performing_action.last_name}' verified user: '{user.first_name} {user.last_name}' (ID: {user.id})."
+                crud.create_admin_log(
+                    db=db,
+                    admin_id=admin_performing_action.admin_id,
+                    organization_id=user.organization_id,
+                    action_type="User Verified",
+                    description=description,
+                    request=request,
+                    target_entity_type="User",
+                    target_entity_id=user.id
+                )
 
     db.commit()
     db.refresh(user)
@@ -4805,7 +4534,7 @@ async def update_profile(
         admin_performing_action = db.query(models.Admin).filter(models.Admin.admin_id == admin_id_for_log).first()
         if admin_performing_action:
             description = f"Admin '{admin_performing_action.first_name} {admin_performing_action.last_name}' updated profile for user: '{user.first_name} {user.last_name}' (ID: {user.id}). Changes: {'; '.join(changes)}"
-            await crud.create_admin_log(
+            crud.create_admin_log(
                 db=db,
                 admin_id=admin_performing_action.admin_id,
                 organization_id=user.organization_id,
@@ -4819,7 +4548,7 @@ async def update_profile(
     return {"message": "Profile updated successfully", "user": user}
 
 @app.post("/api/auth/change-password")
-async def change_password(
+def change_password(
     request: Request,
     current_password: str = Form(..., description="The user's current password"),
     new_password: str = Form(..., description="The new password to set"),
@@ -4859,7 +4588,7 @@ async def change_password(
         admin_performing_action = db.query(models.Admin).filter(models.Admin.admin_id == admin_id_for_log).first()
         if admin_performing_action:
             description = f"Admin '{admin_performing_action.first_name} {admin_performing_action.last_name}' changed their own password."
-            await crud.create_admin_log(
+            crud.create_admin_log(
                 db=db,
                 admin_id=admin_performing_action.admin_id,
                 action_type="Admin Password Change",
@@ -4872,7 +4601,7 @@ async def change_password(
     return {"message": "Password updated successfully!"}
 
 @app.post("/api/forgot-password/")
-async def forgot_password_endpoint(
+def forgot_password_endpoint(
     request_data: schemas.ForgotPasswordRequest, 
     request: Request,
     db: Session = Depends(get_db)
@@ -4948,7 +4677,7 @@ async def forgot_password_endpoint(
             admin_performing_action = db.query(models.Admin).filter(models.Admin.admin_id == admin_id_for_log).first()
             if admin_performing_action:
                 description = f"Admin '{admin_performing_action.first_name} {admin_performing_action.last_name}' requested a password reset code."
-                await crud.create_admin_log(
+                crud.create_admin_log(
                     db=db,
                     admin_id=admin_performing_action.admin_id,
                     action_type="Admin Password Reset Request",
@@ -4970,7 +4699,7 @@ async def forgot_password_endpoint(
         )
 
 @app.post("/api/reset-password/")
-async def reset_password_endpoint(
+def reset_password_endpoint(
     request_data: schemas.ResetPasswordRequest, 
     request: Request,
     db: Session = Depends(get_db)
@@ -5008,7 +4737,7 @@ async def reset_password_endpoint(
     admin_performing_action = db.query(models.Admin).filter(models.Admin.email == identifier).first()
     if admin_performing_action and admin_performing_action.admin_id == user.id: 
         description = f"Admin '{admin_performing_action.first_name} {admin_performing_action.last_name}' successfully reset their password via reset code."
-        await crud.create_admin_log(
+        crud.create_admin_log(
             db=db,
             admin_id=admin_performing_action.admin_id,
             action_type="Admin Password Reset (Code)",
@@ -5021,7 +4750,7 @@ async def reset_password_endpoint(
     return {"message": "Password has been reset successfully."}, status.HTTP_200_OK
 
 @app.get("/api/admin_users", response_model=List[Dict[str, Any]])
-async def get_all_admin_users(db: Session = Depends(get_db)):
+async def get_all_admin_users(db: Session = Depends(get_read_db)):
     """
     Retrieves a list of all administrators with their basic information.
     This is used to populate the admin filter dropdown in the activity log.
@@ -5039,7 +4768,7 @@ async def get_all_admin_users(db: Session = Depends(get_db)):
 @app.get("/admin-logs", response_model=List[schemas.AdminLog])
 async def get_all_admin_logs_api(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     admin_info_tuple: Tuple[models.Admin, models.Organization] = Depends(get_current_admin_with_org),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, le=200),
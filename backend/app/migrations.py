@@ -0,0 +1,264 @@
+import argparse
+import logging
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import text, select, func, inspect, and_, or_
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import Connection, Engine
+
+from . import models, rollups, crud, counters, search, finance
+from .database import engine
+
+# Versioned schema migrations.
+# Base.metadata.create_all only creates missing tables, so anything added to an existing
+# table (indexes, columns, backfills) is registered here and applied once, in order.
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = []
+
+def migration(version: int, name: str):
+    def register(fn: Callable[[Connection], None]) -> Callable[[Connection], None]:
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+def _create_indexes(connection: Connection, table, index_names: List[str]) -> None:
+    indexes = {index.name: index for index in table.indexes}
+    for index_name in index_names:
+        indexes[index_name].create(bind=connection, checkfirst=True)
+
+def _column_exists(connection: Connection, table_name: str, column_name: str) -> bool:
+    return any(column["name"] == column_name for column in inspect(connection).get_columns(table_name))
+
+@migration(1, "composite indexes for hot payment and notification filters")
+def add_hot_path_indexes(connection: Connection) -> None:
+    _create_indexes(connection, models.User.__table__, ["ix_users_organization_section"])
+    _create_indexes(connection, models.PaymentItem.__table__, ["ix_payment_items_user_period", "ix_payment_items_period_paid"])
+    _create_indexes(connection, models.Payment.__table__, ["ix_payments_payment_item_status", "ix_payments_user_status"])
+    _create_indexes(connection, models.Expense.__table__, ["ix_expenses_organization_incurred"])
+    _create_indexes(connection, models.Notification.__table__, [
+        "ix_notifications_user_state", "ix_notifications_admin_state", "ix_notifications_organization_state"
+    ])
+
+@migration(2, "denormalized organization_id on payment_items and payments")
+def add_payment_organization_ids(connection: Connection) -> None:
+    for table_name in ("payment_items", "payments"):
+        if not _column_exists(connection, table_name, "organization_id"):
+            connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN organization_id INTEGER REFERENCES organizations (id)"))
+        connection.execute(text(
+            f"UPDATE {table_name} SET organization_id = "
+            f"(SELECT users.organization_id FROM users WHERE users.id = {table_name}.user_id) "
+            f"WHERE user_id IS NOT NULL"
+        ))
+    _create_indexes(connection, models.PaymentItem.__table__, ["ix_payment_items_organization_paid"])
+    _create_indexes(connection, models.Payment.__table__, ["ix_payments_organization_status"])
+
+@migration(3, "financial rollups")
+def add_financial_rollups(connection: Connection) -> None:
+    models.FinancialRollup.__table__.create(bind=connection, checkfirst=True)
+    rollups.rebuild_financial_rollups(connection)
+
+@migration(4, "date index for the monthly ledger")
+def add_ledger_date_index(connection: Connection) -> None:
+    _create_indexes(connection, models.PaymentItem.__table__, ["ix_payment_items_organization_paid_dates"])
+
+@migration(5, "unique notification event identifiers")
+def make_notification_identifiers_unique(connection: Connection) -> None:
+    # Keep one row per identifier, preferring a dismissed one so it stays dismissed
+    connection.execute(text(
+        "DELETE FROM notifications WHERE event_identifier IS NOT NULL AND id NOT IN ("
+        "SELECT id FROM (SELECT id, ROW_NUMBER() OVER "
+        "(PARTITION BY event_identifier ORDER BY is_dismissed DESC, id) AS position "
+        "FROM notifications WHERE event_identifier IS NOT NULL) WHERE position = 1)"
+    ))
+    connection.execute(text("DROP INDEX IF EXISTS ix_notifications_event_identifier"))
+    _create_indexes(connection, models.Notification.__table__, ["ix_notifications_event_identifier"])
+
+@migration(6, "broadcast notifications with per-member receipts")
+def add_broadcast_notifications(connection: Connection) -> None:
+    if not _column_exists(connection, "notifications", "is_broadcast"):
+        connection.execute(text("ALTER TABLE notifications ADD COLUMN is_broadcast BOOLEAN NOT NULL DEFAULT 0"))
+    models.NotificationReceipt.__table__.create(bind=connection, checkfirst=True)
+
+    # Collapse the per-member copies of bulletin post and event announcements into one
+    # broadcast each, keeping every member's read/dismissed state as a receipt
+    fanned_out = (
+        "notification_type IN ('bulletin_post', 'event') AND user_id IS NOT NULL "
+        "AND organization_id IS NOT NULL AND is_broadcast = 0"
+    )
+    connection.execute(text(
+        "INSERT OR IGNORE INTO notifications (message, url, notification_type, organization_id, bulletin_post_id, event_id, "
+        "event_identifier, is_broadcast, is_read, is_dismissed, created_at) "
+        "SELECT MIN(message), MIN(url), notification_type, organization_id, bulletin_post_id, event_id, "
+        "CASE notification_type WHEN 'bulletin_post' THEN 'bulletin_post_org_' || organization_id || '_post_' || bulletin_post_id "
+        "ELSE 'new_event_org_' || organization_id || '_event_' || event_id END, 1, 0, 0, MIN(created_at) "
+        f"FROM notifications WHERE {fanned_out} GROUP BY notification_type, organization_id, bulletin_post_id, event_id"
+    ))
+    connection.execute(text(
+        "INSERT OR IGNORE INTO notification_receipts (notification_id, user_id, read_at, dismissed_at) "
+        "SELECT broadcast.id, copy.user_id, "
+        "CASE WHEN copy.is_read THEN COALESCE(copy.read_at, copy.created_at) END, "
+        "CASE WHEN copy.is_dismissed THEN copy.created_at END "
+        "FROM notifications AS copy JOIN notifications AS broadcast ON broadcast.is_broadcast = 1 "
+        "AND broadcast.notification_type = copy.notification_type AND broadcast.organization_id = copy.organization_id "
+        "AND broadcast.bulletin_post_id IS copy.bulletin_post_id AND broadcast.event_id IS copy.event_id "
+        "WHERE copy.notification_type IN ('bulletin_post', 'event') AND copy.user_id IS NOT NULL "
+        "AND copy.is_broadcast = 0 AND (copy.is_read OR copy.is_dismissed)"
+    ))
+    # Members without a copy joined after the announcement; an already dismissed receipt keeps it out of their feed
+    connection.execute(text(
+        "INSERT OR IGNORE INTO notification_receipts (notification_id, user_id, read_at, dismissed_at) "
+        "SELECT broadcast.id, member.id, NULL, broadcast.created_at "
+        "FROM notifications AS broadcast JOIN users AS member ON member.organization_id = broadcast.organization_id "
+        "WHERE broadcast.is_broadcast = 1 AND NOT EXISTS (SELECT 1 FROM notifications AS copy "
+        "WHERE copy.user_id = member.id AND copy.is_broadcast = 0 AND copy.notification_type = broadcast.notification_type "
+        "AND copy.organization_id = broadcast.organization_id AND copy.bulletin_post_id IS broadcast.bulletin_post_id "
+        "AND copy.event_id IS broadcast.event_id)"
+    ))
+    connection.execute(text(f"DELETE FROM notifications WHERE {fanned_out}"))
+
+@migration(7, "notification unread counters")
+def add_notification_counters(connection: Connection) -> None:
+    # Counted by migration 11, once members have their organization join times
+    models.NotificationCounter.__table__.create(bind=connection, checkfirst=True)
+
+@migration(8, "student full-text search index")
+def add_student_search_index(connection: Connection) -> None:
+    _create_indexes(connection, models.User.__table__, ["ix_users_organization_last_name"])
+    search.create_student_search_index(connection)
+
+@migration(9, "member listing index")
+def add_member_listing_index(connection: Connection) -> None:
+    _create_indexes(connection, models.User.__table__, ["ix_users_organization_id"])
+
+@migration(10, "job leases")
+def add_job_leases(connection: Connection) -> None:
+    if not _column_exists(connection, "jobs", "claimed_by"):
+        connection.execute(text("ALTER TABLE jobs ADD COLUMN claimed_by VARCHAR"))
+    if not _column_exists(connection, "jobs", "lease_expires_at"):
+        connection.execute(text("ALTER TABLE jobs ADD COLUMN lease_expires_at DATETIME"))
+
+@migration(11, "member organization join times")
+def add_organization_join_times(connection: Connection) -> None:
+    # Existing members keep a NULL join time and with it every broadcast they had
+    if not _column_exists(connection, "users", "organization_joined_at"):
+        connection.execute(text("ALTER TABLE users ADD COLUMN organization_joined_at DATETIME"))
+    counters.reconcile_notification_counters(connection)
+
+def _ensure_version_table(connection: Connection) -> None:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)"
+    ))
+
+def get_applied_versions(bind: Engine = engine) -> List[int]:
+    with bind.begin() as connection:
+        _ensure_version_table(connection)
+        return [row[0] for row in connection.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+def run_migrations(bind: Engine = engine) -> List[int]:
+    """Applies pending migrations in version order, each in its own transaction."""
+    applied = set(get_applied_versions(bind))
+    newly_applied = []
+    for version, name, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        with bind.begin() as connection:
+            fn(connection)
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+                {"version": version, "name": name, "applied_at": datetime.utcnow()}
+            )
+        logging.info(f"Applied migration {version}: {name}")
+        newly_applied.append(version)
+    return newly_applied
+
+# Query plan checks
+# Representative hot queries; each must be answered through an index, never a full table scan.
+HOT_TABLES = ("users", "payment_items", "payments", "notifications", "notification_receipts", "expenses", "financial_rollups")
+
+def get_hot_queries() -> List[Tuple[str, object]]:
+    PaymentItem, Payment, Expense = models.PaymentItem, models.Payment, models.Expense
+    Rollup = models.FinancialRollup
+    org_paid_fees = and_(
+        PaymentItem.organization_id == 1,
+        PaymentItem.is_paid == True,
+        PaymentItem.student_shirt_order_id.is_(None),
+    )
+    org_paid_items = and_(PaymentItem.organization_id == 1, PaymentItem.is_paid == True)
+    return [
+        ("org paid membership fees", select(func.sum(PaymentItem.fee)).where(org_paid_fees)),
+        ("org paid fees by period", select(PaymentItem.academic_year, PaymentItem.semester, func.sum(PaymentItem.fee)).where(
+            org_paid_fees
+        ).group_by(PaymentItem.academic_year, PaymentItem.semester)),
+        ("org outstanding dues", select(func.sum(PaymentItem.fee)).where(
+            PaymentItem.organization_id == 1,
+            PaymentItem.academic_year == "2024-2025",
+            PaymentItem.semester == "1st",
+            PaymentItem.is_paid == False,
+            PaymentItem.student_shirt_order_id.is_(None),
+        )),
+        ("user membership items", select(PaymentItem.fee).where(
+            PaymentItem.user_id == 1, PaymentItem.student_shirt_order_id.is_(None)
+        )),
+        ("org successful payments", select(func.sum(Payment.amount)).where(
+            Payment.organization_id == 1, Payment.status == "success"
+        )),
+        ("org expenses by month", select(func.sum(Expense.amount)).where(
+            Expense.organization_id == 1, Expense.incurred_at >= "2025-01-01", Expense.incurred_at < "2025-02-01"
+        )),
+        ("org financial rollups", select(Rollup.month, Rollup.academic_year, func.sum(Rollup.amount)).where(
+            Rollup.organization_id == 1, Rollup.kind == "membership_fee"
+        ).group_by(Rollup.month, Rollup.academic_year)),
+        ("org inflows for a month", select(func.sum(PaymentItem.fee)).where(or_(
+            and_(org_paid_items, PaymentItem.updated_at >= "2025-01-01", PaymentItem.updated_at <= "2025-01-31"),
+            and_(org_paid_items, PaymentItem.updated_at.is_(None), PaymentItem.created_at >= "2025-01-01", PaymentItem.created_at <= "2025-01-31"),
+        ))),
+        ("org undated inflows by month", finance.undated_membership_fees_by_month_query(1)),
+        ("org expenses before a month", select(func.sum(Expense.amount)).where(
+            Expense.organization_id == 1, Expense.incurred_at < "2025-01-01"
+        )),
+    ] + list(zip(
+        ["user notifications", "user organization notifications", "user broadcasts", "admin notifications", "admin organization notifications"],
+        crud.notification_feed_queries(user_id=1, user_org_id=1) + crud.notification_feed_queries(admin_id=1, admin_org_ids=[1]),
+    ))
+
+def explain_query_plan(connection: Connection, statement) -> List[str]:
+    compiled = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+def check_query_plans(bind: Engine = engine) -> List[Tuple[str, str]]:
+    """Returns (query name, plan step) for every hot query that falls back to a full table scan."""
+    full_scans = []
+    with bind.connect() as connection:
+        for name, statement in get_hot_queries():
+            for step in explain_query_plan(connection, statement):
+                if step.startswith("SCAN ") and step.split()[1] in HOT_TABLES:
+                    full_scans.append((name, step))
+    return full_scans
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status", "check-plans"])
+    args = parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    if args.command == "upgrade":
+        newly_applied = run_migrations()
+        print(f"Applied {len(newly_applied)} migration(s).")
+    elif args.command == "status":
+        applied = set(get_applied_versions())
+        for version, name, _ in sorted(MIGRATIONS, key=lambda m: m[0]):
+            print(f"{version:>4}  {'applied' if version in applied else 'pending':<8} {name}")
+    elif args.command == "check-plans":
+        run_migrations()
+        full_scans = check_query_plans()
+        for name, step in full_scans:
+            print(f"FULL SCAN in '{name}': {step}")
+        if full_scans:
+            return 1
+        print("All hot queries use an index.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, Float, Date, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, Float, Date, JSON, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
 from datetime import datetime
-from sqlalchemy import UniqueConstraint 
+from sqlalchemy import UniqueConstraint, Index
 
 event_participants = Table(
     'event_participants',
@@ -89,11 +89,22 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     verified_by = Column(String, nullable=True)
     verification_date = Column(DateTime, nullable=True)
+    # When the member joined their current organization; broadcasts sent earlier are not theirs.
+    # NULL for members who predate it, who see every broadcast of their organization
+    organization_joined_at = Column(DateTime, nullable=True, default=datetime.utcnow)
     payments = relationship("Payment", back_populates="user")
     payment_items = relationship("PaymentItem", back_populates="user", cascade="all, delete-orphan")
     notifications = relationship("Notification", back_populates="user", foreign_keys="[Notification.user_id]")
     liked_posts = relationship("UserLike", back_populates="user")
     student_shirt_orders = relationship("StudentShirtOrder", back_populates="student")
+
+    __table_args__ = (
+        Index("ix_users_organization_section", "organization_id", "section"),
+        # The admin student list, a page at a time by last name
+        Index("ix_users_organization_last_name", "organization_id", "last_name"),
+        # Member listings, a page at a time in id order
+        Index("ix_users_organization_id", "organization_id", "id"),
+    )
 class Admin(Base):
     __tablename__ = "admins"
     admin_id = Column(Integer, primary_key=True, index=True)
@@ -146,10 +157,18 @@ class Payment(Base):
     created_at = Column(Date, default=func.current_date())
     updated_at = Column(Date, onupdate=func.current_date())
     payment_item_id = Column(Integer, ForeignKey("payment_items.id"), nullable=True)
+    # Denormalized from the paying user; maintained by listeners.py
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
     payment_item = relationship("PaymentItem", back_populates="payments")
     user = relationship("User", back_populates="payments")
     notifications = relationship("Notification", back_populates="payment")
     shirt_orders = relationship("StudentShirtOrder", back_populates="payment")
+
+    __table_args__ = (
+        Index("ix_payments_payment_item_status", "payment_item_id", "status", "amount"),
+        Index("ix_payments_user_status", "user_id", "status"),
+        Index("ix_payments_organization_status", "organization_id", "status"),
+    )
 class PaymentItem(Base):
     __tablename__ = "payment_items"
     id = Column(Integer, primary_key=True, index=True)
@@ -165,10 +184,22 @@ class PaymentItem(Base):
     is_past_due = Column(Boolean, default=False)
     is_not_responsible = Column(Boolean, default=False)
     student_shirt_order_id = Column(Integer, ForeignKey("student_shirt_orders.id"), unique=True, nullable=True)
+    # Denormalized from the owning user; maintained by listeners.py
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
     student_shirt_order = relationship("StudentShirtOrder", back_populates="payment_item", uselist=False) 
     user = relationship("User", back_populates="payment_items")
     payments = relationship("Payment", back_populates="payment_item")
     notifications = relationship("Notification", back_populates="payment_item")
+
+    __table_args__ = (
+        # Covers the per-user membership fee sums (shirt orders excluded) without touching the table
+        Index("ix_payment_items_user_period", "user_id", "student_shirt_order_id", "academic_year", "semester", "is_paid", "fee"),
+        Index("ix_payment_items_period_paid", "academic_year", "semester", "is_paid"),
+        # Covers org-level revenue aggregates as a single range scan
+        Index("ix_payment_items_organization_paid", "organization_id", "is_paid", "student_shirt_order_id", "academic_year", "semester", "fee"),
+        # Date-ranged org inflows (monthly ledger); updated_at then created_at mirrors coalesce(updated_at, created_at)
+        Index("ix_payment_items_organization_paid_dates", "organization_id", "is_paid", "updated_at", "created_at"),
+    )
 class Expense(Base):
     __tablename__ = "expenses"
     id = Column(Integer, primary_key=True, index=True)
@@ -181,6 +212,49 @@ class Expense(Base):
     admin = relationship("Admin")
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
     organization = relationship("Organization")
+
+    __table_args__ = (
+        Index("ix_expenses_organization_incurred", "organization_id", "incurred_at"),
+    )
+class FinancialRollup(Base):
+    __tablename__ = "financial_rollups"
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    # "membership_fee" (paid PaymentItem), "payment" (successful Payment) or "expense"
+    kind = Column(String, nullable=False)
+    # Bucket dimensions use "" instead of NULL so the unique constraint matches every bucket
+    academic_year = Column(String, nullable=False, default="")
+    semester = Column(String, nullable=False, default="")
+    month = Column(String, nullable=False, default="")  # "YYYY-MM"
+    category = Column(String, nullable=False, default="")
+    amount = Column(Float, nullable=False, default=0.0)
+    item_count = Column(Integer, nullable=False, default=0)
+    # Maintained by listeners.py; rebuilt with `python -m app.rollups rebuild`
+
+    __table_args__ = (
+        UniqueConstraint("organization_id", "kind", "academic_year", "semester", "month", "category", name="uq_financial_rollups_bucket"),
+    )
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    # Name of a handler registered in jobs.py, called with `payload` as keyword arguments
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="pending")  # "pending", "running", "done" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Worker ("host:pid") running the job, and when its claim lapses unless that worker renews it
+    claimed_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -189,7 +263,7 @@ class Notification(Base):
     admin_id = Column(Integer, ForeignKey("admins.admin_id"), nullable=True)
     organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
     message = Column(Text, nullable=False)
-    event_identifier = Column(String, nullable=True, index=True)
+    event_identifier = Column(String, nullable=True, index=True, unique=True)
     notification_type = Column(String, default="general")
     bulletin_post_id = Column(Integer, ForeignKey("bulletin_board.post_id", ondelete='CASCADE'), nullable=True)
     event_id = Column(Integer, ForeignKey("events.event_id", ondelete='CASCADE'), nullable=True)
@@ -204,6 +278,9 @@ class Notification(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     read_at = Column(DateTime, nullable=True)
     url = Column(String, nullable=True)
+    # Broadcasts are stored once per organization and shown to all of its members; each member's
+    # read/dismissed state lives in notification_receipts instead of is_read/is_dismissed
+    is_broadcast = Column(Boolean, nullable=False, default=False)
     user = relationship("User", back_populates="notifications", foreign_keys=[user_id])
     admin = relationship("Admin", back_populates="notifications", foreign_keys=[admin_id])
     organization = relationship("Organization", back_populates="notifications", foreign_keys=[organization_id])
@@ -215,6 +292,54 @@ class Notification(Base):
     rule_wiki_entry = relationship("RuleWikiEntry", back_populates="notifications")
     shirt_campaign = relationship("ShirtCampaign", back_populates="notifications")
     shirt_order = relationship("StudentShirtOrder", back_populates="notifications")
+
+    __table_args__ = (
+        Index("ix_notifications_user_state", "user_id", "is_dismissed", "is_read", "created_at"),
+        Index("ix_notifications_admin_state", "admin_id", "is_dismissed", "is_read", "created_at"),
+        Index("ix_notifications_organization_state", "organization_id", "is_dismissed", "is_read", "created_at"),
+    )
+class NotificationCounter(Base):
+    """Unread and ever-delivered notification counts of one feed owner; maintained as described in counters.py."""
+    __tablename__ = "notification_counters"
+    # "user", "admin", "organization", "broadcasts" or "broadcasts_seen"
+    owner_type = Column(String, primary_key=True)
+    owner_id = Column(Integer, primary_key=True)
+    unread_count = Column(Integer, nullable=False, default=0)
+    delivered_count = Column(Integer, nullable=False, default=0)
+class NotificationArchive(Base):
+    """A read or dismissed notification removed by retention (see retention.py).
+
+    The event_identifier stays so the notification is never sent again; payload is the zlib-compressed
+    JSON of the original row, or NULL when its policy deletes instead of archiving.
+    """
+    __tablename__ = "notifications_archive"
+    id = Column(Integer, primary_key=True)  # The original notification id
+    event_identifier = Column(String, nullable=True, index=True, unique=True)
+    notification_type = Column(String, nullable=True)
+    organization_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+    admin_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    payload = Column(LargeBinary, nullable=True)
+class NotificationReceipt(Base):
+    """A member's read/dismissed state for a broadcast notification; only written once they act on it."""
+    __tablename__ = "notification_receipts"
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete='CASCADE'), primary_key=True)
+    read_at = Column(DateTime, nullable=True)
+    dismissed_at = Column(DateTime, nullable=True)
+class SchedulerLease(Base):
+    """Which process may run a scheduled task until expires_at (see scheduler.py)."""
+    __tablename__ = "scheduler_leases"
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+class ConfigVersion(Base):
+    """Bumped whenever a configuration table or an organization's financial data changes, so processes can tell when their cached copy is stale."""
+    __tablename__ = "config_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
 class NotificationTypeConfig(Base):
     __tablename__ = "notification_type_configs"
 
@@ -325,4 +450,7 @@ class OrgChartNode(Base):
     admin = relationship("Admin", foreign_keys=[admin_id])
 
     def __repr__(self):
-        return f"<OrgChartNode(id={self.id}, org_id={self.organization_id}, admin_id={self.admin_id}, position='{self.position}')>"
\ No newline at end of file
+        return f"<OrgChartNode(id={self.id}, org_id={self.organization_id}, admin_id={self.admin_id}, position='{self.position}')>"
+
+# Registers the session hooks that maintain denormalized columns and financial rollups
+from . import listeners
@@ -0,0 +1,126 @@
+import argparse
+import logging
+import string
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Notification type configuration cache.
+# notification_type_configs only changes through create_admin_script, yet every notification feed
+# request needs it. The parsed map is kept per process and reused until the configs' row in
+# config_versions moves on; listeners.py bumps that row in any transaction that writes a config,
+# so edits made by the admin script (or another worker) are picked up on the next request.
+# `python -m app.notification_configs bump` forces a reload after editing the table by hand.
+
+CONFIG_NAME = "notification_type_configs"
+TEMPLATE_FIELDS = ("message_template_plural", "context_phrase_template")
+
+_formatter = string.Formatter()
+
+class MessageTemplate:
+    """A str.format template parsed once; render() raises KeyError for a missing field just like format()."""
+
+    def __init__(self, template: str):
+        self.template = template
+        self._pieces = list(_formatter.parse(template))
+        # Nested replacement fields inside a format spec are left to str.format
+        self._nested = any(spec and "{" in spec for _, field, spec, _ in self._pieces if field is not None)
+
+    def render(self, **values: Any) -> str:
+        if self._nested:
+            return self.template.format(**values)
+        parts = []
+        for literal, field, spec, conversion in self._pieces:
+            parts.append(literal)
+            if field is not None:
+                value, _ = _formatter.get_field(field, (), values)
+                parts.append(_formatter.format_field(_formatter.convert_field(value, conversion), spec or ""))
+        return "".join(parts)
+
+def parse_template(type_name: str, template: Optional[str]) -> Optional[MessageTemplate]:
+    if not template:
+        return None
+    try:
+        return MessageTemplate(template)
+    except ValueError as e:
+        logging.warning(f"Ignoring malformed template '{template}' of notification type '{type_name}': {e}")
+        return None
+
+class NotificationConfigMap(dict):
+    """type_name -> config dict, plus the lookups derived from it.
+
+    Shared by every request of the process, so treat it as read-only.
+    """
+
+    def __init__(self, configs: Iterable[models.NotificationTypeConfig] = (), version: int = 0):
+        super().__init__()
+        self.version = version
+        # Model name -> attribute holding its title, from the first config that names one
+        self.title_attributes: Dict[str, str] = {}
+        for config in configs:
+            self[config.type_name] = {
+                "group_by_type_only": config.group_by_type_only,
+                "display_name_plural": config.display_name_plural,
+                "message_template_plural": config.message_template_plural,
+                "entity_model_name": config.entity_model_name,
+                "entity_title_attribute": config.entity_title_attribute,
+                "context_phrase_template": config.context_phrase_template,
+                "message_prefix_to_strip": config.message_prefix_to_strip,
+                "always_individual": config.always_individual,
+                "templates": {field: parse_template(config.type_name, getattr(config, field)) for field in TEMPLATE_FIELDS},
+            }
+            if config.entity_model_name and config.entity_title_attribute:
+                self.title_attributes.setdefault(config.entity_model_name, config.entity_title_attribute)
+
+# Cached map, replaced wholesale so readers never see a half-built one
+_cached: Tuple[Optional[int], NotificationConfigMap] = (None, NotificationConfigMap())
+
+def _version_statement():
+    return select(models.ConfigVersion.version).where(models.ConfigVersion.name == CONFIG_NAME)
+
+async def get_config_map(db: AsyncSession) -> NotificationConfigMap:
+    """The notification type configs; one primary-key lookup unless they changed since the last call."""
+    global _cached
+    version = (await db.execute(_version_statement())).scalar() or 0
+    cached_version, config_map = _cached
+    if cached_version == version:
+        return config_map
+    configs = (await db.execute(select(models.NotificationTypeConfig))).scalars().all()
+    config_map = NotificationConfigMap(configs, version)
+    _cached = (version, config_map)
+    logging.info(f"Loaded {len(config_map)} notification type config(s) at version {version}.")
+    return config_map
+
+def bump_config_version(session: Session) -> None:
+    table = models.ConfigVersion.__table__
+    statement = sqlite_insert(table).values(name=CONFIG_NAME, version=1)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=["name"], set_={"version": table.c.version + 1}
+    ))
+
+def main(argv: List[str] = None) -> int:
+    from .database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Notification type configuration cache")
+    parser.add_argument("command", choices=["bump"])
+    parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        bump_config_version(db)
+        db.commit()
+        version = db.execute(_version_statement()).scalar()
+    finally:
+        db.close()
+    print(f"Notification type configs are now at version {version}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
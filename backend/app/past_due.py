@@ -0,0 +1,134 @@
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import models, crud
+from .database import SessionLocal, engine
+
+# Past-due sweep.
+# PaymentItem.is_past_due is recomputed from due_date with two set-based UPDATEs, then every member
+# with past-due items gets their alert and their organization's admins get one per member, written
+# with create_notifications_bulk. Event identifiers are the ones the /home page used to create on
+# every load, so alerts that were already sent are skipped by the unique index.
+# Runs from the scheduler (PAST_DUE_SWEEP_INTERVAL_HOURS, hourly by default) or
+# `python -m app.past_due run`.
+
+SWEEP_INTERVAL_HOURS = 1
+# Rows per create_notifications_bulk call, keeping its identifier lookup well under SQLite's variable limit
+NOTIFICATION_CHUNK_SIZE = 500
+
+def past_due_condition(today: date):
+    PaymentItem = models.PaymentItem
+    return and_(
+        PaymentItem.is_paid.isnot(True),
+        PaymentItem.is_not_responsible.isnot(True),
+        PaymentItem.due_date.isnot(None),
+        PaymentItem.due_date < today,
+    )
+
+def update_past_due_flags(db: Session, today: date) -> Dict[str, int]:
+    """Sets is_past_due on overdue unpaid items and clears it everywhere else; returns the rows changed."""
+    PaymentItem = models.PaymentItem
+    # updated_at is kept as is: the ledger dates paid items by it and this is not a payment change
+    flagged = db.execute(
+        update(PaymentItem).where(past_due_condition(today), PaymentItem.is_past_due.isnot(True))
+        .values(is_past_due=True, updated_at=PaymentItem.updated_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    cleared = db.execute(
+        update(PaymentItem).where(
+            PaymentItem.is_past_due.is_(True),
+            or_(
+                PaymentItem.is_paid.is_(True),
+                PaymentItem.is_not_responsible.is_(True),
+                PaymentItem.due_date.is_(None),
+                PaymentItem.due_date >= today,
+            ),
+        )
+        .values(is_past_due=False, updated_at=PaymentItem.updated_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return {"flagged": flagged, "cleared": cleared}
+
+def build_past_due_notifications(db: Session) -> List[Dict[str, Any]]:
+    PaymentItem, User = models.PaymentItem, models.User
+    past_due_users = db.execute(
+        select(User.id, User.first_name, User.last_name, User.student_number, User.organization_id)
+        .join(PaymentItem, PaymentItem.user_id == User.id)
+        .where(PaymentItem.is_past_due.is_(True), PaymentItem.is_paid.isnot(True), User.organization_id.isnot(None))
+        .distinct()
+    ).all()
+    if not past_due_users:
+        return []
+    organization_admins = models.organization_admins.c
+    admin_ids = defaultdict(list)
+    for organization_id, admin_id in db.execute(
+        select(organization_admins.organization_id, organization_admins.admin_id)
+        .where(organization_admins.organization_id.in_({user.organization_id for user in past_due_users}))
+    ):
+        admin_ids[organization_id].append(admin_id)
+
+    notifications = []
+    for user in past_due_users:
+        notifications.append({
+            "message": "You have past due payment items. Please check your payments page.",
+            "event_identifier": f"user_past_due_alert_user_{user.id}",
+            "user_id": user.id,
+            "organization_id": user.organization_id,
+            "notification_type": "user_past_due",
+            "url": "/Payments",
+        })
+        for admin_id in admin_ids[user.organization_id]:
+            notifications.append({
+                "message": f"Past Due Payments: {user.first_name} {user.last_name} has past due payment items.",
+                "event_identifier": f"admin_past_due_user_{user.id}_admin_{admin_id}",
+                "admin_id": admin_id,
+                "organization_id": user.organization_id,
+                "notification_type": "past_due_payments",
+                "url": f"/admin/payments/total_members?student_number={user.student_number}",
+            })
+    return notifications
+
+def sweep_past_due(session_factory=None, today: Optional[date] = None) -> Dict[str, int]:
+    """Recomputes the past-due flags and sends the alerts in one transaction; returns what changed."""
+    session_factory = session_factory or SessionLocal
+    today = today or date.today()
+    db = session_factory()
+    try:
+        report = update_past_due_flags(db, today)
+        notifications = build_past_due_notifications(db)
+        report["notifications"] = sum(
+            crud.create_notifications_bulk(db, notifications[i:i + NOTIFICATION_CHUNK_SIZE])
+            for i in range(0, len(notifications), NOTIFICATION_CHUNK_SIZE)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if any(report.values()):
+        logging.info(
+            f"Past-due sweep flagged {report['flagged']} and cleared {report['cleared']} payment item(s); "
+            f"sent {report['notifications']} notification(s)."
+        )
+    return report
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Past-due payment item sweep")
+    parser.add_argument("command", choices=["run"])
+    parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    report = sweep_past_due()
+    print(f"Flagged {report['flagged']} and cleared {report['cleared']} payment item(s); sent {report['notifications']} notification(s).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
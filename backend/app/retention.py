@@ -0,0 +1,212 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import and_, delete, func, or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal, engine
+
+# Notification retention.
+# Read or dismissed notifications pile up forever otherwise, and every feed query walks past them.
+# Rows older than their type's retention period are moved into notifications_archive (zlib-compressed
+# JSON) or deleted, a bounded batch per transaction so writers are never locked out for long. Either
+# way an archive row keeps the event_identifier, so create_notification never sends them again.
+# Counters need no changes: read and dismissed rows weigh nothing and delivered counts never go down.
+# Broadcasts are left alone; their per-member state lives in notification_receipts.
+#
+# Policies come from NOTIFICATION_RETENTION, a JSON object of notification_type -> {"days", "action"}
+# with an optional "default" entry, e.g.
+#   {"default": {"days": 180}, "payment_success": {"days": 30, "action": "delete"}, "user_past_due": {"action": "keep"}}
+
+ARCHIVE = "archive"
+DELETE = "delete"
+KEEP = "keep"
+ACTIONS = (ARCHIVE, DELETE, KEEP)
+
+DEFAULT_TYPE = "default"
+BATCH_SIZE = 1000
+
+class RetentionPolicy(NamedTuple):
+    days: int = 180
+    action: str = ARCHIVE
+
+def load_policies(raw: Optional[str] = None) -> Dict[str, RetentionPolicy]:
+    """Parses the NOTIFICATION_RETENTION setting; always has a DEFAULT_TYPE entry."""
+    raw = os.getenv("NOTIFICATION_RETENTION", "") if raw is None else raw
+    policies = {DEFAULT_TYPE: RetentionPolicy()}
+    if not raw.strip():
+        return policies
+    for type_name, settings in json.loads(raw).items():
+        policy = RetentionPolicy(int(settings.get("days", RetentionPolicy().days)), settings.get("action", ARCHIVE))
+        if policy.action not in ACTIONS:
+            raise ValueError(f"Unknown retention action '{policy.action}' for notification type '{type_name}'.")
+        if policy.days < 0:
+            raise ValueError(f"Retention days for notification type '{type_name}' must not be negative.")
+        policies[type_name] = policy
+    return policies
+
+def _eligible_condition(policies: Dict[str, RetentionPolicy], action: str, now: datetime):
+    """Rows past retention whose type's policy takes `action`, or None when no policy does."""
+    Notification = models.Notification
+    notification_type = Notification.notification_type
+    overridden = [type_name for type_name in policies if type_name != DEFAULT_TYPE]
+    conditions = []
+    for type_name, policy in policies.items():
+        if policy.action != action:
+            continue
+        if type_name == DEFAULT_TYPE:
+            applies = or_(notification_type.is_(None), notification_type.notin_(overridden)) if overridden else None
+        else:
+            applies = notification_type == type_name
+        older = Notification.created_at < now - timedelta(days=policy.days)
+        conditions.append(and_(applies, older) if applies is not None else older)
+    if not conditions:
+        return None
+    return and_(
+        Notification.is_broadcast.is_(False),
+        or_(Notification.is_read.is_(True), Notification.is_dismissed.is_(True)),
+        or_(*conditions),
+    )
+
+# Kept as archive columns, so left out of the payload
+ARCHIVE_COLUMNS = ("id", "event_identifier", "notification_type", "organization_id", "user_id", "admin_id", "created_at")
+
+def _payload(row) -> bytes:
+    values = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in row._mapping.items() if key not in ARCHIVE_COLUMNS and value is not None
+    }
+    return zlib.compress(json.dumps(values, separators=(",", ":")).encode(), 9)
+
+def _used_bytes(db: Session) -> int:
+    """Bytes held by the notifications table and its indexes, or by the whole database without dbstat."""
+    try:
+        return db.execute(text(
+            "SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = 'notifications')"
+        )).scalar()
+    except OperationalError:
+        # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB; the archive's growth is netted out
+        db.rollback()
+    page_size = db.execute(text("PRAGMA page_size")).scalar()
+    page_count = db.execute(text("PRAGMA page_count")).scalar()
+    freelist_count = db.execute(text("PRAGMA freelist_count")).scalar()
+    return (page_count - freelist_count) * page_size
+
+def _compact_batch(db: Session, condition, action: str, after_id: int, batch_size: int, now: datetime):
+    """Archives or deletes one batch in its own transaction; returns (last id, rows, payload bytes)."""
+    Notification = models.Notification
+    table = Notification.__table__
+    rows = db.execute(
+        select(table).where(condition, Notification.id > after_id).order_by(Notification.id).limit(batch_size)
+    ).all()
+    if not rows:
+        return None, 0, 0
+    archive_rows = [
+        {
+            **{column: getattr(row, column) for column in ARCHIVE_COLUMNS},
+            "archived_at": now,
+            "payload": _payload(row) if action == ARCHIVE else None,
+        }
+        for row in rows
+    ]
+    db.execute(sqlite_insert(models.NotificationArchive.__table__).on_conflict_do_nothing(), archive_rows)
+    ids = [row.id for row in rows]
+    db.execute(delete(Notification).where(Notification.id.in_(ids)).execution_options(synchronize_session=False))
+    db.commit()
+    return ids[-1], len(rows), sum(len(row["payload"] or b"") for row in archive_rows)
+
+def compact_notifications(
+    session_factory=None,
+    policies: Optional[Dict[str, RetentionPolicy]] = None,
+    batch_size: int = BATCH_SIZE,
+    max_batches: Optional[int] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Applies the retention policies; returns the rows archived and deleted and the bytes reclaimed."""
+    session_factory = session_factory or SessionLocal
+    policies = policies if policies is not None else load_policies()
+    now = datetime.utcnow()
+    report = {"archived": 0, "deleted": 0, "archive_bytes": 0, "bytes_reclaimed": 0, "batches": 0}
+    db = session_factory()
+    try:
+        used_before = _used_bytes(db)
+        for action, counted in ((ARCHIVE, "archived"), (DELETE, "deleted")):
+            condition = _eligible_condition(policies, action, now)
+            if condition is None:
+                continue
+            if dry_run:
+                report[counted] = db.execute(select(func.count(models.Notification.id)).where(condition)).scalar()
+                continue
+            after_id = 0
+            while max_batches is None or report["batches"] < max_batches:
+                after_id, rows, payload_bytes = _compact_batch(db, condition, action, after_id, batch_size, now)
+                if after_id is None:
+                    break
+                report[counted] += rows
+                report["archive_bytes"] += payload_bytes
+                report["batches"] += 1
+        db.rollback()
+        report["bytes_reclaimed"] = used_before - _used_bytes(db)
+    finally:
+        db.close()
+    if report["archived"] or report["deleted"]:
+        logging.info(
+            f"Notification retention {'would remove' if dry_run else 'removed'} {report['archived']} archived and "
+            f"{report['deleted']} deleted row(s); {report['bytes_reclaimed']} byte(s) reclaimed."
+        )
+    return report
+
+def vacuum() -> int:
+    """Returns freed pages to the filesystem; returns the bytes the database file shrank by."""
+    size_before = os.path.getsize(engine.url.database)
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    return size_before - os.path.getsize(engine.url.database)
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Notification retention and archival")
+    parser.add_argument("command", choices=["run", "status"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-batches", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the rows that would be removed")
+    parser.add_argument("--vacuum", action="store_true", help="Shrink the database file afterwards")
+    args = parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    policies = load_policies()
+    if args.command == "run":
+        report = compact_notifications(
+            policies=policies, batch_size=args.batch_size, max_batches=args.max_batches, dry_run=args.dry_run
+        )
+        verb = "Would archive" if args.dry_run else "Archived"
+        print(f"{verb} {report['archived']} and {'would delete' if args.dry_run else 'deleted'} {report['deleted']} notification(s).")
+        if not args.dry_run:
+            print(f"Archive payloads: {report['archive_bytes']} bytes; pages reclaimed: {report['bytes_reclaimed']} bytes.")
+            if args.vacuum:
+                print(f"VACUUM shrank the database file by {vacuum()} bytes.")
+    elif args.command == "status":
+        for type_name, policy in sorted(policies.items()):
+            print(f"{type_name:<28} {policy.action:<8} {policy.days} day(s)")
+        db = SessionLocal()
+        try:
+            archive = models.NotificationArchive
+            archived, payload_bytes = db.execute(
+                select(func.count(archive.id), func.coalesce(func.sum(func.length(archive.payload)), 0))
+            ).one()
+        finally:
+            db.close()
+        print(f"notifications_archive: {archived} row(s), {payload_bytes} payload bytes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, delete, insert, func, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models, cache
+
+# Financial rollups
+# Pre-aggregated revenue and expense buckets per organization. listeners.py applies a delta
+# in the same transaction as every PaymentItem, Payment or Expense write, so dashboards read
+# O(months) rollup rows instead of summing every payment.
+
+MEMBERSHIP_FEE = "membership_fee"
+PAYMENT = "payment"
+EXPENSE = "expense"
+
+# (organization_id, kind, academic_year, semester, month, category)
+RollupKey = Tuple[int, str, str, str, str, str]
+
+def month_key(value) -> str:
+    return value.strftime("%Y-%m") if value else ""
+
+def current_database_date():
+    # Matches func.current_date(), which SQLite evaluates in UTC
+    return datetime.now(timezone.utc).date()
+
+def membership_fee_key(organization_id, academic_year, semester, updated_at, is_paid, student_shirt_order_id) -> Optional[RollupKey]:
+    if organization_id is None or not is_paid or student_shirt_order_id is not None:
+        return None
+    return (organization_id, MEMBERSHIP_FEE, academic_year or "", semester or "", month_key(updated_at), "")
+
+def payment_key(organization_id, status, created_at, has_payment_item, academic_year, semester, student_shirt_order_id) -> Optional[RollupKey]:
+    if organization_id is None or status != "success" or not has_payment_item or student_shirt_order_id is not None:
+        return None
+    return (organization_id, PAYMENT, academic_year or "", semester or "", month_key(created_at), "")
+
+def expense_key(organization_id, category, incurred_at) -> Optional[RollupKey]:
+    if organization_id is None:
+        return None
+    return (organization_id, EXPENSE, "", "", month_key(incurred_at), category or "")
+
+class RollupDeltas:
+    """Accumulates signed amount/count changes per bucket and writes them as one upsert."""
+
+    def __init__(self):
+        self.deltas: Dict[RollupKey, List] = defaultdict(lambda: [0.0, 0])
+
+    def add(self, key: Optional[RollupKey], amount: float, sign: int = 1) -> None:
+        if key is None:
+            return
+        self.deltas[key][0] += sign * (amount or 0.0)
+        self.deltas[key][1] += sign
+
+    def remove(self, key: Optional[RollupKey], amount: float) -> None:
+        self.add(key, amount, -1)
+
+    def apply(self, bind) -> Set[int]:
+        """Writes the accumulated deltas and returns the ids of the organizations they touched."""
+        rows = [
+            {"organization_id": key[0], "kind": key[1], "academic_year": key[2], "semester": key[3],
+             "month": key[4], "category": key[5], "amount": amount, "item_count": count}
+            for key, (amount, count) in self.deltas.items() if count != 0 or abs(amount) > 1e-9
+        ]
+        if not rows:
+            return set()
+        table = models.FinancialRollup.__table__
+        statement = sqlite_insert(table).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["organization_id", "kind", "academic_year", "semester", "month", "category"],
+            set_={"amount": table.c.amount + statement.excluded.amount, "item_count": table.c.item_count + statement.excluded.item_count},
+        )
+        bind.execute(statement)
+        organization_ids = {row["organization_id"] for row in rows}
+        # Buckets whose last item left them must not show up as zero-amount breakdown rows
+        bind.execute(delete(table).where(table.c.item_count <= 0, table.c.organization_id.in_(organization_ids)))
+        self.deltas.clear()
+        return organization_ids
+
+# Current (pre-flush) database state of changed rows
+
+def load_membership_fee_state(session: Session, payment_item_ids: Iterable[int]) -> Dict[int, Tuple[Optional[RollupKey], float]]:
+    if not payment_item_ids:
+        return {}
+    PaymentItem = models.PaymentItem
+    with session.no_autoflush:
+        rows = session.execute(select(
+            PaymentItem.id, PaymentItem.organization_id, PaymentItem.academic_year, PaymentItem.semester,
+            PaymentItem.updated_at, PaymentItem.is_paid, PaymentItem.student_shirt_order_id, PaymentItem.fee
+        ).where(PaymentItem.id.in_(payment_item_ids))).all()
+    return {row.id: (membership_fee_key(*row[1:7]), row.fee) for row in rows}
+
+def load_payment_state(session: Session, payment_ids: Iterable[int]) -> Dict[int, Tuple[Optional[RollupKey], float]]:
+    if not payment_ids:
+        return {}
+    Payment, PaymentItem = models.Payment, models.PaymentItem
+    with session.no_autoflush:
+        rows = session.execute(select(
+            Payment.id, Payment.organization_id, Payment.status, Payment.created_at, Payment.payment_item_id,
+            PaymentItem.academic_year, PaymentItem.semester, PaymentItem.student_shirt_order_id, Payment.amount
+        ).outerjoin(PaymentItem, Payment.payment_item_id == PaymentItem.id).where(Payment.id.in_(payment_ids))).all()
+    return {
+        row.id: (payment_key(row.organization_id, row.status, row.created_at, row.payment_item_id is not None,
+                             row.academic_year, row.semester, row.student_shirt_order_id), row.amount)
+        for row in rows
+    }
+
+def load_expense_state(session: Session, expense_ids: Iterable[int]) -> Dict[int, Tuple[Optional[RollupKey], float]]:
+    if not expense_ids:
+        return {}
+    Expense = models.Expense
+    with session.no_autoflush:
+        rows = session.execute(select(
+            Expense.id, Expense.organization_id, Expense.category, Expense.incurred_at, Expense.amount
+        ).where(Expense.id.in_(expense_ids))).all()
+    return {row.id: (expense_key(*row[1:4]), row.amount) for row in rows}
+
+def move_user_rollups(session: Session, user_id: int, organization_id: Optional[int]) -> Set[int]:
+    """Moves a user's paid fees and payments to another organization's buckets; call before their rows are updated."""
+    deltas = RollupDeltas()
+    with session.no_autoflush:
+        payment_item_ids = session.execute(select(models.PaymentItem.id).where(models.PaymentItem.user_id == user_id)).scalars().all()
+        payment_ids = session.execute(select(models.Payment.id).where(models.Payment.user_id == user_id)).scalars().all()
+    for state in (load_membership_fee_state(session, payment_item_ids), load_payment_state(session, payment_ids)):
+        for key, amount in state.values():
+            if key is None:
+                continue
+            deltas.remove(key, amount)
+            deltas.add((organization_id,) + key[1:] if organization_id is not None else None, amount)
+    return deltas.apply(session)
+
+# Backfill
+
+def rebuild_financial_rollups(bind, organization_id: Optional[int] = None) -> None:
+    """Recomputes rollups from the raw rows, for every organization or just one."""
+    table = models.FinancialRollup.__table__
+    PaymentItem, Payment, Expense = models.PaymentItem, models.Payment, models.Expense
+    columns = ["organization_id", "kind", "academic_year", "semester", "month", "category", "amount", "item_count"]
+
+    clear = delete(table)
+    if organization_id is not None:
+        clear = clear.where(table.c.organization_id == organization_id)
+    bind.execute(clear)
+
+    def bucket_select(organization_column, kind, academic_year, semester, date_column, category, amount, count_column, *criteria):
+        dimensions = [
+            organization_column, func.coalesce(academic_year, ""), func.coalesce(semester, ""),
+            func.coalesce(func.strftime("%Y-%m", date_column), ""), func.coalesce(category, ""),
+        ]
+        criteria = list(criteria) + [organization_column.isnot(None)]
+        if organization_id is not None:
+            criteria.append(organization_column == organization_id)
+        return select(
+            dimensions[0], literal(kind), *dimensions[1:], func.sum(amount), func.count(count_column)
+        ).where(*criteria).group_by(*dimensions)
+
+    membership_fees = bucket_select(
+        PaymentItem.organization_id, MEMBERSHIP_FEE, PaymentItem.academic_year, PaymentItem.semester,
+        PaymentItem.updated_at, None, PaymentItem.fee, PaymentItem.id,
+        PaymentItem.is_paid == True, PaymentItem.student_shirt_order_id.is_(None),
+    )
+    payments = bucket_select(
+        Payment.organization_id, PAYMENT, PaymentItem.academic_year, PaymentItem.semester,
+        Payment.created_at, None, Payment.amount, Payment.id,
+        Payment.status == "success", PaymentItem.student_shirt_order_id.is_(None),
+    ).join_from(Payment, PaymentItem, Payment.payment_item_id == PaymentItem.id)
+    expenses = bucket_select(
+        Expense.organization_id, EXPENSE, None, None,
+        Expense.incurred_at, Expense.category, Expense.amount, Expense.id,
+    )
+    for statement in (membership_fees, payments, expenses):
+        bind.execute(insert(table).from_select(columns, statement))
+    # Dashboards cached from the old buckets are stale now, in every process
+    if organization_id is not None:
+        cache.bump_data_versions(bind, [organization_id])
+    else:
+        cache.bump_data_versions(bind, bind.execute(select(models.Organization.id)).scalars())
+
+    logging.info(f"Rebuilt financial rollups for {'organization ' + str(organization_id) if organization_id is not None else 'all organizations'}.")
+
+def main(argv: List[str] = None) -> int:
+    from .database import SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Financial rollup maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--organization-id", type=int, default=None, help="Only rebuild this organization's buckets")
+    args = parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        rebuild_financial_rollups(db, args.organization_id)
+        db.commit()
+    finally:
+        db.close()
+    print("Financial rollups rebuilt.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from . import models
+from .database import SessionLocal
+
+# In-process periodic tasks.
+# Maintenance that should happen every so often (retention, sweeps) is registered here and run by
+# the web process on an asyncio task, each call in a worker thread like the job worker's batches.
+# Every web worker schedules the tasks, but a run first takes the task's row in scheduler_leases for
+# one interval, so each interval only one process runs it; when that process stops, whichever worker
+# wakes after the lease lapsed takes over.
+# Every task also has a CLI, so SCHEDULER=off leaves them to cron instead (the CLIs take no lease).
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER", "on") != "off"
+
+# Identifies this process's leases
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def claim_run(name: str, lease_seconds: float, session_factory=None) -> bool:
+    """Takes the task's lease for lease_seconds unless another live process holds it; returns whether it did."""
+    session_factory = session_factory or SessionLocal
+    table = models.SchedulerLease.__table__
+    now = datetime.utcnow()
+    statement = sqlite_insert(table).values(name=name, owner=PROCESS_ID, expires_at=now + timedelta(seconds=lease_seconds))
+    db = session_factory()
+    try:
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"owner": statement.excluded.owner, "expires_at": statement.excluded.expires_at},
+            where=or_(table.c.expires_at < now, table.c.owner == PROCESS_ID),
+        ))
+        db.commit()
+        return db.execute(select(table.c.owner).where(table.c.name == name)).scalar() == PROCESS_ID
+    finally:
+        db.close()
+
+class PeriodicTask:
+    def __init__(self, name: str, interval_seconds: float, fn: Callable[[], object]):
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.fn = fn
+
+    def run_once(self) -> None:
+        if claim_run(self.name, self.interval_seconds):
+            self.fn()
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                logging.exception(f"Scheduled task '{self.name}' failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+class Scheduler:
+    """Runs each registered task once at start, then every interval_seconds."""
+
+    def __init__(self):
+        self.tasks: Dict[str, PeriodicTask] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+
+    def register(self, name: str, interval_seconds: float, fn: Callable[[], object]) -> None:
+        if interval_seconds <= 0:
+            raise ValueError(f"Scheduled task '{name}' needs a positive interval.")
+        self.tasks[name] = PeriodicTask(name, interval_seconds, fn)
+
+    def start(self) -> None:
+        if self._running:
+            return
+        loop = asyncio.get_running_loop()
+        for name, task in self.tasks.items():
+            self._running[name] = loop.create_task(task.run_forever())
+
+    async def stop(self) -> None:
+        running, self._running = self._running, {}
+        for task in running.values():
+            task.cancel()
+        for task in running.values():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+scheduler = Scheduler()
+
+def interval_from_env(name: str, default_hours: float = 0) -> Optional[float]:
+    """Seconds between runs from an *_INTERVAL_HOURS setting; None when it is unset or not positive."""
+    hours = float(os.getenv(name, default_hours) or 0)
+    return hours * 3600 if hours > 0 else None
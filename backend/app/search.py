@@ -0,0 +1,191 @@
+import argparse
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer, String, column, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Student search index.
+# users_search is an FTS5 table over the searchable user columns, so a search reads the index
+# instead of scanning users with ILIKE. Every search term matches the start of a word (a name, part
+# of a student number or of an email), and prefix indexes keep short prefixes as fast as whole words.
+# It only indexes: the text stays in users (external content) and the triggers below keep the index
+# in step with every INSERT, UPDATE and DELETE, ORM or not.
+# `python -m app.search rebuild` re-indexes every user, e.g. after restoring a backup.
+
+SEARCH_TABLE = "users_search"
+SEARCH_COLUMNS = ("student_number", "last_name", "first_name", "email", "section")
+# bm25 weights, in SEARCH_COLUMNS order
+COLUMN_WEIGHTS = (10.0, 5.0, 5.0, 2.0, 1.0)
+# Fuzzy retries match on the first half of each term, at least this many characters of it
+MIN_FUZZY_PREFIX_LENGTH = 3
+
+STUDENT_PAGE_SIZE = 50
+# Ranking every match by bm25 costs more than it tells once a search (typically a one to three letter
+# prefix) matches thousands of students, so bigger match sets are listed in name order instead
+RANKED_MATCH_LIMIT = 1000
+SORTABLE_COLUMNS = ("student_number", "first_name", "last_name", "year_level", "section", "email")
+RELEVANCE = "relevance"
+
+# Database URL -> whether it has the index; checked once per process, not on every keystroke
+_index_exists: Dict[str, bool] = {}
+
+search_table = table(SEARCH_TABLE, column("rowid", Integer), *(column(name, String) for name in SEARCH_COLUMNS))
+
+def create_student_search_index(connection: Connection) -> bool:
+    """Creates the index and its triggers and fills it; False when SQLite was built without FTS5."""
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+    try:
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{columns}, content='users', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+    except OperationalError as e:
+        logging.warning(f"Student search index unavailable, searches will scan users: {e}")
+        _index_exists[str(connection.engine.url)] = False
+        return False
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON users BEGIN "
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON users BEGIN "
+        f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+    ))
+    connection.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF {columns} ON users BEGIN "
+        f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) VALUES (new.id, {new_values}); END"
+    ))
+    rebuild_student_search_index(connection)
+    _index_exists[str(connection.engine.url)] = True
+    return True
+
+def rebuild_student_search_index(connection) -> None:
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+def search_index_exists(db: Session) -> bool:
+    url = str(db.get_bind().url)
+    if url not in _index_exists:
+        _index_exists[url] = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+        ).first() is not None
+    return _index_exists[url]
+
+# Searching
+
+def _phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+def exact_match_query(terms: List[str]) -> str:
+    """Rows with a word starting with each term."""
+    return " ".join(_phrase(term) + "*" for term in terms)
+
+def fuzzy_match_query(terms: List[str]) -> str:
+    """Rows with a word starting like any term; bm25 ranks those matching the most terms first."""
+    prefixes = dict.fromkeys(term[:max(MIN_FUZZY_PREFIX_LENGTH, (len(term) + 1) // 2)] for term in terms)
+    return " OR ".join(_phrase(prefix) + "*" for prefix in prefixes)
+
+def _like_any_column(term: str):
+    pattern = f"%{term}%"
+    return or_(*(getattr(models.User, name).ilike(pattern) for name in SEARCH_COLUMNS))
+
+def search_students(
+    db: Session,
+    organization_id: int,
+    search: Optional[str] = None,
+    year_level: Optional[str] = None,
+    section: Optional[str] = None,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+    page: int = 1,
+    page_size: int = STUDENT_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """One page of the organization's students.
+
+    Every search term has to start a word of the name, student number, email or section. When no
+    student matches them all, the page holds looser matches instead and `fuzzy` is set. Matches are
+    ranked by relevance unless `sort_by` names a column or there are more than RANKED_MATCH_LIMIT.
+    """
+    User = models.User
+    query = select(User.student_number, User.first_name, User.last_name, User.year_level, User.section, User.email).where(
+        User.organization_id == organization_id
+    )
+    if year_level:
+        query = query.where(User.year_level == year_level)
+    if section:
+        query = query.where(User.section == section)
+
+    # Punctuation on its own matches nothing
+    terms = [term for term in (search or "").split() if any(character.isalnum() for character in term)]
+    if terms and not search_index_exists(db):
+        # Without the index every term is matched anywhere in a column, with a scan
+        for term in terms:
+            query = query.where(_like_any_column(term))
+        terms = []
+
+    if sort_by in SORTABLE_COLUMNS:
+        sort_column = getattr(User, sort_by)
+        order = [sort_column.desc() if descending else sort_column.asc(), User.id]
+    else:
+        order = [User.last_name.asc(), User.id]
+
+    def fetch(match: Optional[str], page: int):
+        statement = query
+        statement_order = order
+        if match is not None:
+            matches = literal_column(SEARCH_TABLE).op("MATCH")(match)
+            ranked = sort_by in (None, "", RELEVANCE) and db.execute(
+                select(func.count()).select_from(search_table).where(matches)
+            ).scalar() <= RANKED_MATCH_LIMIT
+            matching_ids = select(search_table.c.rowid).where(matches)
+            if ranked:
+                rank = func.bm25(literal_column(SEARCH_TABLE), *COLUMN_WEIGHTS)
+                statement = statement.join_from(search_table, User, User.id == search_table.c.rowid).where(matches)
+                statement_order = [rank] + order
+            elif sort_by in SORTABLE_COLUMNS and sort_by != "last_name":
+                # Each match is read by primary key, then the matches are sorted
+                matching = matching_ids.cte("matching")
+                statement = statement.join_from(matching, User, User.id == matching.c.rowid)
+            else:
+                # Name order walks users' (organization_id, last_name) index, keeping the matching ids
+                statement = statement.where(User.id.in_(matching_ids))
+        # One extra row tells whether another page follows
+        return db.execute(statement.order_by(*statement_order).offset((page - 1) * page_size).limit(page_size + 1)).all()
+
+    fuzzy = False
+    exact_match = exact_match_query(terms) if terms else None
+    rows = fetch(exact_match, page)
+    if not rows and exact_match and (page == 1 or not fetch(exact_match, 1)):
+        rows = fetch(fuzzy_match_query(terms), page)
+        fuzzy = bool(rows)
+    return {
+        "students": [dict(row._mapping) for row in rows[:page_size]],
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > page_size,
+        "fuzzy": fuzzy,
+    }
+
+def main(argv: List[str] = None) -> int:
+    from .database import engine
+
+    parser = argparse.ArgumentParser(description="Student search index")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        created = create_student_search_index(connection)
+    print("Rebuilt the student search index." if created else "This SQLite build has no FTS5.")
+    return 0 if created else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
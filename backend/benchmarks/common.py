@@ -0,0 +1,46 @@
+import contextlib
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator, List
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app import models, migrations
+
+# Shared helpers for the benchmark scripts.
+# Each benchmark seeds a throwaway SQLite database with the app's schema and migrations, so it never
+# touches sql_app.db and gives the same numbers on any checkout. Run them from backend/, e.g.
+#   python -m benchmarks.membership_sections
+
+@contextlib.contextmanager
+def temporary_database() -> Iterator[Engine]:
+    directory = tempfile.mkdtemp(prefix="benchmark_")
+    engine = create_engine(f"sqlite:///{Path(directory) / 'benchmark.db'}", connect_args={"check_same_thread": False})
+    try:
+        models.Base.metadata.create_all(bind=engine)
+        migrations.run_migrations(engine)
+        yield engine
+    finally:
+        engine.dispose()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def time_ms(fn: Callable[[], object], repeat: int) -> List[float]:
+    """Wall-clock milliseconds of `repeat` calls, after one warm-up call."""
+    fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def percentile(timings: List[float], fraction: float) -> float:
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def median(timings: List[float]) -> float:
+    return statistics.median(timings)
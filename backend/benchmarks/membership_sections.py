@@ -0,0 +1,123 @@
+import argparse
+import random
+import sys
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, selectinload
+
+from app import finance, models
+from .common import median, temporary_database, time_ms
+
+# /admin/membership/ section rollup: grouping in Python versus GROUP BY.
+# Seeds one organization with --members members spread over three sections, three membership fee
+# items each, then times the section totals computed the way the endpoint used to (load every member
+# with their payment items and group them in Python) against finance.section_totals_query, with and
+# without a period filter. Exits non-zero if the two disagree on any section's figures.
+#   python -m benchmarks.membership_sections [--members 5000] [--repeat 5]
+
+ACADEMIC_YEAR = "2024-2025"
+PERIODS = [(ACADEMIC_YEAR, "1st"), (ACADEMIC_YEAR, "2nd"), ("2025-2026", "1st")]
+SECTIONS = ["A", "B", "C"]
+
+SectionRow = Tuple[str, int, int, float, float, str]
+
+def seed(db: Session, members: int) -> int:
+    random.seed(10)
+    organization = models.Organization(name="Benchmark Org", theme_color="#000000", primary_course_code="BSIT")
+    other = models.Organization(name="Other Org", theme_color="#ffffff", primary_course_code="BSCS")
+    db.add_all([organization, other])
+    db.flush()
+    users = [
+        {
+            "student_number": f"2024-{i:06d}", "email": f"member{i}@school.edu",
+            "organization_id": organization.id if i < members else other.id,
+            "first_name": f"First{i}", "last_name": f"Last{i}", "hashed_password": "x",
+            "year_level": str(1 + i % 4), "section": random.choice(SECTIONS), "is_verified": True,
+        }
+        for i in range(members + members // 5)
+    ]
+    db.execute(insert(models.User), users)
+    user_ids = db.execute(select(models.User.id, models.User.organization_id)).all()
+    items = []
+    for user_id, organization_id in user_ids:
+        for academic_year, semester in PERIODS:
+            items.append({
+                "user_id": user_id, "organization_id": organization_id, "academic_year": academic_year,
+                "semester": semester, "fee": 100.0, "is_paid": random.random() < 0.6,
+                "is_not_responsible": random.random() < 0.05, "year_level_applicable": 1,
+            })
+    db.execute(insert(models.PaymentItem), items)
+    db.commit()
+    return organization.id
+
+def python_section_rows(db: Session, organization_id: int, academic_year: Optional[str], semester: Optional[str]) -> List[SectionRow]:
+    """The endpoint's former implementation: every member and payment item loaded, then grouped in Python."""
+    query = select(models.User).where(models.User.organization_id == organization_id)
+    if academic_year or semester:
+        query = query.join(models.PaymentItem, models.User.id == models.PaymentItem.user_id)
+        payment_item_filters = [models.PaymentItem.student_shirt_order_id.is_(None)]
+        if academic_year:
+            payment_item_filters.append(models.PaymentItem.academic_year == academic_year)
+        if semester:
+            payment_item_filters.append(models.PaymentItem.semester == semester)
+        query = query.where(*payment_item_filters)
+    users = db.execute(query.options(selectinload(models.User.payment_items)).distinct()).scalars().all()
+
+    rows = []
+    processed_sections = set()
+    for user in users:
+        if user.section in processed_sections:
+            continue
+        section_users = [u for u in users if u.section == user.section]
+        paid_count, total_amount, total_paid = 0, 0.0, 0.0
+        for other_user in section_users:
+            relevant_items = [
+                pi for pi in other_user.payment_items
+                if (academic_year is None or pi.academic_year == academic_year)
+                and (semester is None or pi.semester == semester)
+                and pi.student_shirt_order_id is None
+            ]
+            if relevant_items and all(pi.is_paid or pi.is_not_responsible for pi in relevant_items):
+                paid_count += 1
+            for pi in relevant_items:
+                if not pi.is_not_responsible:
+                    total_amount += pi.fee
+                    if pi.is_paid:
+                        total_paid += pi.fee
+        rows.append((user.section, len(section_users), paid_count, total_amount, total_paid, section_users[0].student_number))
+        processed_sections.add(user.section)
+    return rows
+
+def sql_section_rows(db: Session, organization_id: int, academic_year: Optional[str], semester: Optional[str]) -> List[SectionRow]:
+    return [
+        (row.section, row.section_users_count, row.section_paid_count, row.total_amount, row.total_paid, row.User.student_number)
+        for row in db.execute(finance.section_totals_query(organization_id, academic_year, semester)).all()
+    ]
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the /admin/membership/ section rollup")
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with temporary_database() as engine:
+        with Session(engine) as db:
+            organization_id = seed(db, args.members)
+        print(f"Seeded {args.members} members, {args.members * len(PERIODS)} fee items, {len(SECTIONS)} sections.")
+        mismatches = 0
+        for label, academic_year, semester in (("all periods", None, None), ("one period", ACADEMIC_YEAR, "1st")):
+            with Session(engine) as db:
+                python_rows = python_section_rows(db, organization_id, academic_year, semester)
+                sql_rows = sql_section_rows(db, organization_id, academic_year, semester)
+                # The former endpoint listed sections in whatever order DISTINCT returned members
+                if sorted(python_rows) != sorted(sql_rows):
+                    mismatches += 1
+                    print(f"{label}: results differ\n  python: {python_rows}\n  sql:    {sql_rows}")
+                python_ms = median(time_ms(lambda: (python_section_rows(db, organization_id, academic_year, semester), db.expunge_all()), args.repeat))
+                sql_ms = median(time_ms(lambda: sql_section_rows(db, organization_id, academic_year, semester), args.repeat))
+            print(f"{label:<12} python grouping {python_ms:8.1f} ms   GROUP BY {sql_ms:6.1f} ms   {python_ms / sql_ms:5.1f}x")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import argparse
+import random
+import sys
+from typing import List
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app import models, search
+from .common import median, percentile, temporary_database, time_ms
+
+# Student search latency on the FTS5 index.
+# Seeds one organization with --users students (names built from syllables, so prefixes are shared
+# the way real surnames share them), then times search.search_students for each kind of term the
+# admin search box sends. Exits non-zero if any median exceeds --budget-ms.
+#   python -m benchmarks.student_search [--users 100000] [--repeat 25] [--budget-ms 10]
+
+SYLLABLES = ["ma", "ri", "an", "to", "jo", "se", "lu", "ca", "ra", "mi", "na", "el", "de", "la", "cru",
+             "re", "yes", "san", "gar", "ci", "men", "do", "za", "ven", "tu", "bel", "lo", "quin", "ta", "ño"]
+
+def _name(syllables: int) -> str:
+    return "".join(random.choice(SYLLABLES) for _ in range(syllables)).capitalize()
+
+def seed(db: Session, users: int) -> int:
+    random.seed(7)
+    organization = models.Organization(name="Benchmark Org", theme_color="#000000", primary_course_code="BSIT")
+    db.add(organization)
+    db.flush()
+    first_names = [_name(random.randint(2, 3)) for _ in range(400)]
+    last_names = [_name(random.randint(2, 4)) for _ in range(3000)]
+    rows = []
+    for i in range(users):
+        first_name, last_name = random.choice(first_names), random.choice(last_names)
+        rows.append({
+            "student_number": f"20{random.randint(18, 25)}-{i:06d}",
+            "email": f"{first_name.lower()}.{last_name.lower()}{i}@school.edu",
+            "organization_id": organization.id, "first_name": first_name, "last_name": last_name,
+            "hashed_password": "x", "year_level": str(1 + i % 4), "section": f"S{i % 9}", "is_verified": True,
+        })
+    # The users_search triggers index every row as it is inserted
+    db.execute(insert(models.User), rows)
+    db.commit()
+    return organization.id
+
+def sample_terms(db: Session, organization_id: int) -> List[tuple]:
+    """(label, search term, other search_students arguments) for each kind of search."""
+    first_name, last_name, student_number = db.execute(
+        select(models.User.first_name, models.User.last_name, models.User.student_number)
+        .where(models.User.organization_id == organization_id).order_by(models.User.id).offset(700).limit(1)
+    ).one()
+    return [
+        ("last name", last_name),
+        ("first and last name", f"{first_name} {last_name}"),
+        ("4-letter prefix", last_name[:4]),
+        ("3-letter prefix", last_name[:3]),
+        ("2-letter prefix", last_name[:2]),
+        ("1 letter", last_name[:1]),
+        ("student number prefix", student_number[:7]),
+        ("email local part", f"{first_name.lower()}.{last_name.lower()}"),
+        ("typo (fuzzy retry)", last_name[:-1] + "x"),
+        ("no match", "xqzt"),
+        ("no term", None),
+        ("3 letters by number", last_name[:3], {"sort_by": "student_number", "descending": True}),
+        ("3 letters, page 20", last_name[:3], {"page": 20}),
+    ]
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the admin student search")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    with temporary_database() as engine:
+        with Session(engine) as db:
+            organization_id = seed(db, args.users)
+            if not search.search_index_exists(db):
+                print("This SQLite build has no FTS5; nothing to benchmark.")
+                return 1
+            print(f"Seeded {args.users} students in one organization.")
+            over_budget = 0
+            for label, term, *options in sample_terms(db, organization_id):
+                options = options[0] if options else {}
+                result = search.search_students(db, organization_id, search=term, **options)
+                timings = time_ms(lambda: search.search_students(db, organization_id, search=term, **options), args.repeat)
+                typical = median(timings)
+                over_budget += typical > args.budget_ms
+                matches = f"{len(result['students'])}{'+' if result['has_more'] else ''}{' fuzzy' if result['fuzzy'] else ''}"
+                print(f"{label:<22} {term or '':<24} median {typical:6.2f} ms  p95 {percentile(timings, 0.95):6.2f} ms  {matches}")
+    if over_budget:
+        print(f"{over_budget} term(s) over the {args.budget_ms:g} ms budget.")
+    return 1 if over_budget else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,8 +19,13 @@ const studentsTableHead = document.querySelector("#students-table thead");
 
 let selectedYearLevel = "";
 let selectedSection = "";
-let sortColumn = "last_name";
+// Unsorted lists come by last name, searches by relevance, until a column header is clicked
+let sortColumn = "";
 let sortDirection = "asc";
+let searchDebounceTimer = null;
+
+const STUDENTS_PAGE_SIZE = 50;
+const SEARCH_DEBOUNCE_MS = 200;
 
 /**
  * Displays a temporary message box on the screen.
@@ -54,12 +59,15 @@ function displayMessageBox(message, type = "info") {
 /**
  * Fetches student data from the API and populates the table.
  * Applies search, filter, and sort parameters.
+ * @param {number} page - The page to fetch; pages after the first are added below the rows shown.
  */
-async function updateStudentsTable() {
+async function updateStudentsTable(page = 1) {
   const tableBody = document
     .getElementById("students-table")
     .getElementsByTagName("tbody")[0];
-  tableBody.innerHTML = "";
+  if (page === 1) {
+    tableBody.innerHTML = "";
+  }
 
   const studentSearchQuery = document
     .getElementById("student-search-filter")
@@ -85,9 +93,9 @@ async function updateStudentsTable() {
     queryParams.push(`sort_direction=${encodeURIComponent(sortDirection)}`);
   }
 
-  if (queryParams.length > 0) {
-    url += "?" + queryParams.join("&");
-  }
+  queryParams.push(`page=${page}`);
+  queryParams.push(`page_size=${STUDENTS_PAGE_SIZE}`);
+  url += "?" + queryParams.join("&");
 
   try {
     const response = await fetch(url);
@@ -96,12 +104,19 @@ async function updateStudentsTable() {
     }
     let data = await response.json();
 
-    if (data.length === 0) {
+    if (page === 1 && data.students.length === 0) {
       tableBody.innerHTML = `<tr><td colspan="7" style="text-align: center;">No students found matching your criteria.</td></tr>`;
       return;
     }
 
-    data.forEach((student) => {
+    if (page === 1 && data.fuzzy) {
+      const noticeCell = tableBody.insertRow().insertCell();
+      noticeCell.colSpan = 7;
+      noticeCell.style.textAlign = "center";
+      noticeCell.textContent = "No exact matches. Showing similar students.";
+    }
+
+    data.students.forEach((student) => {
       let row = tableBody.insertRow();
       row.insertCell().textContent = student.student_number;
       row.insertCell().textContent = student.first_name;
@@ -111,15 +126,30 @@ async function updateStudentsTable() {
       row.insertCell().textContent = student.email;
 
       const actionCell = row.insertCell();
-      actionCell.innerHTML = `<button class="view-profile-button" data-student-number="${student.student_number}">View</button>`;
+      const viewButton = document.createElement("button");
+      viewButton.className = "view-profile-button";
+      viewButton.dataset.studentNumber = student.student_number;
+      viewButton.textContent = "View";
+      viewButton.addEventListener("click", async function () {
+        await fetchStudentProfileAndShowModal(this.dataset.studentNumber);
+      });
+      actionCell.appendChild(viewButton);
     });
 
-    document.querySelectorAll(".view-profile-button").forEach((button) => {
-      button.addEventListener("click", async function () {
-        const studentNumber = this.dataset.studentNumber;
-        await fetchStudentProfileAndShowModal(studentNumber);
+    if (data.has_more) {
+      const loadMoreRow = tableBody.insertRow();
+      const loadMoreCell = loadMoreRow.insertCell();
+      loadMoreCell.colSpan = 7;
+      loadMoreCell.style.textAlign = "center";
+      const loadMoreButton = document.createElement("button");
+      loadMoreButton.type = "button";
+      loadMoreButton.textContent = "Load more";
+      loadMoreButton.addEventListener("click", () => {
+        loadMoreRow.remove();
+        updateStudentsTable(page + 1);
       });
-    });
+      loadMoreCell.appendChild(loadMoreButton);
+    }
 
     updateSortArrows(sortColumn, sortDirection);
   } catch (error) {
@@ -329,7 +359,8 @@ document.addEventListener("DOMContentLoaded", function () {
   document
     .getElementById("student-search-filter")
     .addEventListener("input", function () {
-      updateStudentsTable();
+      clearTimeout(searchDebounceTimer);
+      searchDebounceTimer = setTimeout(() => updateStudentsTable(), SEARCH_DEBOUNCE_MS);
     });
 
   if (globalCloseButton) {
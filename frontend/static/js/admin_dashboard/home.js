@@ -665,10 +665,13 @@ document.addEventListener('DOMContentLoaded', function() {
     /**
      * Populates the membership fee tracker table with data.
      * @param {Array<Object>} data - Array of member data.
+     * @param {boolean} append - Whether to add the rows after the ones already shown.
      */
-    function populateMembershipTable(data) {
-        membershipTableBody.innerHTML = '';// Clear existing rows [cite: 189]
-        if (data.length === 0) {
+    function populateMembershipTable(data, append = false) {
+        if (!append) {
+            membershipTableBody.innerHTML = '';// Clear existing rows [cite: 189]
+        }
+        if (!append && data.length === 0) {
             membershipTableBody.innerHTML = '<tr><td colspan="3" style="text-align: center;">No data available for the selected filters.</td></tr>';
             return;
         }
@@ -687,6 +690,55 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    /**
+     * Adds a "Load more" row that fetches the next page of the tracker table.
+     * @param {string} url - The tracker URL without a cursor.
+     * @param {string} cursor - The next page's cursor.
+     */
+    function appendLoadMoreRow(url, cursor) {
+        const row = membershipTableBody.insertRow();
+        row.classList.add('load-more-row');
+        const cell = row.insertCell();
+        cell.colSpan = 3;
+        cell.style.textAlign = 'center';
+        const button = document.createElement('button');
+        button.type = 'button';
+        button.textContent = 'Load more';
+        button.addEventListener('click', () => {
+            row.remove();
+            fetchMembershipPage(url, cursor);
+        });
+        cell.appendChild(button);
+    }
+
+    /**
+     * Fetches one page of the tracker table; the first page replaces the rows shown.
+     * @param {string} url - The tracker URL without a cursor.
+     * @param {string|null} cursor - The page's cursor, or null for the first page.
+     */
+    function fetchMembershipPage(url, cursor = null) {
+        const pageUrl = cursor ? `${url}&cursor=${encodeURIComponent(cursor)}` : url;
+        fetch(pageUrl)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                populateMembershipTable(data.members, cursor !== null);
+                // Pages come highest total_paid first, so unpaid members mean no more rows to show
+                const lastMember = data.members[data.members.length - 1];
+                if (data.next_cursor && lastMember && lastMember.total_paid > 0) {
+                    appendLoadMoreRow(url, data.next_cursor);
+                }
+            })
+            .catch(error => {
+                console.error('Error fetching membership data for tracker:', error);
+                membershipTableBody.innerHTML = '<tr><td colspan="3">Error loading data.</td></tr>';
+            });
+    }
+
     /**
      * Fetches membership data for the tracker table.
      * @param {string} academicYear - The academic year filter.
@@ -713,23 +765,12 @@ document.addEventListener('DOMContentLoaded', function() {
             params.push(`semester=${effectiveSemester}`);
         }
 
+        params.push('sort=total_paid', 'order=desc');
+
         url += '?' + params.join('&');
         console.log("Fetching membership data for tracker from URL:", url);
 
-        fetch(url)
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error(`HTTP error! status: ${response.status}`);
-                }
-                return response.json();
-            })
-            .then(data => {
-                populateMembershipTable(data);
-            })
-            .catch(error => {
-                console.error('Error fetching membership data for tracker:', error);
-                membershipTableBody.innerHTML = '<tr><td colspan="3">Error loading data.</td></tr>';
-            });
+        fetchMembershipPage(url);
     }
 
     // --- Initial loads of all data when the page loads ---
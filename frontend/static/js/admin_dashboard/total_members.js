@@ -0,0 +1,130 @@
+/**
+ * Total Members table.
+ * The server renders the first page of members. Further pages come from
+ * /admin/payments/total_members/data as the table is scrolled, and only the rows in view
+ * (plus a few either side) are kept in the DOM; two spacer rows stand in for the rest.
+ */
+(function () {
+  const memberTable = document.querySelector(".member-listing-table");
+  const firstPage = document.getElementById("members-first-page");
+  if (!memberTable || !firstPage) {
+    return;
+  }
+
+  const viewport = memberTable.closest(".member-scroll-viewport");
+  const tableBody = memberTable.querySelector("tbody");
+  const topSpacer = tableBody.querySelector('[data-spacer="top"]');
+  const bottomSpacer = tableBody.querySelector('[data-spacer="bottom"]');
+
+  const OVERSCAN_ROWS = 10;
+  const DEFAULT_ROW_HEIGHT = 52;
+
+  const members = JSON.parse(firstPage.textContent);
+  let nextCursor = memberTable.dataset.nextCursor || null;
+  let loadingPage = false;
+  let rowHeight = DEFAULT_ROW_HEIGHT;
+  let renderedRange = null;
+
+  if (members.length === 0) {
+    return;
+  }
+
+  /**
+   * Builds the table row of one member.
+   * @param {Object} member - The member's student_number, last_name and first_name.
+   * @returns {HTMLTableRowElement} The row.
+   */
+  function createMemberRow(member) {
+    const row = document.createElement("tr");
+    row.insertCell().textContent = member.student_number;
+    row.insertCell().textContent = member.last_name;
+    row.insertCell().textContent = member.first_name;
+    const actionCell = row.insertCell();
+    const viewLink = document.createElement("a");
+    viewLink.href = `/Admin/payments?student_number=${encodeURIComponent(member.student_number)}#payments`;
+    viewLink.className = "action-button-style";
+    viewLink.textContent = "View";
+    actionCell.appendChild(viewLink);
+    return row;
+  }
+
+  /**
+   * Fetches the next page of members and adds it to the list.
+   */
+  async function loadNextPage() {
+    if (loadingPage || !nextCursor) {
+      return;
+    }
+    loadingPage = true;
+    const params = new URLSearchParams({ cursor: nextCursor });
+    ["section", "yearLevel", "studentNumber"].forEach((key) => {
+      const value = memberTable.dataset[key];
+      if (value) {
+        params.set(key.replace(/[A-Z]/g, (letter) => `_${letter.toLowerCase()}`), value);
+      }
+    });
+    try {
+      const response = await fetch(`/admin/payments/total_members/data?${params}`);
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+      const data = await response.json();
+      members.push(...data.members);
+      nextCursor = data.next_cursor;
+    } catch (error) {
+      console.error("Error fetching members:", error);
+      nextCursor = null;
+    } finally {
+      loadingPage = false;
+    }
+    renderedRange = null;
+    renderWindow();
+  }
+
+  /**
+   * Renders the members in view and sizes the spacers for the rest.
+   */
+  function renderWindow() {
+    const firstVisible = Math.floor(viewport.scrollTop / rowHeight);
+    let start = Math.max(0, firstVisible - OVERSCAN_ROWS);
+    // Starting on an even member keeps the striped row colors from swapping while scrolling
+    start -= start % 2;
+    const visibleRows = Math.ceil(viewport.clientHeight / rowHeight);
+    const end = Math.min(members.length, firstVisible + visibleRows + OVERSCAN_ROWS);
+
+    if (!renderedRange || renderedRange[0] !== start || renderedRange[1] !== end) {
+      while (topSpacer.nextElementSibling !== bottomSpacer) {
+        topSpacer.nextElementSibling.remove();
+      }
+      const rows = document.createDocumentFragment();
+      members.slice(start, end).forEach((member) => rows.appendChild(createMemberRow(member)));
+      bottomSpacer.before(rows);
+      topSpacer.style.height = `${start * rowHeight}px`;
+      bottomSpacer.style.height = `${(members.length - end) * rowHeight}px`;
+      renderedRange = [start, end];
+    }
+
+    if (end >= members.length - OVERSCAN_ROWS) {
+      loadNextPage();
+    }
+  }
+
+  const firstRow = topSpacer.nextElementSibling;
+  if (firstRow && firstRow !== bottomSpacer && firstRow.offsetHeight) {
+    rowHeight = firstRow.offsetHeight;
+  }
+
+  let frameRequested = false;
+  viewport.addEventListener("scroll", () => {
+    if (!frameRequested) {
+      frameRequested = true;
+      requestAnimationFrame(() => {
+        frameRequested = false;
+        renderWindow();
+      });
+    }
+  });
+  window.addEventListener("resize", renderWindow);
+
+  renderWindow();
+})();
@@ -1,7 +1,11 @@
 let isNotificationsDropdownOpen = false;
-let lastSeenUnreadNotificationIds = new Set();
+// delivered_count of /notifications/unread_count when the dropdown was last opened
+let lastSeenDeliveredCount = 0;
 let notificationPollingTimer = null;
 const POLLING_INTERVAL_MS = 30000;
+// Live counts pushed by /notifications/stream; polling is the fallback when it is unavailable
+let notificationEventSource = null;
+let notificationStreamFailed = false;
 
 function applyTheme(isDark) {
   const body = document.body;
@@ -110,18 +114,21 @@ function applyUserTheme() {
     });
 }
 
-async function fetchAndDisplayNotifications(includeRead = true) {
+async function fetchAndDisplayNotifications(includeRead = true, cursor = null) {
   const notificationsDropdown = document.getElementById(
     "notifications-dropdown"
   );
   if (!notificationsDropdown) {
     return [];
   }
-  notificationsDropdown.innerHTML =
-    '<div class="notification-item">Loading notifications...</div>';
+  if (!cursor) {
+    notificationsDropdown.innerHTML =
+      '<div class="notification-item">Loading notifications...</div>';
+  }
 
   try {
-    const url = `/get_user_notifications?include_read=${includeRead}`;
+    let url = `/get_user_notifications?include_read=${includeRead}`;
+    if (cursor) url += `&cursor=${encodeURIComponent(cursor)}`;
     const response = await fetch(url, { cache: "no-store" });
 
     if (!response.ok) {
@@ -135,6 +142,18 @@ async function fetchAndDisplayNotifications(includeRead = true) {
     const data = await response.json();
     const notifications = data.notifications;
 
+    // Older pages are appended below the ones already shown
+    notificationsDropdown.querySelector(".load-more-notifications")?.remove();
+    if (cursor) {
+      appendNotificationItems(
+        notificationsDropdown,
+        notifications,
+        data.next_cursor,
+        includeRead
+      );
+      return notifications;
+    }
+
     notificationsDropdown.innerHTML = "";
 
     const clearAllContainer = document.createElement("div");
@@ -160,85 +179,110 @@ async function fetchAndDisplayNotifications(includeRead = true) {
       return [];
     }
 
-    notifications.forEach((notification) => {
-      const notificationContainer = document.createElement("div");
-      notificationContainer.classList.add("notification-container");
-
-      const notificationItem = document.createElement("a");
-      notificationItem.classList.add(
-        "notification-item",
-        notification.is_read ? "read" : "unread"
-      );
-      notificationItem.textContent = notification.message || "New Notification";
-      notificationItem.href = notification.url || "#";
-      if (!notification.url) notificationItem.style.cursor = "default";
-
-      if (!notification.is_read && notification.id) {
-        notificationItem.addEventListener("click", async (event) => {
-          if (
-            notificationItem.href === "#" ||
-            notificationItem.target === "_blank"
-          ) {
-            event.preventDefault();
-          }
+    appendNotificationItems(
+      notificationsDropdown,
+      notifications,
+      data.next_cursor,
+      includeRead
+    );
+    return notifications;
+  } catch (error) {
+    notificationsDropdown.innerHTML =
+      '<div class="notification-item">Failed to load notifications.</div>';
+    return [];
+  }
+}
 
-          if (notificationItem.classList.contains("unread")) {
-            const success = notification.group_ids
-              ? await markNotificationsAsReadBulk(notification.group_ids)
-              : await markNotificationAsRead(notification.id);
-
-            if (success) {
-              await fetchAndDisplayNotifications(true);
-              updateBadgeBasedOnNewUnread();
-
-              if (
-                notification.url &&
-                notification.url !== "#" &&
-                notificationItem.href === "#"
-              ) {
-                window.location.href = notification.url;
-              }
-            }
-          }
-        });
-      }
+function appendNotificationItems(
+  notificationsDropdown,
+  notifications,
+  nextCursor,
+  includeRead
+) {
+  notifications.forEach((notification) => {
+    const notificationContainer = document.createElement("div");
+    notificationContainer.classList.add("notification-container");
+
+    const notificationItem = document.createElement("a");
+    notificationItem.classList.add(
+      "notification-item",
+      notification.is_read ? "read" : "unread"
+    );
+    notificationItem.textContent = notification.message || "New Notification";
+    notificationItem.href = notification.url || "#";
+    if (!notification.url) notificationItem.style.cursor = "default";
 
-      const clearButton = document.createElement("button");
-      clearButton.classList.add("clear-notification-btn");
-      clearButton.innerHTML = "&times;";
-      clearButton.title = "Clear notification";
-      clearButton.addEventListener("click", async (event) => {
-        event.stopPropagation();
-        event.preventDefault();
+    if (!notification.is_read && notification.id) {
+      notificationItem.addEventListener("click", async (event) => {
+        if (
+          notificationItem.href === "#" ||
+          notificationItem.target === "_blank"
+        ) {
+          event.preventDefault();
+        }
 
-        const notificationIdsToClear = notification.group_ids || [
-          notification.id,
-        ];
-        let successCount = 0;
-        for (const id of notificationIdsToClear) {
-          if (await clearNotification(id)) {
-            successCount++;
+        if (notificationItem.classList.contains("unread")) {
+          const success = notification.group_ids
+            ? await markNotificationsAsReadBulk(notification.group_ids)
+            : await markNotificationAsRead(notification.id);
+
+          if (success) {
+            await fetchAndDisplayNotifications(true);
+            updateBadgeBasedOnNewUnread();
+
+            if (
+              notification.url &&
+              notification.url !== "#" &&
+              notificationItem.href === "#"
+            ) {
+              window.location.href = notification.url;
+            }
           }
         }
+      });
+    }
 
-        if (successCount > 0) {
-          await fetchAndDisplayNotifications(true);
-          updateBadgeBasedOnNewUnread();
-        } else {
-          alert("Failed to clear notification.");
+    const clearButton = document.createElement("button");
+    clearButton.classList.add("clear-notification-btn");
+    clearButton.innerHTML = "&times;";
+    clearButton.title = "Clear notification";
+    clearButton.addEventListener("click", async (event) => {
+      event.stopPropagation();
+      event.preventDefault();
+
+      const notificationIdsToClear = notification.group_ids || [
+        notification.id,
+      ];
+      let successCount = 0;
+      for (const id of notificationIdsToClear) {
+        if (await clearNotification(id)) {
+          successCount++;
         }
-      });
+      }
 
-      notificationContainer.appendChild(notificationItem);
-      notificationContainer.appendChild(clearButton);
-      notificationsDropdown.appendChild(notificationContainer);
+      if (successCount > 0) {
+        await fetchAndDisplayNotifications(true);
+        updateBadgeBasedOnNewUnread();
+      } else {
+        alert("Failed to clear notification.");
+      }
     });
 
-    return notifications;
-  } catch (error) {
-    notificationsDropdown.innerHTML =
-      '<div class="notification-item">Failed to load notifications.</div>';
-    return [];
+    notificationContainer.appendChild(notificationItem);
+    notificationContainer.appendChild(clearButton);
+    notificationsDropdown.appendChild(notificationContainer);
+  });
+
+  if (nextCursor) {
+    const loadMoreBtn = document.createElement("button");
+    loadMoreBtn.classList.add("load-more-notifications");
+    loadMoreBtn.textContent = "Load more";
+    loadMoreBtn.onclick = async (event) => {
+      event.stopPropagation();
+      loadMoreBtn.disabled = true;
+      await fetchAndDisplayNotifications(includeRead, nextCursor);
+    };
+    notificationsDropdown.appendChild(loadMoreBtn);
   }
 }
 
@@ -294,7 +338,27 @@ async function clearAllNotifications() {
   }
 }
 
-async function updateBadgeBasedOnNewUnread() {
+async function fetchNotificationCounts() {
+  try {
+    const response = await fetch("/notifications/unread_count", {
+      cache: "no-store",
+    });
+    return response.ok ? await response.json() : null;
+  } catch (error) {
+    return null;
+  }
+}
+
+function rememberSeenDeliveredCount(counts) {
+  if (!counts) return;
+  lastSeenDeliveredCount = counts.delivered_count;
+  localStorage.setItem(
+    "lastSeenDeliveredNotificationCount",
+    String(lastSeenDeliveredCount)
+  );
+}
+
+async function updateBadgeBasedOnNewUnread(pushedCounts = null) {
   const unreadBadge = document.getElementById("unread-notifications-badge");
   if (!unreadBadge) return;
 
@@ -305,24 +369,16 @@ async function updateBadgeBasedOnNewUnread() {
   }
 
   try {
-    const currentUnreadNotifications = await fetchAndDisplayNotifications(
-      false
+    const counts = pushedCounts || (await fetchNotificationCounts());
+    if (!counts) throw new Error("Failed to fetch notification counts");
+    // Unread notifications that arrived since the dropdown was last opened
+    const totalNewUnreadCount = Math.max(
+      0,
+      Math.min(
+        counts.unread_count,
+        counts.delivered_count - lastSeenDeliveredCount
+      )
     );
-    const currentUnreadIds = new Set();
-    currentUnreadNotifications.forEach((notification) => {
-      (notification.group_ids || [notification.id]).forEach((id) =>
-        currentUnreadIds.add(id)
-      );
-    });
-
-    const newUnreadIds = new Set();
-    currentUnreadIds.forEach((id) => {
-      if (!lastSeenUnreadNotificationIds.has(id)) {
-        newUnreadIds.add(id);
-      }
-    });
-
-    const totalNewUnreadCount = newUnreadIds.size;
 
     if (totalNewUnreadCount > 0) {
       unreadBadge.textContent = totalNewUnreadCount.toString();
@@ -337,8 +393,36 @@ async function updateBadgeBasedOnNewUnread() {
   }
 }
 
+function startNotificationStream() {
+  if (notificationEventSource) return true;
+  if (!window.EventSource || notificationStreamFailed) return false;
+
+  notificationEventSource = new EventSource("/notifications/stream");
+  notificationEventSource.addEventListener("counts", (event) => {
+    const counts = JSON.parse(event.data);
+    if (isNotificationsDropdownOpen) {
+      fetchAndDisplayNotifications(true);
+      rememberSeenDeliveredCount(counts);
+    } else {
+      updateBadgeBasedOnNewUnread(counts);
+    }
+  });
+  notificationEventSource.onerror = () => {
+    // The browser reconnects by itself unless the server refused the stream
+    if (notificationEventSource.readyState !== EventSource.CLOSED) return;
+    notificationEventSource = null;
+    notificationStreamFailed = true;
+    if (!isNotificationsDropdownOpen) startNotificationPolling();
+  };
+  return true;
+}
+
 function startNotificationPolling() {
   clearInterval(notificationPollingTimer);
+  if (startNotificationStream()) {
+    updateBadgeBasedOnNewUnread();
+    return;
+  }
   notificationPollingTimer = setInterval(
     updateBadgeBasedOnNewUnread,
     POLLING_INTERVAL_MS
@@ -365,21 +449,8 @@ function setupDropdown(buttonSelector, dropdownId) {
           unreadBadge.classList.add("hidden");
         }
 
-        fetchAndDisplayNotifications(true).then((notifications) => {
-          lastSeenUnreadNotificationIds.clear();
-          notifications.forEach((notification) => {
-            if (!notification.is_read) {
-              (notification.group_ids || [notification.id]).forEach((id) =>
-                lastSeenUnreadNotificationIds.add(id)
-              );
-            }
-          });
-
-          localStorage.setItem(
-            "lastSeenUnreadNotificationIds",
-            JSON.stringify(Array.from(lastSeenUnreadNotificationIds))
-          );
-        });
+        fetchAndDisplayNotifications(true);
+        fetchNotificationCounts().then(rememberSeenDeliveredCount);
         clearInterval(notificationPollingTimer);
       } else {
         startNotificationPolling();
@@ -518,14 +589,10 @@ document.addEventListener("DOMContentLoaded", function () {
 
   initializeSidebarToggle();
 
-  const storedIds = localStorage.getItem("lastSeenUnreadNotificationIds");
-  if (storedIds) {
-    try {
-      lastSeenUnreadNotificationIds = new Set(JSON.parse(storedIds));
-    } catch (e) {
-      localStorage.removeItem("lastSeenUnreadNotificationIds");
-    }
-  }
+  localStorage.removeItem("lastSeenUnreadNotificationIds");
+  lastSeenDeliveredCount =
+    parseInt(localStorage.getItem("lastSeenDeliveredNotificationCount"), 10) ||
+    0;
 
   startNotificationPolling();
 